@@ -5,4 +5,209 @@ This is the file from which you can do:
     from building_with_llms_made_simple import some_function
 
 Use it to control the top-level API of your Python data science project.
+
+Every name below is resolved lazily via a module-level `__getattr__`.
+Importing the package (or running a lightweight CLI command)
+therefore never pulls in llamabot, litellm, torch or sentence-transformers;
+those are only imported the first time one of their names is accessed.
 """
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+# Maps each public name to the module that defines it.
+# Relative module paths are resolved against this package.
+_LAZY_ATTRIBUTES = {
+    # Bots
+    "SimpleBot": "llamabot",
+    "StructuredBot": "llamabot",
+    "QueryBot": "llamabot",
+    "AgentBot": "llamabot",
+    "LanceDBDocStore": "llamabot",
+    "prompt": "llamabot",
+    "tool": "llamabot",
+    # Docstore factories and the RAG bot
+    "rag_bot_sysprompt": ".rag",
+    "create_knowledge_store": ".rag",
+    "create_memory_store": ".rag",
+    "create_rag_bot": ".rag",
+    "KnowledgeStore": ".docstore",
+    "SyncStats": ".docstore",
+    "MetadataFilter": ".docstore",
+    "ANNConfig": ".ann",
+    "SearchParams": ".ann",
+    "ConversationMemory": ".memory",
+    "MemoryPolicy": ".memory",
+    "llm_summarizer": ".memory",
+    "HybridRetriever": ".retrieval",
+    "reciprocal_rank_fusion": ".retrieval",
+    "CrossEncoderReranker": ".rerank",
+    "RerankingRetriever": ".rerank",
+    "ScoreCache": ".rerank",
+    "ContextPacker": ".packing",
+    "PackingRetriever": ".packing",
+    "FanOutRetriever": ".fanout",
+    "fan_out": ".fanout",
+    "afan_out": ".fanout",
+    "enable_concurrent_retrieval": ".fanout",
+    # Chunkers
+    "insert_delimiter": ".chunking",
+    "iter_sections": ".chunking",
+    "Section": ".chunking",
+    "SectionChunk": ".chunking",
+    "SectionChunker": ".chunking",
+    "create_section_chunker": ".chunking",
+    "create_token_chunker": ".chunking",
+    "create_sentence_chunker": ".chunking",
+    # Structured output models
+    "Person": ".models",
+    "Tutorial": ".models",
+    "DocstringBreakdown": ".models",
+    "DocstringEvaluation": ".models",
+    # Eval helpers
+    "EVALUATION_CRITERIA": ".evals",
+    "improved_system_prompt": ".evals",
+    "detailed_docstring_evaluation_system_prompt": ".evals",
+    "create_improved_docstring_bot": ".evals",
+    # Concurrent batches
+    "batch": ".batch",
+    "abatch": ".batch",
+    "BatchResult": ".batch",
+    # Response caching
+    "ResponseCache": ".cache",
+    "enable_response_cache": ".cache",
+    "SemanticCache": ".semantic_cache",
+    "SemanticCachingBot": ".semantic_cache",
+    "CachedAnswer": ".semantic_cache",
+    # Request coalescing
+    "CoalescingBot": ".coalesce",
+    # Adaptive concurrency
+    "AdaptiveLimiter": ".concurrency",
+    "LimiterConfig": ".concurrency",
+    "configure_limiter": ".concurrency",
+    "limiter_for": ".concurrency",
+    "enable_adaptive_concurrency": ".concurrency",
+    # Pooled HTTP transport
+    "PoolConfig": ".transport",
+    "pooled_client": ".transport",
+    "enable_pooling": ".transport",
+    # Embedding cache
+    "EmbeddingCache": ".embeddings",
+    "CACHED_SENTENCE_TRANSFORMERS": ".embeddings",
+    "SHARED_SENTENCE_TRANSFORMERS": ".embeddings",
+    # Shared models
+    "get_tokenizer": ".model_registry",
+    "get_sentence_transformer": ".model_registry",
+    "warm_up": ".model_registry",
+    "shared_process_pool": ".model_registry",
+}
+
+__all__ = sorted(_LAZY_ATTRIBUTES)
+
+if TYPE_CHECKING:  # pragma: no cover
+    from llamabot import (  # noqa: F401
+        AgentBot,
+        LanceDBDocStore,
+        QueryBot,
+        SimpleBot,
+        StructuredBot,
+        prompt,
+        tool,
+    )
+
+    from .ann import ANNConfig, SearchParams  # noqa: F401
+    from .batch import BatchResult, abatch, batch  # noqa: F401
+    from .cache import ResponseCache, enable_response_cache  # noqa: F401
+    from .chunking import (  # noqa: F401
+        Section,
+        SectionChunk,
+        SectionChunker,
+        create_section_chunker,
+        create_sentence_chunker,
+        create_token_chunker,
+        insert_delimiter,
+        iter_sections,
+    )
+    from .coalesce import CoalescingBot  # noqa: F401
+    from .concurrency import (  # noqa: F401
+        AdaptiveLimiter,
+        LimiterConfig,
+        configure_limiter,
+        enable_adaptive_concurrency,
+        limiter_for,
+    )
+    from .docstore import KnowledgeStore, MetadataFilter, SyncStats  # noqa: F401
+    from .embeddings import (  # noqa: F401
+        CACHED_SENTENCE_TRANSFORMERS,
+        SHARED_SENTENCE_TRANSFORMERS,
+        EmbeddingCache,
+    )
+    from .evals import (  # noqa: F401
+        EVALUATION_CRITERIA,
+        create_improved_docstring_bot,
+        detailed_docstring_evaluation_system_prompt,
+        improved_system_prompt,
+    )
+    from .fanout import (  # noqa: F401
+        FanOutRetriever,
+        afan_out,
+        enable_concurrent_retrieval,
+        fan_out,
+    )
+    from .memory import ConversationMemory, MemoryPolicy, llm_summarizer  # noqa: F401
+    from .model_registry import (  # noqa: F401
+        get_sentence_transformer,
+        get_tokenizer,
+        shared_process_pool,
+        warm_up,
+    )
+    from .models import (  # noqa: F401
+        DocstringBreakdown,
+        DocstringEvaluation,
+        Person,
+        Tutorial,
+    )
+    from .packing import ContextPacker, PackingRetriever  # noqa: F401
+    from .rag import (  # noqa: F401
+        create_knowledge_store,
+        create_memory_store,
+        create_rag_bot,
+        rag_bot_sysprompt,
+    )
+    from .rerank import (  # noqa: F401
+        CrossEncoderReranker,
+        RerankingRetriever,
+        ScoreCache,
+    )
+    from .retrieval import HybridRetriever, reciprocal_rank_fusion  # noqa: F401
+    from .semantic_cache import (  # noqa: F401
+        CachedAnswer,
+        SemanticCache,
+        SemanticCachingBot,
+    )
+    from .transport import PoolConfig, enable_pooling, pooled_client  # noqa: F401
+
+
+def __getattr__(name: str) -> Any:
+    """Import a top-level attribute on first access.
+
+    :param name: The attribute being looked up.
+    :return: The requested attribute.
+    :raises AttributeError: If `name` is not part of the top-level API.
+    """
+    try:
+        module_path = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_path, __name__), name)
+    # Cache on the module so that `__getattr__` is only hit once per name.
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    """List the module's attributes, including the lazily loaded ones.
+
+    :return: Sorted attribute names.
+    """
+    return sorted(set(globals()) | set(__all__))
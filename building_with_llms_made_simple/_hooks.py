@@ -0,0 +1,80 @@
+"""Middleware around llamabot's single LLM call point.
+
+Every llamabot bot (SimpleBot, StructuredBot, QueryBot, AgentBot)
+sends its request through `llamabot.bot.simplebot.make_response`,
+which each bot module imports by name.
+`add_middleware` wraps that function in every bot module, once per process,
+with a chain of middleware functions `(bot, messages, stream, call_next)`.
+Middleware runs in ascending `order`, so e.g. the response cache (order 0)
+can answer before the concurrency limiter (order 10) takes a slot.
+Middleware is expected to pass bots it does not apply to straight to
+`call_next`, so bots that opt into nothing behave exactly as before.
+"""
+
+import sys
+from importlib import import_module
+from typing import Callable
+
+Middleware = Callable[..., object]
+
+# Modules that import `make_response` by name and so need patching individually.
+_BOT_MODULES = (
+    "llamabot.bot.simplebot",
+    "llamabot.bot.structuredbot",
+    "llamabot.bot.querybot",
+    "llamabot.bot.agentbot",
+)
+
+_MIDDLEWARE: list[tuple[int, Middleware]] = []
+
+
+def _with_middleware(original: Callable) -> Callable:
+    """Wrap `make_response` so that each call runs through the middleware chain.
+
+    :param original: llamabot's `make_response`.
+    :return: The wrapped function.
+    """
+
+    def make_response(bot, messages, stream=True):
+        """Run the middleware chain, ending with the real `make_response`.
+
+        :param bot: The calling bot.
+        :param messages: Llamabot messages, system prompt included.
+        :param stream: Whether the bot asked for a streamed response.
+        :return: Whatever the chain returns: a `ModelResponse` or a stream.
+        """
+
+        def call(index: int, stream: bool):
+            """Invoke the middleware at `index`, or the original function.
+
+            :param index: Position in the middleware chain.
+            :param stream: Whether to request a streamed response.
+            :return: The response.
+            """
+            if index == len(_MIDDLEWARE):
+                return original(bot, messages, stream)
+            _, middleware = _MIDDLEWARE[index]
+            return middleware(
+                bot, messages, stream, lambda stream: call(index + 1, stream)
+            )
+
+        return call(0, stream)
+
+    make_response.__wrapped__ = original
+    return make_response
+
+
+def add_middleware(middleware: Middleware, order: int) -> None:
+    """Register middleware around every bot's LLM call, if not already present.
+
+    :param middleware: Function `(bot, messages, stream, call_next)`,
+        where `call_next(stream)` continues down the chain.
+    :param order: Position in the chain; lower runs first.
+    """
+    if all(existing is not middleware for _, existing in _MIDDLEWARE):
+        _MIDDLEWARE.append((order, middleware))
+        _MIDDLEWARE.sort(key=lambda entry: entry[0])
+    for name in _BOT_MODULES:
+        module = sys.modules.get(name) or import_module(name)
+        if not hasattr(module.make_response, "__wrapped__"):
+            module.make_response = _with_middleware(module.make_response)
@@ -0,0 +1,224 @@
+"""A minimal asyncio HTTP/1.1 server shared by the local daemons.
+
+Only the standard library is used, so that the servers start instantly
+and the stand-in LLM server can run on a bare CI box.
+Connections are kept alive between requests,
+and responses can be streamed with chunked transfer encoding.
+"""
+
+import asyncio
+import json
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Union
+
+
+@dataclass
+class Request:
+    """An HTTP request.
+
+    :param method: HTTP method, e.g. "POST".
+    :param path: Request path without the query string.
+    :param headers: Request headers with lower-cased names.
+    :param body: Raw request body.
+    """
+
+    method: str
+    path: str
+    headers: dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+
+    def json(self) -> Any:
+        """Decode the request body as JSON.
+
+        :return: The decoded body, or None if the body is empty.
+        """
+        return json.loads(self.body) if self.body else None
+
+
+@dataclass
+class Response:
+    """An HTTP response.
+
+    :param status: HTTP status code.
+    :param body: Either the full body, or an async iterator of body chunks
+        to be sent with chunked transfer encoding.
+    :param content_type: Value of the Content-Type header.
+    """
+
+    status: int = 200
+    body: Union[bytes, AsyncIterator[bytes]] = b""
+    content_type: str = "application/json"
+
+    @classmethod
+    def json(cls, payload: Any, status: int = 200) -> "Response":
+        """Build a JSON response.
+
+        :param payload: JSON-serializable payload.
+        :param status: HTTP status code.
+        :return: The response.
+        """
+        return cls(status=status, body=json.dumps(payload).encode())
+
+
+Handler = Callable[[Request], Awaitable[Response]]
+
+
+def _parse_length(value: Union[str, bytes], base: int = 10) -> int:
+    """Parse a Content-Length header or a chunk size.
+
+    :param value: The length as sent.
+    :param base: 10 for Content-Length, 16 for chunk sizes.
+    :return: The length.
+    :raises ValueError: If it is not a non-negative integer.
+    """
+    try:
+        length = int(value, base)
+    except ValueError:
+        length = -1
+    if length < 0:
+        raise ValueError(f"Invalid length: {value!r}")
+    return length
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Request]:
+    """Read one request from a connection.
+
+    :param reader: The connection's stream reader.
+    :return: The request, or None if the client closed the connection.
+    :raises ValueError: If the request line or body framing is malformed.
+    """
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    parts = request_line.decode("latin-1").split()
+    if len(parts) != 3:
+        raise ValueError(f"Malformed request line: {request_line!r}")
+    method, target, _ = parts
+
+    headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        body = b""
+        while size := _parse_length((await reader.readline()).split(b";")[0], 16):
+            body += await reader.readexactly(size)
+            await reader.readline()
+        await reader.readline()
+    else:
+        body = await reader.readexactly(
+            _parse_length(headers.get("content-length", "0"))
+        )
+
+    return Request(
+        method=method.upper(),
+        path=target.split("?", 1)[0],
+        headers=headers,
+        body=body,
+    )
+
+
+async def _write_response(
+    writer: asyncio.StreamWriter, response: Response, keep_alive: bool
+) -> None:
+    """Serialize a response onto a connection.
+
+    :param writer: The connection's stream writer.
+    :param response: The response to send.
+    :param keep_alive: Whether the connection stays open afterwards.
+    """
+    streaming = not isinstance(response.body, bytes)
+    head = [
+        f"HTTP/1.1 {response.status} {HTTPStatus(response.status).phrase}",
+        f"Content-Type: {response.content_type}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        "Transfer-Encoding: chunked"
+        if streaming
+        else f"Content-Length: {len(response.body)}",
+    ]
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+    if not streaming:
+        writer.write(response.body)
+        await writer.drain()
+        return
+    async for chunk in response.body:
+        if chunk:
+            writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            await writer.drain()
+    writer.write(b"0\r\n\r\n")
+    await writer.drain()
+
+
+async def _serve_connection(
+    handler: Handler, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+) -> None:
+    """Serve requests on one connection until either side closes it.
+
+    :param handler: Coroutine function that turns a request into a response.
+    :param reader: The connection's stream reader.
+    :param writer: The connection's stream writer.
+    """
+    try:
+        while True:
+            try:
+                request = await _read_request(reader)
+            except ValueError as e:
+                # The stream can no longer be framed: answer, then hang up.
+                response = Response.json({"error": f"Bad request: {e}"}, 400)
+                await _write_response(writer, response, keep_alive=False)
+                break
+            if request is None:
+                break
+            keep_alive = request.headers.get("connection", "").lower() != "close"
+            try:
+                response = await handler(request)
+            except json.JSONDecodeError as e:
+                response = Response.json({"error": f"Invalid JSON: {e}"}, 400)
+            except Exception as e:
+                response = Response.json({"error": f"{type(e).__name__}: {e}"}, 500)
+            await _write_response(writer, response, keep_alive)
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(
+    handler: Handler,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    socket_path: Optional[str] = None,
+    connect_delay: float = 0.0,
+) -> asyncio.AbstractServer:
+    """Start serving `handler` over TCP or a Unix domain socket.
+
+    :param handler: Coroutine function that turns a request into a response.
+    :param host: Interface to bind when serving over TCP.
+    :param port: Port to bind when serving over TCP; 0 picks a free port.
+    :param socket_path: If given, serve on this Unix socket instead of TCP.
+    :param connect_delay: Seconds to wait before serving a new connection,
+        to simulate connection set-up costs such as TLS handshakes.
+    :return: The running asyncio server.
+    """
+
+    async def on_connect(reader, writer):
+        """Serve a newly accepted connection.
+
+        :param reader: The connection's stream reader.
+        :param writer: The connection's stream writer.
+        """
+        try:
+            if connect_delay:
+                await asyncio.sleep(connect_delay)
+            await _serve_connection(handler, reader, writer)
+        except asyncio.CancelledError:
+            # Cancelled by server shutdown; the connection is already closed.
+            pass
+
+    if socket_path:
+        return await asyncio.start_unix_server(on_connect, path=socket_path)
+    return await asyncio.start_server(on_connect, host=host, port=port)
@@ -0,0 +1,203 @@
+"""Approximate nearest neighbour (ANN) index management for LanceDB tables.
+
+A freshly created knowledge store is searched by brute force,
+which is exact and fine up to a few hundred thousand chunks
+but grows linearly with the table.
+`maintain_vector_index` creates an IVF-PQ or IVF-HNSW index
+once a table crosses `ANNConfig.min_rows`, sized for the table.
+Rows added later are folded into the existing partitions by `table.optimize()`,
+which does not retrain the centroids;
+once the table has grown by `rebuild_growth` since training,
+the index is rebuilt so partitions stay balanced.
+The training size is kept in the index name, so this survives reopening.
+
+`SearchParams` carries the query-time recall/latency knobs:
+`nprobes` (IVF partitions searched), `refine_factor`
+(candidates re-ranked with full-precision vectors) and `ef` (HNSW beam width).
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Optional
+
+# Index types this module builds, by LanceDB's `create_index` name.
+INDEX_TYPES = ("IVF_PQ", "IVF_HNSW_SQ", "IVF_HNSW_PQ")
+
+_TRAINED_ROWS = re.compile(r"^vector_ann_(\d+)$")
+
+
+@dataclass(frozen=True)
+class ANNConfig:
+    """When and how to index a table's vectors.
+
+    :param index_type: One of `INDEX_TYPES`.
+    :param min_rows: Create the index once the table has this many rows.
+    :param rebuild_growth: Rebuild once the table has grown by this factor
+        since the index was trained.
+    :param distance_type: "l2", "cosine" or "dot"; queries use the same metric.
+    :param num_partitions: IVF partitions; by default sized for the table,
+        about 4096 rows per partition for IVF-PQ
+        and a million rows per HNSW graph.
+    :param num_sub_vectors: PQ sub-vectors; by default one per 16 dimensions
+        (or 8, if the dimension is not a multiple of 16).
+    :param m: HNSW neighbours per node.
+    :param ef_construction: HNSW beam width while building.
+    """
+
+    index_type: str = "IVF_PQ"
+    min_rows: int = 100_000
+    rebuild_growth: float = 2.0
+    distance_type: str = "l2"
+    num_partitions: Optional[int] = None
+    num_sub_vectors: Optional[int] = None
+    m: int = 20
+    ef_construction: int = 300
+
+    def __post_init__(self):
+        """Validate the index type.
+
+        :raises ValueError: If `index_type` is not supported.
+        """
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(
+                f"Unknown index type {self.index_type!r}; choose one of {INDEX_TYPES}."
+            )
+
+    def partitions_for(self, num_rows: int) -> int:
+        """Pick the number of IVF partitions for a table.
+
+        :param num_rows: Rows the index is trained on.
+        :return: The number of partitions.
+        """
+        if self.num_partitions is not None:
+            return self.num_partitions
+        rows_per_partition = 4096 if self.index_type == "IVF_PQ" else 1_000_000
+        return max(1, num_rows // rows_per_partition)
+
+    def sub_vectors_for(self, ndims: int) -> int:
+        """Pick the number of PQ sub-vectors for a vector size.
+
+        :param ndims: The vector dimension.
+        :return: The number of sub-vectors, which divides `ndims`.
+        """
+        if self.num_sub_vectors is not None:
+            return self.num_sub_vectors
+        for width in (16, 8, 4, 2):
+            if ndims % width == 0:
+                return ndims // width
+        return ndims
+
+    def index_config(self, num_rows: int, ndims: int) -> Any:
+        """Build the LanceDB index configuration for a table.
+
+        :param num_rows: Rows the index is trained on.
+        :param ndims: The vector dimension.
+        :return: A `lancedb.index` configuration object.
+        """
+        from lancedb.index import HnswPq, HnswSq, IvfPq
+
+        common = dict(
+            distance_type=self.distance_type,
+            num_partitions=self.partitions_for(num_rows),
+        )
+        if self.index_type == "IVF_PQ":
+            return IvfPq(num_sub_vectors=self.sub_vectors_for(ndims), **common)
+        hnsw = dict(m=self.m, ef_construction=self.ef_construction, **common)
+        if self.index_type == "IVF_HNSW_SQ":
+            return HnswSq(**hnsw)
+        return HnswPq(num_sub_vectors=self.sub_vectors_for(ndims), **hnsw)
+
+
+@dataclass(frozen=True)
+class SearchParams:
+    """Query-time ANN settings; None leaves LanceDB's default.
+
+    :param nprobes: IVF partitions to search; more is slower and more accurate.
+    :param refine_factor: Fetch this many times the requested results
+        and re-rank them with full-precision vectors, undoing PQ error.
+    :param ef: HNSW search beam width.
+    """
+
+    nprobes: Optional[int] = None
+    refine_factor: Optional[int] = None
+    ef: Optional[int] = None
+
+    def apply(self, query: Any) -> Any:
+        """Set these parameters on a LanceDB vector query.
+
+        :param query: A `LanceVectorQueryBuilder`.
+        :return: The same query, for chaining.
+        """
+        if self.nprobes is not None:
+            query = query.nprobes(self.nprobes)
+        if self.refine_factor is not None:
+            query = query.refine_factor(self.refine_factor)
+        if self.ef is not None:
+            query = query.ef(self.ef)
+        return query
+
+
+def vector_index(table: Any, column: str = "vector") -> Optional[Any]:
+    """Find the vector index on a column.
+
+    :param table: A LanceDB table.
+    :param column: The vector column.
+    :return: The index's `IndexConfig`, or None if the column is not indexed.
+    """
+    return next(
+        (index for index in table.list_indices() if index.columns == [column]), None
+    )
+
+
+def trained_rows(index: Any) -> Optional[int]:
+    """Read how many rows an index built by this module was trained on.
+
+    :param index: An `IndexConfig`.
+    :return: The row count, or None for indexes built elsewhere.
+    """
+    match = _TRAINED_ROWS.match(index.name)
+    return int(match.group(1)) if match else None
+
+
+def _indexed_rows(table: Any, index: Any) -> int:
+    """Count the rows an index covers.
+
+    :param table: A LanceDB table.
+    :param index: An `IndexConfig` of the table.
+    :return: The number of indexed rows, at least 1.
+    """
+    return max(1, table.index_stats(index.name).num_indexed_rows)
+
+
+def maintain_vector_index(
+    table: Any,
+    config: ANNConfig,
+    ndims: int,
+    column: str = "vector",
+    force: bool = False,
+) -> Optional[str]:
+    """Create or rebuild a table's vector index as its size requires.
+
+    :param table: A LanceDB table.
+    :param config: Index policy and tuning.
+    :param ndims: The vector dimension.
+    :param column: The vector column.
+    :param force: Rebuild now, if the table is large enough to index at all.
+    :return: "created" or "rebuilt" if an index was built, else None.
+    """
+    num_rows = table.count_rows()
+    if num_rows < config.min_rows:
+        return None
+    index = vector_index(table, column)
+    if index is not None and not force:
+        trained = trained_rows(index) or _indexed_rows(table, index)
+        if num_rows < config.rebuild_growth * trained:
+            return None
+    name = f"vector_ann_{num_rows}"
+    table.create_index(
+        column, config=config.index_config(num_rows, ndims), replace=True, name=name
+    )
+    if index is not None and index.name != name:
+        if any(other.name == index.name for other in table.list_indices()):
+            table.drop_index(index.name)
+    return "created" if index is None else "rebuilt"
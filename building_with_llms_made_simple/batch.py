@@ -0,0 +1,159 @@
+"""Concurrent batches of SimpleBot-style calls.
+
+Calling `bot(prompt)` in a loop leaves the model server idle
+while each response travels back and the next request is built.
+`batch` instead issues the calls concurrently on asyncio,
+with at most `concurrency` requests in flight at any time,
+which keeps a local Ollama server busy for "large prompt, small output" jobs
+such as summarising many articles with the bot from `01_simple_bot.py`.
+
+The bot only supplies configuration (model, system prompt, temperature,
+completion kwargs); calls bypass chat memory and SimpleBot's prompt logging.
+"""
+
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+from llamabot import SimpleBot
+from llamabot.components.messages import AIMessage, HumanMessage
+
+from .concurrency import AdaptiveLimiter
+from .transport import async_counterpart
+
+
+def completion_kwargs(bot: SimpleBot, messages: list, stream: bool = False) -> dict:
+    """Build the keyword arguments `make_response` would pass to litellm.
+
+    :param bot: The bot whose configuration to use.
+    :param messages: Llamabot messages, system prompt included.
+    :param stream: Whether to request a streamed response.
+    :return: Keyword arguments for `litellm.completion` or `litellm.acompletion`.
+    """
+    kwargs = dict(
+        model=bot.model_name,
+        messages=[{"role": m.role, "content": m.content} for m in messages],
+        temperature=bot.temperature,
+        stream=stream,
+    )
+    kwargs.update(bot.completion_kwargs)
+    if bot.mock_response:
+        kwargs["mock_response"] = bot.mock_response
+    if bot.json_mode:
+        kwargs["response_format"] = bot.pydantic_model
+    if bot.api_key:
+        kwargs["api_key"] = bot.api_key
+    if hasattr(bot, "tools"):
+        kwargs["tools"] = bot.tools
+        kwargs["tool_choice"] = "auto"
+    return kwargs
+
+
+@dataclass
+class BatchResult:
+    """The outcome of one prompt in a batch.
+
+    :param prompt: The user prompt.
+    :param response: The bot's reply, or None if the call failed.
+    :param latency: Seconds from sending the request to receiving the reply.
+    :param wait: Seconds spent queued behind the concurrency cap.
+    :param error: The exception raised by the call, if any.
+    """
+
+    prompt: str
+    response: Optional[AIMessage]
+    latency: float
+    wait: float = 0.0
+    error: Optional[BaseException] = None
+
+
+async def abatch(
+    bot: SimpleBot,
+    prompts: Sequence[str],
+    concurrency: int = 8,
+    return_exceptions: bool = False,
+    limiter: Optional[AdaptiveLimiter] = None,
+) -> list[BatchResult]:
+    """Send each prompt to the bot's model concurrently.
+
+    :param bot: The bot whose configuration to use.
+    :param prompts: User prompts, one request each.
+    :param concurrency: Maximum number of requests in flight.
+    :param return_exceptions: If True, failed calls are reported
+        in `BatchResult.error` instead of raising.
+    :param limiter: If given, an adaptive limiter that may hold requests back
+        further, e.g. `limiter_for(*bot_endpoint(bot))`.
+    :return: One result per prompt, in input order.
+    :raises ValueError: If `concurrency` is less than 1.
+    """
+    from litellm import acompletion
+
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1.")
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(prompt: str) -> BatchResult:
+        """Send one prompt once a concurrency slot is free.
+
+        :param prompt: The user prompt.
+        :return: The result for this prompt.
+        """
+        queued = start = time.perf_counter()
+        try:
+            async with semaphore, limiter.aslot() if limiter else nullcontext():
+                start = time.perf_counter()
+                messages = [bot.system_prompt, HumanMessage(content=prompt)]
+                kwargs = completion_kwargs(bot, messages)
+                if "client" in kwargs:
+                    # A pooled sync handler cannot serve async calls.
+                    kwargs["client"] = async_counterpart(kwargs["client"])
+                response = await acompletion(**kwargs)
+        except Exception as e:
+            # Caught outside the slot, so that the limiter sees the failure.
+            if not return_exceptions:
+                raise
+            return BatchResult(
+                prompt, None, time.perf_counter() - start, start - queued, e
+            )
+        message = AIMessage(content=response.choices[0].message.content or "")
+        return BatchResult(prompt, message, time.perf_counter() - start, start - queued)
+
+    return list(await asyncio.gather(*(call(prompt) for prompt in prompts)))
+
+
+def batch(
+    bot: SimpleBot,
+    prompts: Sequence[str],
+    concurrency: int = 8,
+    return_exceptions: bool = False,
+    limiter: Optional[AdaptiveLimiter] = None,
+) -> list[BatchResult]:
+    """Synchronous wrapper around `abatch`, for scripts and notebooks.
+
+    Jupyter runs cells inside an event loop, where `asyncio.run` refuses to
+    start another: there the batch runs on its own loop in a worker thread,
+    and the cell blocks until it finishes.
+    In async code, `await abatch(...)` instead.
+
+    :param bot: The bot whose configuration to use.
+    :param prompts: User prompts, one request each.
+    :param concurrency: Maximum number of requests in flight.
+    :param return_exceptions: If True, failed calls are reported
+        in `BatchResult.error` instead of raising.
+    :param limiter: If given, an adaptive limiter that may hold requests back
+        further.
+    :return: One result per prompt, in input order.
+    """
+    run = functools.partial(
+        asyncio.run, abatch(bot, prompts, concurrency, return_exceptions, limiter)
+    )
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return run()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(run).result()
@@ -0,0 +1,665 @@
+"""Benchmarks for the hot paths of the notebook workflows.
+
+Each benchmark is a function registered in `BENCHMARKS`.
+It takes a `BenchConfig` and returns a mapping of metric name to timing summary
+(see `summarize`), so that `compare_results` can diff any two runs.
+Results are written to JSON by `run_benchmarks`, tagged with the git commit.
+
+LLM-backed benchmarks run against the deterministic `fake_ollama` stand-in,
+so they measure client-side overhead only and need neither a GPU nor a network.
+"""
+
+import json
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator, Optional
+
+if TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+
+BENCHMARKS: dict[str, Callable[["BenchConfig"], dict]] = {}
+
+
+@dataclass
+class BenchConfig:
+    """Knobs shared by all benchmarks.
+
+    :param repeat: Timed repetitions per measurement.
+    :param text_bytes: Size of the synthetic SOP text for text benchmarks.
+    :param tokenizer: Tokenizer used by the chunker benchmarks.
+    :param docstore_sizes: Numbers of chunks to load into LanceDB.
+    :param batch_size: Chunks per `extend` call when loading LanceDB.
+    :param seed: Seed for synthetic data.
+    :param connect_latency: Simulated handshake time per new connection
+        in the transport benchmark.
+    :param ann_sizes: Numbers of synthetic vectors in the ANN benchmark.
+    :param ann_dims: Vector dimension in the ANN benchmark;
+        256 matches the default `potion-base-8M` embeddings.
+    :param ann_queries: Queries per ANN measurement.
+    :param ann_k: Results per query, the k of recall@k.
+    :param ann_nprobes: `nprobes` values swept by the ANN benchmark.
+    :param ann_refine_factors: `refine_factor` values swept
+        by the ANN benchmark; None disables refinement.
+    :param ann_rescore_factors: Shortlist sizes, in multiples of k,
+        swept by the binary-code search of the ANN benchmark.
+    """
+
+    repeat: int = 5
+    text_bytes: int = 2_000_000
+    tokenizer: str = "gpt2"
+    docstore_sizes: tuple[int, ...] = (10_000, 100_000, 1_000_000)
+    batch_size: int = 1024
+    seed: int = 0
+    connect_latency: float = 0.02
+    ann_sizes: tuple[int, ...] = (1_000_000,)
+    ann_dims: int = 256
+    ann_queries: int = 100
+    ann_k: int = 10
+    ann_nprobes: tuple[int, ...] = (5, 10, 20, 50)
+    ann_refine_factors: tuple[Optional[int], ...] = (None, 10)
+    ann_rescore_factors: tuple[int, ...] = (4, 16)
+
+
+def benchmark(name: str) -> Callable:
+    """Register a benchmark under `name`.
+
+    :param name: The name used on the command line and in result files.
+    :return: A decorator that registers the function and returns it unchanged.
+    """
+
+    def register(func: Callable[[BenchConfig], dict]) -> Callable:
+        """Add `func` to the registry.
+
+        :param func: The benchmark function.
+        :return: The same function.
+        """
+        BENCHMARKS[name] = func
+        return func
+
+    return register
+
+
+def summarize(times: list[float], items: int = 1) -> dict:
+    """Summarize timings, in seconds.
+
+    :param times: Wall-clock durations of the repetitions.
+    :param items: Work items processed per repetition,
+        used to report per-item time.
+    :return: Count, min, median, mean, p95 and max, plus median time per item.
+    """
+    ordered = sorted(times)
+    return {
+        "n": len(ordered),
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "mean": statistics.fmean(ordered),
+        "p95": ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))],
+        "max": ordered[-1],
+        "per_item": statistics.median(ordered) / items,
+    }
+
+
+def measure(func: Callable[[], object], repeat: int = 5, items: int = 1) -> dict:
+    """Time `func` after one untimed warm-up call.
+
+    :param func: Zero-argument callable to time.
+    :param repeat: Number of timed calls.
+    :param items: Work items processed per call.
+    :return: A timing summary, see `summarize`.
+    """
+    func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return summarize(times, items)
+
+
+def synthetic_sop(target_bytes: int, seed: int = 0) -> str:
+    """Generate a hierarchically numbered SOP document of roughly `target_bytes`.
+
+    The layout mirrors the SOPs in `03_rag.py`:
+    numbered sections ("1.\\tPurpose") with subsections up to four levels deep.
+
+    :param target_bytes: Approximate size of the document.
+    :param seed: Random seed.
+    :return: The document text.
+    """
+    rng = random.Random(seed)
+    words = (
+        "sample reagent calibration instrument procedure record verify "
+        "laboratory quality control document personnel storage safety data"
+    ).split()
+    lines = []
+    size = 0
+    section = 0
+    while size < target_bytes:
+        section += 1
+        lines.append(f"{section}.\tSection {section}")
+        for sub in range(1, rng.randint(2, 5)):
+            for subsub in range(0, rng.randint(1, 4)):
+                number = f"{section}.{sub}" + (f".{subsub}" if subsub else "")
+                sentence = " ".join(
+                    rng.choice(words) for _ in range(rng.randint(8, 20))
+                )
+                lines.append(f"{number} {sentence.capitalize()}.")
+                size += len(lines[-1]) + 1
+    return "\n".join(lines)
+
+
+def synthetic_chunks(count: int, seed: int = 0) -> Iterator[str]:
+    """Yield `count` distinct short chunks of SOP-like text.
+
+    :param count: Number of chunks.
+    :param seed: Random seed.
+    :yield: Chunk texts.
+    """
+    rng = random.Random(seed)
+    words = synthetic_sop(4_000, seed).split()
+    for i in range(count):
+        yield f"[{i}] " + " ".join(rng.choice(words) for _ in range(48))
+
+
+@benchmark("insert_delimiter")
+def bench_insert_delimiter(config: BenchConfig) -> dict:
+    """Time section splitting over a large SOP document.
+
+    `split_level_K` is the notebook's `insert_delimiter(...).split(delim)`
+    idiom, `sections_level_K` the streaming `iter_sections` that replaces it.
+
+    :param config: Benchmark configuration.
+    :return: Timings per section level, per byte.
+    """
+    from .chunking import insert_delimiter, iter_sections
+
+    text = synthetic_sop(config.text_bytes, config.seed)
+    results = {}
+    for level in (1, 2):
+        results[f"level_{level}"] = measure(
+            lambda: insert_delimiter(text, level=level), config.repeat, len(text)
+        )
+        results[f"split_level_{level}"] = measure(
+            lambda: insert_delimiter(text, level=level).split("|||SECTION|||"),
+            config.repeat,
+            len(text),
+        )
+        results[f"sections_level_{level}"] = measure(
+            lambda: list(iter_sections(text, level=level)), config.repeat, len(text)
+        )
+    return results
+
+
+def _bench_chunker(strategy: str, config: BenchConfig) -> dict:
+    """Time one chunking strategy over a large SOP document.
+
+    :param strategy: Chunking strategy name, see `chunking.CHUNKERS`.
+    :param config: Benchmark configuration.
+    :return: Chunking timings, per byte.
+    """
+    from .chunking import create_chunker
+
+    chunker = create_chunker(strategy, tokenizer=config.tokenizer)
+    text = synthetic_sop(config.text_bytes, config.seed)
+    return {"chunk": measure(lambda: chunker(text), config.repeat, len(text))}
+
+
+@benchmark("token_chunker")
+def bench_token_chunker(config: BenchConfig) -> dict:
+    """Time TokenChunker throughput.
+
+    :param config: Benchmark configuration.
+    :return: Chunking timings, per byte.
+    """
+    return _bench_chunker("token", config)
+
+
+@benchmark("sentence_chunker")
+def bench_sentence_chunker(config: BenchConfig) -> dict:
+    """Time SentenceChunker throughput.
+
+    :param config: Benchmark configuration.
+    :return: Chunking timings, per byte.
+    """
+    return _bench_chunker("sentence", config)
+
+
+@benchmark("docstore")
+def bench_docstore(config: BenchConfig) -> dict:
+    """Time `LanceDBDocStore.extend` and `retrieve` at several table sizes.
+
+    :param config: Benchmark configuration.
+    :return: Load time (per chunk) and retrieval latency for each size.
+    """
+    from llamabot import LanceDBDocStore
+
+    from .ingest import batched
+
+    results = {}
+    queries = ["How do we calibrate the instrument?", "Who verifies quality control?"]
+    for size in config.docstore_sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = LanceDBDocStore(table_name="bench", storage_path=Path(tmp))
+            start = time.perf_counter()
+            for batch in batched(
+                synthetic_chunks(size, config.seed), config.batch_size
+            ):
+                store.extend(batch)
+            results[f"extend_{size}"] = summarize([time.perf_counter() - start], size)
+            results[f"retrieve_{size}"] = measure(
+                lambda: [store.retrieve(q, n_results=10) for q in queries],
+                config.repeat,
+                len(queries),
+            )
+    return results
+
+
+def synthetic_vectors(
+    count: int, dims: int, seed: int = 0, draw: int = 0, batch_size: int = 65_536
+) -> Iterator["np.ndarray"]:
+    """Yield clustered unit vectors, shaped like sentence embeddings.
+
+    Uniformly random vectors are unrealistically hard for IVF indexes,
+    so points are drawn around a fixed set of cluster centres,
+    varying along a few dozen directions as real embeddings do.
+
+    :param count: Number of vectors.
+    :param dims: Vector dimension.
+    :param seed: Random seed of the clusters.
+    :param draw: Random seed of the points, so that queries can be drawn
+        from the same clusters as the corpus without repeating it.
+    :param batch_size: Vectors per yielded array.
+    :yield: float32 arrays of shape (rows, dims).
+    """
+    import numpy as np
+
+    layout = np.random.default_rng(seed)
+    centres = layout.standard_normal((256, dims), dtype=np.float32)
+    directions = 0.3 * layout.standard_normal((32, dims), dtype=np.float32)
+    rng = np.random.default_rng([seed, draw])
+    for start in range(0, count, batch_size):
+        rows = min(batch_size, count - start)
+        points = centres[rng.integers(len(centres), size=rows)]
+        offsets = rng.standard_normal((rows, len(directions)), dtype=np.float32)
+        points += offsets @ directions
+        yield points / np.linalg.norm(points, axis=1, keepdims=True)
+
+
+def _nearest(
+    best: tuple["np.ndarray", "np.ndarray"],
+    queries: "np.ndarray",
+    batch: "np.ndarray",
+    offset: int,
+    k: int,
+) -> tuple["np.ndarray", "np.ndarray"]:
+    """Merge a batch of vectors into the exact top-k of each query.
+
+    :param best: Current (squared distances, ids), each of shape (queries, k).
+    :param queries: Query vectors.
+    :param batch: Vectors whose ids start at `offset`.
+    :param offset: Id of the first vector in the batch.
+    :param k: Neighbours to keep.
+    :return: The updated (squared distances, ids).
+    """
+    import numpy as np
+
+    distances = (
+        (queries**2).sum(axis=1)[:, None]
+        - 2 * queries @ batch.T
+        + (batch**2).sum(axis=1)[None, :]
+    )
+    ids = np.broadcast_to(np.arange(offset, offset + len(batch)), distances.shape)
+    distances = np.concatenate([best[0], distances], axis=1)
+    ids = np.concatenate([best[1], ids], axis=1)
+    top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    return (
+        np.take_along_axis(distances, top, axis=1),
+        np.take_along_axis(ids, top, axis=1),
+    )
+
+
+@benchmark("ann")
+def bench_ann(config: BenchConfig) -> dict:
+    """Trade recall@k against latency for vector search, with and without an index.
+
+    Synthetic vectors are written straight to a LanceDB table,
+    which leaves out embedding time so that millions of rows stay affordable,
+    while the exact neighbours of each query are computed alongside.
+    `flat_N` is brute-force search, `binary_F_N` the Hamming search over
+    binary codes with a shortlist of F * k rescored (see `quantize`),
+    `build_N` the `ann.maintain_vector_index` build,
+    and `nprobes_P_refine_R` the indexed search at those settings.
+    Every search metric carries a `recall_at_k` next to its timings.
+
+    :param config: Benchmark configuration.
+    :return: Build time (per vector) and per-query search latencies per size.
+    """
+    import lancedb
+    import numpy as np
+    import pyarrow as pa
+
+    from .ann import ANNConfig, SearchParams, maintain_vector_index
+    from .quantize import binary_codes, code_bytes, rescore
+
+    k = config.ann_k
+    dims = config.ann_dims
+    queries = np.concatenate(
+        list(synthetic_vectors(config.ann_queries, dims, config.seed, draw=1))
+    )
+    results = {}
+    for size in config.ann_sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            table = None
+            best = (
+                np.full((len(queries), k), np.inf, dtype=np.float32),
+                np.full((len(queries), k), -1),
+            )
+            offset = 0
+            for batch in synthetic_vectors(size, dims, config.seed):
+                rows = pa.table(
+                    {
+                        "id": pa.array(np.arange(offset, offset + len(batch))),
+                        "vector": pa.FixedSizeListArray.from_arrays(
+                            pa.array(batch.ravel()), dims
+                        ),
+                        "code": pa.FixedSizeListArray.from_arrays(
+                            pa.array(binary_codes(batch).ravel()), code_bytes(dims)
+                        ),
+                    }
+                )
+                if table is None:
+                    table = lancedb.connect(tmp).create_table("bench", rows)
+                else:
+                    table.add(rows)
+                best = _nearest(best, queries, batch, offset, k)
+                offset += len(batch)
+            truth = [set(ids) for ids in best[1].tolist()]
+
+            def vector_search(params: SearchParams) -> Callable:
+                """Build a search over the float vectors.
+
+                :param params: Query-time index settings.
+                :return: A function from a query vector to result ids.
+                """
+
+                def search(query: "np.ndarray") -> list[int]:
+                    """Find the nearest ids.
+
+                    :param query: The query vector.
+                    :return: Up to k ids, nearest first.
+                    """
+                    search = table.search(query, vector_column_name="vector")
+                    rows = params.apply(search.limit(k)).select(["id", "_distance"])
+                    return rows.to_arrow()["id"].to_pylist()
+
+                return search
+
+            def binary_search(factor: int) -> Callable:
+                """Build a search over the binary codes, rescored with the vectors.
+
+                :param factor: Shortlist size, in multiples of k.
+                :return: A function from a query vector to result ids.
+                """
+
+                def search(query: "np.ndarray") -> list[int]:
+                    """Find the nearest ids.
+
+                    :param query: The query vector.
+                    :return: Up to k ids, nearest first.
+                    """
+                    search = table.search(
+                        binary_codes(query), vector_column_name="code"
+                    )
+                    shortlist = search.distance_type("hamming").limit(k * factor)
+                    rows = shortlist.select(["id", "vector", "_distance"]).to_arrow()
+                    return rescore(query, rows, k)["id"].to_pylist()
+
+                return search
+
+            def search_all(search: Callable) -> float:
+                """Run every query and score the results against the truth.
+
+                :param search: A function from a query vector to result ids.
+                :return: The mean recall@k.
+                """
+                found = 0
+                for query, expected in zip(queries, truth):
+                    found += len(expected.intersection(search(query)))
+                return found / (k * len(queries))
+
+            def sweep(label: str, search: Callable) -> None:
+                """Time one search configuration and record its recall.
+
+                :param label: Metric name prefix.
+                :param search: A function from a query vector to result ids.
+                """
+                stats = measure(lambda: search_all(search), config.repeat, len(queries))
+                stats["recall_at_k"] = search_all(search)
+                results[f"{label}_{size}"] = stats
+
+            sweep("flat", vector_search(SearchParams()))
+            for factor in config.ann_rescore_factors:
+                sweep(f"binary_{factor}", binary_search(factor))
+            start = time.perf_counter()
+            maintain_vector_index(table, ANNConfig(min_rows=0), dims, "vector")
+            results[f"build_{size}"] = summarize([time.perf_counter() - start], size)
+            for nprobes in config.ann_nprobes:
+                for refine_factor in config.ann_refine_factors:
+                    params = SearchParams(nprobes=nprobes, refine_factor=refine_factor)
+                    sweep(
+                        f"nprobes_{nprobes}_refine_{refine_factor or 0}",
+                        vector_search(params),
+                    )
+    return results
+
+
+@benchmark("structured_parse")
+def bench_structured_parse(config: BenchConfig) -> dict:
+    """Time StructuredBot's parse-and-validate step for `Person` and `Tutorial`.
+
+    :param config: Benchmark configuration.
+    :return: Per-response parse and validation timings.
+    """
+    from .fake_ollama import fake_instance
+    from .models import Person, Tutorial
+
+    results = {}
+    for model in (Person, Tutorial):
+        rng = random.Random(config.seed)
+        schema = model.model_json_schema()
+        responses = [json.dumps(fake_instance(schema, rng)) for _ in range(1000)]
+
+        def parse_all():
+            """Parse and validate every response, as StructuredBot does."""
+            for response in responses:
+                model.model_validate(json.loads(response))
+
+        results[model.__name__] = measure(parse_all, config.repeat, len(responses))
+    return results
+
+
+@benchmark("agentbot_step")
+def bench_agentbot_step(config: BenchConfig) -> dict:
+    """Time AgentBot's per-step overhead against a zero-latency stand-in LLM.
+
+    :param config: Benchmark configuration.
+    :return: Timings per agent step (one LLM round trip plus tool execution).
+    """
+    import llamabot as lmb
+
+    from .fake_ollama import FakeOllamaServer
+
+    @lmb.tool
+    def add(num1: int, num2: int) -> int:
+        """Add two integers, num1 and num2.
+
+        :param num1: The first integer.
+        :param num2: The second integer.
+        :return: The sum.
+        """
+        return num1 + num2
+
+    with FakeOllamaServer() as server:
+        bot = lmb.AgentBot(
+            tools=[add], model_name="ollama_chat/llama3.2", api_base=server.url
+        )
+        before = server.app.requests_served
+        bot("What is 2 + 3?")
+        steps = server.app.requests_served - before
+        return {"step": measure(lambda: bot("What is 2 + 3?"), config.repeat, steps)}
+
+
+@benchmark("transport")
+def bench_transport(config: BenchConfig) -> dict:
+    """Time per-call overhead with and without HTTP keep-alive pooling.
+
+    The stand-in server delays each new connection by
+    `BenchConfig.connect_latency`, standing in for the TCP and TLS handshakes
+    with a remote `api_base` such as a Modal-hosted Ollama.
+
+    :param config: Benchmark configuration.
+    :return: Per-call timings for raw HTTP requests and for SimpleBot calls.
+    """
+    import httpx
+    import llamabot as lmb
+
+    from .fake_ollama import FakeOllamaConfig, FakeOllamaServer
+    from .transport import NO_POOLING, PoolConfig, enable_pooling
+
+    calls = 20
+    payload = {"model": "llama3.2", "messages": [{"role": "user", "content": "hi"}]}
+    results = {}
+    server_config = FakeOllamaConfig(connect_latency=config.connect_latency)
+    with FakeOllamaServer(server_config) as server:
+        for label, pool in [("pooled", PoolConfig()), ("unpooled", NO_POOLING)]:
+            with httpx.Client(**pool.httpx_kwargs()) as client:
+                results[f"http_{label}"] = measure(
+                    lambda: [
+                        client.post(f"{server.url}/api/chat", json=payload)
+                        for _ in range(calls)
+                    ],
+                    config.repeat,
+                    calls,
+                )
+            bot = lmb.SimpleBot(
+                "You are a helpful assistant.",
+                model_name="ollama_chat/llama3.2",
+                api_base=server.url,
+                stream_target="none",
+            )
+            enable_pooling(bot, pool)
+            results[f"bot_{label}"] = measure(
+                lambda: [bot("hi") for _ in range(calls)], config.repeat, calls
+            )
+    return results
+
+
+def git_commit() -> Optional[str]:
+    """Return the current git commit, if running inside a git checkout.
+
+    :return: The commit hash, or None.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@dataclass
+class BenchRun:
+    """A set of benchmark results plus the context they were measured in.
+
+    :param results: Benchmark name to metric name to timing summary.
+    :param config: The configuration used.
+    :param metadata: Commit, timestamp and platform information.
+    """
+
+    results: dict = field(default_factory=dict)
+    config: dict = field(default_factory=dict)
+    metadata: dict = field(default_factory=dict)
+
+    def save(self, path: Path) -> None:
+        """Write the run to a JSON file.
+
+        :param path: Destination file.
+        """
+        Path(path).write_text(json.dumps(asdict(self), indent=2))
+
+    @classmethod
+    def load(cls, path: Path) -> "BenchRun":
+        """Read a run from a JSON file.
+
+        :param path: Source file.
+        :return: The run.
+        """
+        return cls(**json.loads(Path(path).read_text()))
+
+
+def run_benchmarks(
+    names: Optional[list[str]] = None, config: Optional[BenchConfig] = None
+) -> BenchRun:
+    """Run the selected benchmarks.
+
+    :param names: Benchmarks to run; all of them by default.
+    :param config: Benchmark configuration.
+    :return: The results.
+    :raises ValueError: If a name is not a registered benchmark.
+    """
+    config = config or BenchConfig()
+    names = names or list(BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        raise ValueError(
+            f"Unknown benchmarks {sorted(unknown)}; choose from {sorted(BENCHMARKS)}."
+        )
+    run = BenchRun(
+        config=asdict(config),
+        metadata={
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+    )
+    for name in names:
+        run.results[name] = BENCHMARKS[name](config)
+    return run
+
+
+def compare_results(
+    baseline: BenchRun, current: BenchRun, threshold: float = 0.2
+) -> list[dict]:
+    """Find metrics whose median time grew by more than `threshold`.
+
+    :param baseline: The reference run.
+    :param current: The run under test.
+    :param threshold: Allowed relative slowdown, e.g. 0.2 for 20%.
+    :return: One record per regressed metric, worst first.
+    """
+    regressions = []
+    for name, metrics in current.results.items():
+        for metric, stats in metrics.items():
+            reference = baseline.results.get(name, {}).get(metric)
+            if not reference or not reference["median"]:
+                continue
+            ratio = stats["median"] / reference["median"]
+            if ratio > 1 + threshold:
+                regressions.append(
+                    {
+                        "benchmark": name,
+                        "metric": metric,
+                        "baseline": reference["median"],
+                        "current": stats["median"],
+                        "ratio": ratio,
+                    }
+                )
+    return sorted(regressions, key=lambda r: r["ratio"], reverse=True)
@@ -0,0 +1,333 @@
+"""On-disk, size-bounded caches for LLM responses.
+
+`DiskLRUCache` is a small SQLite key-value store
+that evicts the least recently used entries once it exceeds `max_bytes`
+and keeps hit/miss counters alongside the data,
+so they survive notebook restarts.
+
+`ResponseCache` builds on it to memoise deterministic (temperature 0) bot calls.
+It hooks into llamabot's `make_response` (see `_hooks`),
+the only place the final message list, including QueryBot's retrieved context,
+is visible; only bots carrying a `response_cache` attribute consult it.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator, Optional, Sequence, Union
+
+from ._hooks import add_middleware
+
+DEFAULT_CACHE_DIR = Path.home() / ".llamabot" / "cache"
+
+# Stay below SQLite's limit on the number of parameters in one statement.
+_SQL_BATCH = 500
+
+
+@dataclass
+class CacheStats:
+    """Counters describing a cache.
+
+    :param hits: Lookups that found an entry.
+    :param misses: Lookups that found nothing.
+    :param entries: Number of stored entries.
+    :param size_bytes: Total size of the stored values.
+    """
+
+    hits: int
+    misses: int
+    entries: int
+    size_bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups that were hits.
+
+        :return: The hit rate, or 0.0 before any lookup.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class DiskLRUCache:
+    """A SQLite-backed byte cache with least-recently-used eviction.
+
+    :param path: Database file; parent directories are created as needed.
+    :param max_bytes: Upper bound on the total size of stored values.
+    """
+
+    def __init__(self, path: Union[str, Path], max_bytes: int = 256 * 2**20):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        with self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                "size INTEGER NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS counters ("
+                "name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            self._db.executemany(
+                "INSERT OR IGNORE INTO counters VALUES (?, 0)",
+                [("hits",), ("misses",)],
+            )
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Look up a value and mark it as recently used.
+
+        :param key: The entry key.
+        :return: The stored value, or None on a miss.
+        """
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Sequence[str]) -> dict[str, bytes]:
+        """Look up several values at once and mark them as recently used.
+
+        :param keys: The entry keys.
+        :return: The stored values of the keys that were found.
+        """
+        found = {}
+        with self._lock, self._db:
+            for start in range(0, len(keys), _SQL_BATCH):
+                batch = keys[start : start + _SQL_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                found.update(
+                    self._db.execute(
+                        f"SELECT key, value FROM entries WHERE key IN ({placeholders})",
+                        batch,
+                    )
+                )
+            now = time.time()
+            self._db.executemany(
+                "UPDATE entries SET accessed = ? WHERE key = ?",
+                [(now, key) for key in found],
+            )
+            self._db.executemany(
+                "UPDATE counters SET value = value + ? WHERE name = ?",
+                [(len(found), "hits"), (len(keys) - len(found), "misses")],
+            )
+        return found
+
+    def set(self, key: str, value: bytes) -> None:
+        """Store a value, evicting least recently used entries to stay in budget.
+
+        Values larger than `max_bytes` are not stored.
+
+        :param key: The entry key.
+        :param value: The value to store.
+        """
+        self.set_many({key: value})
+
+    def set_many(self, items: dict[str, bytes]) -> None:
+        """Store several values, then evict least recently used entries.
+
+        Values larger than `max_bytes` are not stored.
+
+        :param items: Values to store, by key.
+        """
+        rows = [
+            (key, value, len(value), time.time())
+            for key, value in items.items()
+            if len(value) <= self.max_bytes
+        ]
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)", rows
+            )
+            (total,) = self._db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            if total <= self.max_bytes:
+                return
+            # Walk entries from least to most recently used until enough is freed,
+            # sparing the ones just written where possible.
+            excess, evict = total - self.max_bytes, []
+            for old_key, size in self._db.execute(
+                "SELECT key, size FROM entries ORDER BY key IN "
+                f"({','.join('?' * min(len(rows), _SQL_BATCH))}), accessed",
+                [row[0] for row in rows[:_SQL_BATCH]],
+            ):
+                evict.append((old_key,))
+                excess -= size
+                if excess <= 0:
+                    break
+            self._db.executemany("DELETE FROM entries WHERE key = ?", evict)
+
+    def __contains__(self, key: str) -> bool:
+        """Check for a key without touching counters or recency.
+
+        :param key: The entry key.
+        :return: Whether the key is stored.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        """Count stored entries.
+
+        :return: The number of entries.
+        """
+        return self.stats().entries
+
+    def stats(self) -> CacheStats:
+        """Report hit/miss counters and current size.
+
+        :return: The cache statistics.
+        """
+        with self._lock:
+            counters = dict(self._db.execute("SELECT name, value FROM counters"))
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return CacheStats(counters["hits"], counters["misses"], entries, size)
+
+    def clear(self) -> None:
+        """Remove all entries and reset the counters."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM entries")
+            self._db.execute("UPDATE counters SET value = 0")
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._db.close()
+
+
+def _schema(bot: Any) -> Optional[dict]:
+    """Return the JSON schema constraining a bot's output, if any.
+
+    :param bot: A llamabot bot.
+    :return: The pydantic model's JSON schema, or None.
+    """
+    model = getattr(bot, "pydantic_model", None)
+    return model.model_json_schema() if model is not None else None
+
+
+def request_key(bot: Any, messages: list) -> str:
+    """Hash everything that determines a deterministic bot's reply.
+
+    :param bot: A llamabot bot.
+    :param messages: Llamabot messages, system prompt included.
+    :return: A hex digest identifying the request.
+    """
+    request = {
+        "model": bot.model_name,
+        "temperature": bot.temperature,
+        "messages": [{"role": m.role, "content": m.content} for m in messages],
+        "schema": _schema(bot),
+        "tools": getattr(bot, "tools", None),
+    }
+    encoded = json.dumps(request, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ResponseCache(DiskLRUCache):
+    """A `DiskLRUCache` of litellm responses for temperature-0 bot calls.
+
+    :param path: Database file.
+    :param max_bytes: Upper bound on the total size of stored responses.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path] = DEFAULT_CACHE_DIR / "responses.sqlite",
+        max_bytes: int = 256 * 2**20,
+    ):
+        super().__init__(path, max_bytes)
+
+    def get_response(self, key: str):
+        """Look up a cached response.
+
+        :param key: A key from `request_key`.
+        :return: The `litellm.ModelResponse`, or None on a miss.
+        """
+        from litellm import ModelResponse
+
+        value = self.get(key)
+        return ModelResponse(**json.loads(value)) if value is not None else None
+
+    def set_response(self, key: str, response) -> None:
+        """Store a response.
+
+        :param key: A key from `request_key`.
+        :param response: A `litellm.ModelResponse`.
+        """
+        self.set(key, json.dumps(response.model_dump(), default=str).encode())
+
+
+def _recording(stream: Iterator, cache: ResponseCache, key: str) -> Iterator:
+    """Pass a streamed response through, caching it once fully consumed.
+
+    :param stream: The streamed litellm response.
+    :param cache: Where to store the assembled response.
+    :param key: The request key.
+    :yield: The stream's chunks, unchanged.
+    """
+    from litellm import stream_chunk_builder
+
+    chunks = []
+    for chunk in stream:
+        chunks.append(chunk)
+        yield chunk
+    cache.set_response(key, stream_chunk_builder(chunks))
+
+
+def _cache_middleware(bot, messages, stream, call_next):
+    """Serve deterministic calls from the bot's cache when possible.
+
+    :param bot: The calling bot.
+    :param messages: Llamabot messages, system prompt included.
+    :param stream: Whether the bot asked for a streamed response.
+    :param call_next: Continues the call down the middleware chain.
+    :return: A `ModelResponse`, or a stream of chunks on a streamed miss.
+    """
+    cache = getattr(bot, "response_cache", None)
+    # Only cache what is reproducible and what `stream_chunks` can consume
+    # either as a whole response or as a stream.
+    if (
+        cache is None
+        or bot.temperature != 0
+        or bot.stream_target not in ("none", "stdout")
+    ):
+        return call_next(stream)
+    key = request_key(bot, messages)
+    response = cache.get_response(key)
+    if response is not None:
+        if stream:
+            print(response.choices[0].message.content or "", end="")
+        return response
+    response = call_next(stream)
+    if not stream:
+        cache.set_response(key, response)
+        return response
+    return _recording(response, cache, key)
+
+
+def enable_response_cache(bot: Any, cache: Optional[ResponseCache] = None) -> Any:
+    """Serve a bot's temperature-0 calls from an on-disk cache.
+
+    Calls at other temperatures, and calls streamed to a panel or API,
+    always go to the model.
+
+    :param bot: A llamabot bot (SimpleBot, StructuredBot, QueryBot or AgentBot).
+    :param cache: The cache to use; defaults to one under `~/.llamabot/cache`.
+    :return: The same bot, for chaining.
+    """
+    add_middleware(_cache_middleware, order=0)
+    bot.response_cache = cache if cache is not None else ResponseCache()
+    return bot
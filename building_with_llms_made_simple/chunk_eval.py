@@ -0,0 +1,446 @@
+"""Compare chunking configurations by retrieval quality and indexing cost.
+
+`notebooks/03_rag.py` compares the token and sentence chunkers by reading
+their answers side by side. `evaluate_chunkers` puts numbers on it instead:
+for each `ChunkingConfig` it chunks a corpus, loads a fresh
+`KnowledgeStore`, and asks a labelled question set, reporting
+
+- chunking throughput (MB/s) and the chunks' mean size in tokens;
+- embedding time, ingestion time (embedding again, writing and indexing)
+  and the table's size on disk;
+- recall@k (the share of questions with a relevant chunk in the top k)
+  and MRR (mean reciprocal rank of the first relevant chunk);
+- context tokens per question and end-to-end answer latency through a
+  QueryBot talking to the `fake_ollama` stand-in, so that latency reflects
+  retrieval and prompt size rather than a real model.
+
+Questions are labelled with an evidence passage rather than a chunk id,
+so one question set scores every chunker: a retrieved chunk is relevant
+if it contains the evidence, or lies within it.
+Configurations run in parallel worker processes, one row of results each;
+`write_table` saves the rows as CSV, JSON or a Markdown table.
+Workers share the machine, so compare timings within one run only.
+"""
+
+import csv
+import importlib
+import io
+import json
+import multiprocessing
+import random
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from os import cpu_count
+from pathlib import Path
+from typing import Mapping, NamedTuple, Optional, Sequence
+
+from .benchmarks import measure, summarize, synthetic_sop
+from .chunking import SectionChunk, SectionChunker, create_chunker
+from .embeddings import SHARED_SENTENCE_TRANSFORMERS
+
+
+@dataclass(frozen=True)
+class ChunkingConfig:
+    """A chunker to evaluate.
+
+    :param strategy: Chunking strategy name, see `chunking.CHUNKERS`.
+    :param chunk_size: Maximum tokens per chunk.
+    :param chunk_overlap: Overlap between consecutive chunks, in tokens.
+    :param tokenizer: Tokenizer identifier understood by chonkie.
+    :param options: Extra keyword arguments for the chunker factory,
+        e.g. `{"level": 2}` for the section chunker.
+    :param name: Label of the configuration's row;
+        defaults to e.g. "token-128-8".
+    """
+
+    strategy: str = "token"
+    chunk_size: int = 128
+    chunk_overlap: int = 8
+    tokenizer: str = "gpt2"
+    options: Mapping = field(default_factory=dict)
+    name: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        """Name the configuration.
+
+        :return: `name`, or one derived from the strategy and sizes.
+        """
+        return self.name or f"{self.strategy}-{self.chunk_size}-{self.chunk_overlap}"
+
+    def create(self):
+        """Build the chunker.
+
+        :return: A chonkie chunker, or a `SectionChunker`.
+        """
+        return create_chunker(
+            self.strategy,
+            tokenizer=self.tokenizer,
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
+            **self.options,
+        )
+
+
+def config_grid(
+    strategies: Sequence[str] = ("token", "sentence", "section"),
+    chunk_sizes: Sequence[int] = (128, 256, 512),
+    chunk_overlap: int = 8,
+    tokenizer: str = "gpt2",
+) -> list[ChunkingConfig]:
+    """List every combination of strategy and chunk size.
+
+    :param strategies: Chunking strategy names.
+    :param chunk_sizes: Maximum tokens per chunk.
+    :param chunk_overlap: Overlap between consecutive chunks, in tokens.
+    :param tokenizer: Tokenizer identifier understood by chonkie.
+    :return: The configurations.
+    """
+    return [
+        ChunkingConfig(strategy, size, chunk_overlap, tokenizer)
+        for strategy in strategies
+        for size in chunk_sizes
+    ]
+
+
+class LabelledQuestion(NamedTuple):
+    """A question and the passage that answers it.
+
+    :param question: The question.
+    :param evidence: Text from the corpus that answers it.
+    :param document_title: The document holding the evidence, if known;
+        chunks of other documents are then never relevant.
+    """
+
+    question: str
+    evidence: str
+    document_title: Optional[str] = None
+
+
+def load_questions(path: Path) -> list[LabelledQuestion]:
+    """Read labelled questions from a JSON Lines file.
+
+    :param path: A file with one object per line,
+        with "question", "evidence" and optionally "document_title" keys.
+    :return: The questions.
+    """
+    lines = Path(path).read_text(encoding="utf-8").splitlines()
+    return [LabelledQuestion(**json.loads(line)) for line in lines if line.strip()]
+
+
+def synthetic_corpus(
+    documents: int = 4, text_bytes: int = 200_000, seed: int = 0
+) -> dict[str, str]:
+    """Generate SOP-like documents.
+
+    :param documents: Number of documents.
+    :param text_bytes: Approximate total size.
+    :param seed: Random seed.
+    :return: Document title to text.
+    """
+    return {
+        f"SOP-{i}": synthetic_sop(text_bytes // documents, seed + i)
+        for i in range(documents)
+    }
+
+
+def synthetic_questions(
+    corpus: Mapping[str, str], count: int = 50, seed: int = 0
+) -> list[LabelledQuestion]:
+    """Label questions whose evidence is one numbered sentence of the corpus.
+
+    Each question is the sentence's first words, a partial quote
+    that the sentence's chunk should rank highly for.
+
+    :param corpus: Document title to text.
+    :param count: Number of questions.
+    :param seed: Random seed.
+    :return: The questions.
+    """
+    sentence = re.compile(r"^\s*\d+(?:\.\d+)*\.?\s+(.+)$", re.MULTILINE)
+    candidates = [
+        (title, match.group(1).strip())
+        for title, text in corpus.items()
+        for match in sentence.finditer(text)
+        if len(match.group(1).split()) >= 8
+    ]
+    rng = random.Random(seed)
+    chosen = rng.sample(candidates, min(count, len(candidates)))
+    return [
+        LabelledQuestion(" ".join(evidence.split()[:6]), evidence, title)
+        for title, evidence in chosen
+    ]
+
+
+def chunk_corpus(chunker, corpus: Mapping[str, str]) -> list[SectionChunk]:
+    """Chunk every document, titling each chunk with its document.
+
+    :param chunker: A chonkie chunker or a `SectionChunker`.
+    :param corpus: Document title to text.
+    :return: The chunks, in document order.
+    """
+    chunks = []
+    for title, text in corpus.items():
+        if isinstance(chunker, SectionChunker):
+            chunks.extend(chunker(text, document_title=title))
+        else:
+            chunks.extend(SectionChunk(chunk.text, title) for chunk in chunker(text))
+    return chunks
+
+
+def _normalize(text: str) -> str:
+    """Collapse whitespace, for evidence matching.
+
+    :param text: The text.
+    :return: The normalised text.
+    """
+    return " ".join(text.split())
+
+
+def is_relevant(chunk: SectionChunk, question: LabelledQuestion) -> bool:
+    """Check whether a chunk holds a question's evidence, or part of it.
+
+    :param chunk: A retrieved chunk.
+    :param question: The labelled question.
+    :return: True if the chunk contains the evidence or lies within it.
+    """
+    if question.document_title not in (None, chunk.document_title):
+        return False
+    text, evidence = _normalize(chunk.text), _normalize(question.evidence)
+    return bool(text) and (evidence in text or text in evidence)
+
+
+def first_relevant_rank(
+    chunks: Sequence[SectionChunk], question: LabelledQuestion
+) -> Optional[int]:
+    """Find the rank of the first relevant chunk.
+
+    :param chunks: Retrieved chunks, best first.
+    :param question: The labelled question.
+    :return: The 1-based rank, or None if no chunk is relevant.
+    """
+    for rank, chunk in enumerate(chunks, start=1):
+        if is_relevant(chunk, question):
+            return rank
+    return None
+
+
+def _directory_bytes(path: Path) -> int:
+    """Measure the size of the files under a directory.
+
+    :param path: The directory.
+    :return: Total bytes.
+    """
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file())
+
+
+@dataclass
+class EvalSettings:
+    """How each configuration is measured.
+
+    :param k: Chunks retrieved per question, the k of recall@k.
+    :param embedding_registry: LanceDB embedding function of the stores.
+        Avoid the persistent embedding cache (`CACHED_SENTENCE_TRANSFORMERS`):
+        it would time cache lookups instead of embedding.
+    :param embedding_model: Model used by the embedding function.
+    :param repeat: Timed repetitions of the chunking measurement.
+    :param latency_questions: Questions answered through the stand-in LLM.
+    :param imports: Modules each worker process imports first,
+        e.g. ones registering a custom LanceDB embedding function.
+    """
+
+    k: int = 5
+    embedding_registry: str = SHARED_SENTENCE_TRANSFORMERS
+    embedding_model: str = "minishlab/potion-base-8M"
+    repeat: int = 3
+    latency_questions: int = 20
+    imports: tuple[str, ...] = ()
+
+
+def evaluate_config(
+    config: ChunkingConfig,
+    corpus: Mapping[str, str],
+    questions: Sequence[LabelledQuestion],
+    settings: EvalSettings = EvalSettings(),
+) -> dict:
+    """Measure one chunking configuration.
+
+    :param config: The configuration.
+    :param corpus: Document title to text.
+    :param questions: The labelled question set.
+    :param settings: How to measure.
+    :return: One row of results; times in seconds unless the key says otherwise.
+    """
+    import llamabot as lmb
+
+    from .docstore import KnowledgeStore
+    from .fake_ollama import FakeOllamaServer
+    from .packing import count_tokens
+    from .rag import rag_bot_sysprompt
+
+    chunker = config.create()
+    corpus_bytes = sum(len(text.encode()) for text in corpus.values())
+    chunking = measure(
+        lambda: chunk_corpus(chunker, corpus), settings.repeat, corpus_bytes
+    )
+    chunks = chunk_corpus(chunker, corpus)
+    tokens = [count_tokens(chunk.text, config.tokenizer) for chunk in chunks]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = KnowledgeStore(
+            "chunks",
+            storage_path=Path(tmp),
+            embedding_registry=settings.embedding_registry,
+            embedding_model=settings.embedding_model,
+            rerank=False,
+        )
+        start = time.perf_counter()
+        store.embedding_func.compute_source_embeddings_with_retry(
+            [chunk.text for chunk in chunks]
+        )
+        embed_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        store.extend(chunks)
+        store.optimize()
+        ingest_seconds = time.perf_counter() - start
+        index_bytes = _directory_bytes(Path(tmp))
+
+        reciprocal_ranks, context_tokens = [], []
+        for question in questions:
+            retrieved = store.retrieve_chunks(question.question, settings.k)
+            rank = first_relevant_rank(retrieved, question)
+            reciprocal_ranks.append(0.0 if rank is None else 1 / rank)
+            context_tokens.append(
+                sum(count_tokens(chunk.text, config.tokenizer) for chunk in retrieved)
+            )
+
+        with FakeOllamaServer() as server:
+            bot = lmb.QueryBot(
+                system_prompt=rag_bot_sysprompt(),
+                docstore=store,
+                model_name="ollama_chat/llama3.2",
+                api_base=server.url,
+                stream_target="none",
+            )
+            latencies = []
+            for question in questions[: settings.latency_questions]:
+                start = time.perf_counter()
+                bot(question.question, settings.k)
+                latencies.append(time.perf_counter() - start)
+        answers = summarize(latencies) if latencies else None
+
+    count = max(1, len(questions))
+    return {
+        "config": config.label,
+        "strategy": config.strategy,
+        "chunk_size": config.chunk_size,
+        "chunk_overlap": config.chunk_overlap,
+        "chunks": len(chunks),
+        "mean_chunk_tokens": sum(tokens) / max(1, len(tokens)),
+        "chunk_mb_per_s": 1 / chunking["per_item"] / 1e6,
+        "embed_s": embed_seconds,
+        "ingest_s": ingest_seconds,
+        "index_mb": index_bytes / 1e6,
+        f"recall_at_{settings.k}": sum(rr > 0 for rr in reciprocal_ranks) / count,
+        "mrr": sum(reciprocal_ranks) / count,
+        "context_tokens": sum(context_tokens) / count,
+        "answer_p50_ms": answers["median"] * 1e3 if answers else None,
+        "answer_p95_ms": answers["p95"] * 1e3 if answers else None,
+    }
+
+
+def _init_worker(imports: Sequence[str]) -> None:
+    """Import the modules a worker process needs, such as embedding registrations.
+
+    :param imports: Module names.
+    """
+    for module in imports:
+        importlib.import_module(module)
+
+
+def evaluate_chunkers(
+    configs: Sequence[ChunkingConfig],
+    corpus: Mapping[str, str],
+    questions: Sequence[LabelledQuestion],
+    settings: EvalSettings = EvalSettings(),
+    workers: Optional[int] = None,
+) -> list[dict]:
+    """Measure several chunking configurations in parallel.
+
+    :param configs: The configurations.
+    :param corpus: Document title to text.
+    :param questions: The labelled question set.
+    :param settings: How to measure.
+    :param workers: Worker processes; defaults to one per configuration,
+        up to the CPU count. With 1, configurations run in this process.
+        Workers are spawned rather than forked,
+        as LanceDB's runtime threads do not survive a fork.
+    :return: One row per configuration, in the order of `configs`.
+    """
+    workers = workers or min(len(configs), cpu_count() or 1)
+    if workers == 1:
+        return [evaluate_config(c, corpus, questions, settings) for c in configs]
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(settings.imports,),
+    ) as executor:
+        futures = [
+            executor.submit(evaluate_config, config, corpus, questions, settings)
+            for config in configs
+        ]
+        return [future.result() for future in futures]
+
+
+def _format_cell(value: object) -> str:
+    """Render a table cell.
+
+    :param value: The value.
+    :return: Floats to four significant digits, None as empty.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    return str(value)
+
+
+def format_table(rows: Sequence[dict]) -> str:
+    """Render result rows as a Markdown table.
+
+    :param rows: Rows with the same keys.
+    :return: The table.
+    """
+    if not rows:
+        return ""
+    columns = list(rows[0])
+    lines = [
+        "| " + " | ".join(columns) + " |",
+        "|" + "|".join("---" for _ in columns) + "|",
+    ]
+    for row in rows:
+        lines.append("| " + " | ".join(_format_cell(row[c]) for c in columns) + " |")
+    return "\n".join(lines)
+
+
+def write_table(rows: Sequence[dict], path: Path) -> None:
+    """Save result rows, in a format chosen by the file extension.
+
+    :param rows: Rows with the same keys.
+    :param path: A ".csv", ".json" or (otherwise) Markdown file.
+    """
+    path = Path(path)
+    if path.suffix == ".json":
+        path.write_text(json.dumps(list(rows), indent=2))
+    elif path.suffix == ".csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=list(rows[0]) if rows else [])
+        writer.writeheader()
+        writer.writerows(rows)
+        path.write_text(buffer.getvalue())
+    else:
+        path.write_text(format_table(rows) + "\n")
@@ -0,0 +1,293 @@
+"""Text chunking helpers from `notebooks/03_rag.py`.
+
+`iter_sections` and `insert_delimiter` are pure Python;
+the chunker factories import chonkie only when they are called.
+"""
+
+import io
+import re
+from typing import Any, Iterable, Iterator, NamedTuple, Optional, Union
+
+from .model_registry import get_tokenizer
+
+# A section header: optional indentation, a section number such as "1.", "1.2"
+# or "1.2.3" (trailing dot optional), then whitespace other than a line break.
+_SECTION_HEADER = re.compile(r"([ \t]*)(\d+(?:\.\d+)*)\.?[^\S\n]")
+
+
+class Section(NamedTuple):
+    """A section of a hierarchically numbered document.
+
+    :param number: Canonical section number without a trailing dot, e.g. "1.2",
+        or None for text before the first section header.
+    :param level: Depth of the section number ("1.2" is level 2), 0 for preamble.
+    :param text: The section's text, starting with its header line.
+    """
+
+    number: Optional[str]
+    level: int
+    text: str
+
+    @property
+    def parents(self) -> tuple[str, ...]:
+        """The numbers of the enclosing sections, outermost first.
+
+        :return: e.g. ("1", "1.2") for section "1.2.3".
+        """
+        if self.number is None:
+            return ()
+        parts = self.number.split(".")
+        return tuple(".".join(parts[:i]) for i in range(1, len(parts)))
+
+
+def _finish_section(
+    number: Optional[str], depth: int, lines: list[str]
+) -> Optional[Section]:
+    """Assemble the lines collected for a section.
+
+    :param number: The section number, or None for the preamble.
+    :param depth: The section's level.
+    :param lines: The section's lines, with line breaks.
+    :return: The section, or None if it is an empty or blank preamble.
+    """
+    text = "".join(lines).rstrip("\n")
+    if number is None and not text.strip():
+        return None
+    return Section(number, depth, text)
+
+
+def iter_sections(text: Union[str, Iterable[str]], level: int = 1) -> Iterator[Section]:
+    """Split a numbered document into sections in a single streaming pass.
+
+    A new section starts at every header whose section number is at most
+    `level` deep; deeper headers stay inside their enclosing section.
+    These are the chunks of `insert_delimiter(text, level).split(delim)`,
+    without the delimiter artifacts and with their section numbers attached.
+
+    :param text: The document, or an iterable of its lines
+        (e.g. an open file), so that large files need not be read at once.
+    :param level: The maximum section depth that starts a new section.
+    :yield: Sections in document order.
+        Blank text before the first header is skipped.
+    """
+    lines = io.StringIO(text, newline="\n") if isinstance(text, str) else text
+    match_header = _SECTION_HEADER.match
+    number, depth, buffer = None, 0, []
+    for line in lines:
+        match = match_header(line)
+        if match is not None:
+            found = match.group(2)
+            found_depth = found.count(".") + 1
+            if found_depth <= level:
+                if section := _finish_section(number, depth, buffer):
+                    yield section
+                number, depth, buffer = found, found_depth, []
+        buffer.append(line)
+    if section := _finish_section(number, depth, buffer):
+        yield section
+
+
+def insert_delimiter(text: str, level: int = 1, delim: str = "|||SECTION|||") -> str:
+    """Insert delimiters before section headers at a specified level.
+
+    For a given level K, this function:
+
+    1. Adds delimiters to all sections whose own level is from 1 to K.
+    2. Crucially, if a section (e.g., "1.2.3") gets a delimiter because its
+       level is <= K, then all its parent sections ("1." and "1.2" in this
+       example) will also get a delimiter, regardless of whether K would
+       have independently selected them.
+    3. Places delimiters before section numbers, preserving original formatting.
+
+    For example, if level=2:
+
+    - If we see "1. Title", its level is 1. Since 1 <= 2, "1." gets a delimiter.
+    - If we see "1.1 Title", its level is 2. Since 2 <= 2, "1.1" gets a delimiter.
+      Its parent "1." also gets a delimiter.
+    - If we see "1.1.1 Title", its level is 3. Since 3 > 2, "1.1.1" does NOT get
+      a delimiter, and this line does not cause "1." or "1.1" to get delimiters
+      if they wouldn't have otherwise.
+
+    A parent is always shallower than its child,
+    so rule 2 never marks a header that rule 1 does not,
+    and a single pass over the lines suffices.
+    To split a document into sections, prefer `iter_sections`.
+
+    :param text: The text to process.
+    :param level: The maximum section depth (K) to consider for adding delimiters.
+        Sections up to this depth, and their parents, will be marked.
+    :param delim: The delimiter string to insert.
+    :return: The text with delimiters inserted according to the rules.
+    """
+    # First, remove any existing delimiters to prevent duplication
+    lines = text.replace(delim, "").split("\n")
+    match_header = _SECTION_HEADER.match
+    for i, line in enumerate(lines):
+        match = match_header(line)
+        if match is not None and match.group(2).count(".") < level:
+            indent = match.end(1)
+            lines[i] = f"{line[:indent]}{delim} {line[indent:]}"
+    return "\n".join(lines)
+
+
+def _shared_tokenizer(tokenizer: Any) -> Any:
+    """Swap a tokenizer identifier for the process-wide tokenizer it names.
+
+    chonkie uses a tokenizer object as it is, so every chunker built here
+    shares one loaded copy of each tokenizer (see `model_registry`).
+
+    :param tokenizer: Tokenizer identifier, tokenizer object or token counter.
+    :return: The shared tokenizer for an identifier, otherwise `tokenizer`.
+    """
+    if isinstance(tokenizer, str):
+        return get_tokenizer(tokenizer).tokenizer
+    return tokenizer
+
+
+def create_token_chunker(
+    tokenizer: str = "gpt2", chunk_size: int = 128, chunk_overlap: int = 8
+):
+    """Create the fixed-size token chunker used in the RAG notebook.
+
+    :param tokenizer: Tokenizer identifier understood by chonkie.
+    :param chunk_size: Maximum tokens per chunk.
+    :param chunk_overlap: Overlap between consecutive chunks, in tokens.
+    :return: A configured `chonkie.TokenChunker`.
+    """
+    from chonkie import TokenChunker
+
+    return TokenChunker(
+        tokenizer=_shared_tokenizer(tokenizer),
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+    )
+
+
+def create_sentence_chunker(
+    tokenizer: str = "gpt2",
+    chunk_size: int = 128,
+    chunk_overlap: int = 8,
+    min_sentences_per_chunk: int = 1,
+):
+    """Create the sentence-aware chunker used in the RAG notebook.
+
+    :param tokenizer: Tokenizer identifier (or token counter) understood by chonkie.
+    :param chunk_size: Maximum tokens per chunk.
+    :param chunk_overlap: Overlap between consecutive chunks, in tokens.
+    :param min_sentences_per_chunk: Minimum sentences in each chunk.
+    :return: A configured `chonkie.SentenceChunker`.
+    """
+    from chonkie import SentenceChunker
+
+    return SentenceChunker(
+        tokenizer_or_token_counter=_shared_tokenizer(tokenizer),
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        min_sentences_per_chunk=min_sentences_per_chunk,
+    )
+
+
+class SectionChunk(NamedTuple):
+    """A chunk of a numbered document, with its provenance kept out of its text.
+
+    :param text: The chunk text, as embedded.
+    :param document_title: Title of the source document.
+    :param section_number: Number of the enclosing section, e.g. "2.1",
+        or None for text before the first section header.
+    :param section_level: Depth of `section_number`, 0 for the preamble.
+    """
+
+    text: str
+    document_title: Optional[str] = None
+    section_number: Optional[str] = None
+    section_level: int = 0
+
+
+class SectionChunker:
+    """Chunk numbered documents by section, splitting oversize sections by tokens.
+
+    This replaces the notebook's `insert_delimiter(...).split(...)` pipeline,
+    which appended "(from document ...)" to every chunk:
+    provenance is returned alongside the text instead,
+    so it does not cost embedding tokens or skew the vectors.
+
+    :param level: The maximum section depth that starts a new chunk.
+    :param tokenizer: Tokenizer identifier understood by chonkie.
+    :param chunk_size: Maximum tokens per chunk;
+        longer sections are split with a `chonkie.TokenChunker`.
+    :param chunk_overlap: Token overlap between the pieces of a split section.
+    """
+
+    def __init__(
+        self,
+        level: int = 1,
+        tokenizer: str = "gpt2",
+        chunk_size: int = 512,
+        chunk_overlap: int = 8,
+    ):
+        self.level = level
+        self.token_chunker = create_token_chunker(tokenizer, chunk_size, chunk_overlap)
+
+    def __call__(
+        self, text: Union[str, Iterable[str]], document_title: Optional[str] = None
+    ) -> list[SectionChunk]:
+        """Chunk a document.
+
+        :param text: The document, or an iterable of its lines.
+        :param document_title: Title recorded on every chunk.
+        :return: The chunks, in document order.
+        """
+        count_tokens = self.token_chunker.tokenizer.count_tokens
+        chunk_size = self.token_chunker.chunk_size
+        chunks = []
+        for section in iter_sections(text, self.level):
+            if count_tokens(section.text) <= chunk_size:
+                pieces = [section.text]
+            else:
+                pieces = [c.text for c in self.token_chunker.chunk(section.text)]
+            chunks.extend(
+                SectionChunk(piece, document_title, section.number, section.level)
+                for piece in pieces
+            )
+        return chunks
+
+
+def create_section_chunker(
+    level: int = 1,
+    tokenizer: str = "gpt2",
+    chunk_size: int = 512,
+    chunk_overlap: int = 8,
+) -> SectionChunker:
+    """Create a section-aware chunker for hierarchically numbered documents.
+
+    :param level: The maximum section depth that starts a new chunk.
+    :param tokenizer: Tokenizer identifier understood by chonkie.
+    :param chunk_size: Maximum tokens per chunk.
+    :param chunk_overlap: Token overlap between the pieces of a split section.
+    :return: A configured `SectionChunker`.
+    """
+    return SectionChunker(level, tokenizer, chunk_size, chunk_overlap)
+
+
+CHUNKERS = {
+    "token": create_token_chunker,
+    "sentence": create_sentence_chunker,
+    "section": create_section_chunker,
+}
+
+
+def create_chunker(strategy: str = "token", **kwargs):
+    """Create a chunker by strategy name.
+
+    :param strategy: One of the keys of `CHUNKERS`.
+    :param kwargs: Keyword arguments passed to the chunker factory.
+    :return: A chonkie chunker, or a `SectionChunker`.
+    :raises ValueError: If `strategy` is not a known chunking strategy.
+    """
+    try:
+        factory = CHUNKERS[strategy]
+    except KeyError:
+        raise ValueError(
+            f"Unknown chunking strategy {strategy!r}; choose one of {sorted(CHUNKERS)}."
+        )
+    return factory(**kwargs)
@@ -8,8 +8,14 @@ which is the package that we use to enable this magic.
 Typer's docs can be found at:
 
     https://typer.tiangolo.com
+
+Commands import their heavy dependencies (llamabot, LanceDB, chonkie)
+inside the command body, so that `--help` and lightweight commands start fast.
 """
 
+from pathlib import Path
+from typing import Optional
+
 import typer
 
 app = typer.Typer()
@@ -29,5 +35,309 @@ def describe():
     )
 
 
+@app.command()
+def ingest(
+    directory: Path = typer.Argument(
+        ..., exists=True, file_okay=False, help="Directory of documents to ingest."
+    ),
+    table_name: str = typer.Option(
+        "knowledge_base", help="LanceDB table to write chunks into."
+    ),
+    pattern: str = typer.Option("**/*.txt", help="Glob pattern selecting files."),
+    chunker: str = typer.Option(
+        "token", help="Chunking strategy: token, sentence or section."
+    ),
+    tokenizer: str = typer.Option("gpt2", help="Tokenizer used by the chunker."),
+    chunk_size: int = typer.Option(128, help="Maximum tokens per chunk."),
+    chunk_overlap: int = typer.Option(8, help="Token overlap between chunks."),
+    section_level: int = typer.Option(
+        1, help="Deepest section number that starts a chunk (section chunker)."
+    ),
+    workers: Optional[int] = typer.Option(
+        None, help="Chunking processes; defaults to the CPU count."
+    ),
+    batch_size: int = typer.Option(256, help="Chunks embedded per write."),
+    reset: bool = typer.Option(False, help="Empty the table before ingesting."),
+    collection: Optional[str] = typer.Option(
+        None, help="Collection to file the chunks under, for filtered retrieval."
+    ),
+    sync: bool = typer.Option(
+        False,
+        help="Update the table to match the directory, "
+        "embedding only new chunks and deleting vanished ones.",
+    ),
+):
+    """Chunk a directory of documents in parallel and store them in LanceDB."""
+    from .ingest import chunking_pool, ingest_directory
+    from .rag import create_knowledge_store
+
+    chunker_kwargs = dict(
+        tokenizer=tokenizer, chunk_size=chunk_size, chunk_overlap=chunk_overlap
+    )
+    if chunker == "section":
+        chunker_kwargs["level"] = section_level
+    # Fork the chunking workers before LanceDB is opened in this process.
+    executor = chunking_pool(chunker, chunker_kwargs, workers)
+    try:
+        docstore = create_knowledge_store(table_name, reset=reset, rerank=False)
+        stats = ingest_directory(
+            directory,
+            docstore,
+            pattern=pattern,
+            workers=workers,
+            batch_size=batch_size,
+            sync=sync,
+            collection=collection,
+            executor=executor,
+        )
+    finally:
+        executor.shutdown(cancel_futures=True)
+    if sync:
+        typer.echo(
+            f"Synced {stats.chunks} chunks from {stats.files} files "
+            f"into {table_name!r}: {stats.added} added, {stats.deleted} deleted."
+        )
+        return
+    typer.echo(
+        f"Ingested {stats.chunks} chunks from {stats.files} files "
+        f"into {table_name!r} in {stats.batches} batches."
+    )
+
+
+@app.command()
+def serve(
+    knowledge_table: str = typer.Option(
+        "knowledge_base", help="LanceDB table holding the knowledge base."
+    ),
+    memory_table: str = typer.Option(
+        "memory", help="LanceDB table holding conversation memory."
+    ),
+    model_name: str = typer.Option("ollama_chat/phi4", help="Model to answer with."),
+    api_base: Optional[str] = typer.Option(None, help="Base URL of the model API."),
+    host: str = typer.Option("127.0.0.1", help="Interface to bind."),
+    port: int = typer.Option(8765, help="Port to bind."),
+    socket: Optional[str] = typer.Option(
+        None, help="Serve on this Unix socket instead of TCP."
+    ),
+    workers: int = typer.Option(1, help="Bot calls allowed to run at once."),
+):
+    """Keep a RAG QueryBot warm and answer questions over a local HTTP API."""
+    import asyncio
+
+    from .rag import create_knowledge_store, create_memory_store, create_rag_bot
+    from .server import BotServer
+    from .transport import enable_pooling
+
+    completion_kwargs = {"api_base": api_base} if api_base else {}
+    bot = create_rag_bot(
+        create_knowledge_store(knowledge_table, reset=False),
+        create_memory_store(memory_table, reset=False),
+        model_name=model_name,
+        stream_target="none",
+        **completion_kwargs,
+    )
+    enable_pooling(bot)
+    server = BotServer(bot, workers=workers)
+    server.warm_up()
+    typer.echo(f"Serving {model_name} on {socket or f'http://{host}:{port}'}")
+    try:
+        asyncio.run(server.serve_forever(host, port, socket))
+    except KeyboardInterrupt:
+        pass
+
+
+@app.command()
+def query(
+    question: str = typer.Argument(..., help="The question to ask."),
+    n_results: int = typer.Option(20, help="Number of chunks to retrieve."),
+    host: str = typer.Option("127.0.0.1", help="Server host."),
+    port: int = typer.Option(8765, help="Server port."),
+    socket: Optional[str] = typer.Option(None, help="Server Unix socket."),
+):
+    """Ask a running `serve` daemon a question."""
+    from . import client
+
+    try:
+        payload = client.query(
+            question, n_results=n_results, host=host, port=port, socket_path=socket
+        )
+    except (OSError, RuntimeError) as e:
+        typer.echo(f"Query failed: {e}", err=True)
+        raise typer.Exit(1)
+    typer.echo(payload["answer"])
+
+
+@app.command()
+def fake_ollama(
+    host: str = typer.Option("127.0.0.1", help="Interface to bind."),
+    port: int = typer.Option(11434, help="Port to bind."),
+    latency: str = typer.Option(
+        "fixed",
+        help="Latency distribution: fixed, uniform, normal, lognormal or exponential.",
+    ),
+    latency_mean: float = typer.Option(0.0, help="Mean time to first token (s)."),
+    latency_spread: float = typer.Option(0.0, help="Spread of the distribution."),
+    connect_latency: float = typer.Option(
+        0.0, help="Delay per new connection (s), simulating TCP/TLS handshakes."
+    ),
+    tokens_per_second: float = typer.Option(
+        0.0, help="Generation speed; 0 is instantaneous."
+    ),
+    response_tokens: int = typer.Option(32, help="Words per free-text reply."),
+    max_tool_calls: int = typer.Option(
+        1, help="Tool-calling turns before the fake agent finishes."
+    ),
+    seed: int = typer.Option(0, help="Base random seed."),
+):
+    """Serve a deterministic stand-in for the Ollama API, for offline benchmarks."""
+    import asyncio
+
+    from .fake_ollama import FakeOllamaConfig, LatencyModel, serve_fake_ollama
+
+    config = FakeOllamaConfig(
+        latency=LatencyModel(latency, latency_mean, latency_spread),
+        connect_latency=connect_latency,
+        tokens_per_second=tokens_per_second,
+        response_tokens=response_tokens,
+        max_tool_calls=max_tool_calls,
+        seed=seed,
+    )
+    typer.echo(f"Fake Ollama listening on http://{host}:{port}")
+    try:
+        asyncio.run(serve_fake_ollama(config, host, port))
+    except KeyboardInterrupt:
+        pass
+
+
+@app.command()
+def bench(
+    only: Optional[list[str]] = typer.Option(
+        None, help="Benchmark to run; repeat the option to run several."
+    ),
+    output: Path = typer.Option(
+        Path("bench-results.json"), help="JSON file to write results to."
+    ),
+    repeat: int = typer.Option(5, help="Timed repetitions per measurement."),
+    text_bytes: int = typer.Option(
+        2_000_000, help="Size of the synthetic document for text benchmarks."
+    ),
+    tokenizer: str = typer.Option("gpt2", help="Tokenizer used by the chunkers."),
+    docstore_sizes: str = typer.Option(
+        "10000,100000,1000000", help="Comma-separated LanceDB table sizes."
+    ),
+    ann_sizes: str = typer.Option(
+        "1000000", help="Comma-separated vector counts for the ANN benchmark."
+    ),
+    baseline: Optional[Path] = typer.Option(
+        None, exists=True, dir_okay=False, help="Earlier results to compare against."
+    ),
+    max_regression: float = typer.Option(
+        0.2, help="Allowed relative slowdown against the baseline."
+    ),
+):
+    """Run the benchmark suite and write results as JSON."""
+    from .benchmarks import BenchConfig, BenchRun, compare_results, run_benchmarks
+
+    config = BenchConfig(
+        repeat=repeat,
+        text_bytes=text_bytes,
+        tokenizer=tokenizer,
+        docstore_sizes=tuple(int(size) for size in docstore_sizes.split(",")),
+        ann_sizes=tuple(int(size) for size in ann_sizes.split(",")),
+    )
+    try:
+        run = run_benchmarks(only, config)
+    except ValueError as e:
+        typer.echo(str(e), err=True)
+        raise typer.Exit(1)
+    run.save(output)
+    for name, metrics in run.results.items():
+        for metric, stats in metrics.items():
+            typer.echo(f"{name}.{metric}: median {stats['median'] * 1e3:.3f} ms")
+    typer.echo(f"Results written to {output}")
+
+    if baseline is not None:
+        regressions = compare_results(BenchRun.load(baseline), run, max_regression)
+        for r in regressions:
+            typer.echo(
+                f"REGRESSION {r['benchmark']}.{r['metric']}: {r['ratio']:.2f}x slower",
+                err=True,
+            )
+        if regressions:
+            raise typer.Exit(1)
+
+
+@app.command()
+def bench_chunking(
+    corpus: Optional[Path] = typer.Option(
+        None,
+        exists=True,
+        file_okay=False,
+        help="Directory of .txt documents; a synthetic SOP corpus by default.",
+    ),
+    questions: Optional[Path] = typer.Option(
+        None,
+        exists=True,
+        dir_okay=False,
+        help="JSON Lines file of labelled questions; synthetic by default.",
+    ),
+    strategies: str = typer.Option(
+        "token,sentence,section", help="Comma-separated chunking strategies."
+    ),
+    chunk_sizes: str = typer.Option(
+        "128,256,512", help="Comma-separated chunk sizes, in tokens."
+    ),
+    chunk_overlap: int = typer.Option(8, help="Chunk overlap, in tokens."),
+    tokenizer: str = typer.Option("gpt2", help="Tokenizer used by the chunkers."),
+    k: int = typer.Option(5, help="Chunks retrieved per question."),
+    workers: Optional[int] = typer.Option(
+        None, help="Configurations evaluated at once; one per CPU by default."
+    ),
+    output: Path = typer.Option(
+        Path("chunking-results.csv"),
+        help="Results table: .csv, .json, or anything else for Markdown.",
+    ),
+):
+    """Compare chunking configurations by retrieval quality and indexing cost."""
+    from .chunk_eval import (
+        EvalSettings,
+        config_grid,
+        evaluate_chunkers,
+        format_table,
+        load_questions,
+        synthetic_corpus,
+        synthetic_questions,
+        write_table,
+    )
+    from .ingest import iter_document_paths
+
+    if corpus is None:
+        documents = synthetic_corpus()
+    else:
+        documents = {
+            path.stem: path.read_text(encoding="utf-8", errors="replace")
+            for path in iter_document_paths(corpus)
+        }
+    labelled = (
+        load_questions(questions) if questions else synthetic_questions(documents)
+    )
+    configs = config_grid(
+        strategies.split(","),
+        [int(size) for size in chunk_sizes.split(",")],
+        chunk_overlap,
+        tokenizer,
+    )
+    try:
+        rows = evaluate_chunkers(
+            configs, documents, labelled, EvalSettings(k=k), workers
+        )
+    except ValueError as e:
+        typer.echo(str(e), err=True)
+        raise typer.Exit(1)
+    write_table(rows, output)
+    typer.echo(format_table(rows))
+    typer.echo(f"Results written to {output}")
+
+
 if __name__ == "__main__":
     app()
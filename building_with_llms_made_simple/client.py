@@ -0,0 +1,70 @@
+"""Thin standard-library client for the `serve` daemon.
+
+This module must stay free of heavy imports:
+it backs the `query` CLI command, which should start in milliseconds.
+"""
+
+import json
+import socket
+from http.client import HTTPConnection
+from typing import Optional
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+class UnixHTTPConnection(HTTPConnection):
+    """An HTTPConnection that talks over a Unix domain socket.
+
+    :param socket_path: Path to the server's Unix socket.
+    :param timeout: Socket timeout in seconds.
+    """
+
+    def __init__(self, socket_path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        """Connect to the Unix socket."""
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def query(
+    question: str,
+    n_results: int = 20,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    socket_path: Optional[str] = None,
+    timeout: Optional[float] = None,
+) -> dict:
+    """Ask the `serve` daemon a question.
+
+    :param question: The question to ask.
+    :param n_results: Number of chunks the server should retrieve.
+    :param host: Server host when connecting over TCP.
+    :param port: Server port when connecting over TCP.
+    :param socket_path: If given, connect to this Unix socket instead of TCP.
+    :param timeout: Socket timeout in seconds.
+    :return: The decoded JSON response, with an `answer` key.
+    :raises RuntimeError: If the server responds with an error.
+    """
+    if socket_path:
+        connection = UnixHTTPConnection(socket_path, timeout=timeout)
+    else:
+        connection = HTTPConnection(host, port, timeout=timeout)
+    try:
+        connection.request(
+            "POST",
+            "/query",
+            body=json.dumps({"question": question, "n_results": n_results}),
+            headers={"Content-Type": "application/json"},
+        )
+        response = connection.getresponse()
+        payload = json.loads(response.read())
+    finally:
+        connection.close()
+    if response.status != 200:
+        raise RuntimeError(payload.get("error", f"HTTP {response.status}"))
+    return payload
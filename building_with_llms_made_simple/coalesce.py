@@ -0,0 +1,151 @@
+"""Single-flight coalescing of identical in-flight bot calls.
+
+When several users ask the same question at the same moment,
+only the first call runs retrieval and generation;
+the others wait for it and receive the same result.
+Nothing is remembered once the call finishes (see `cache` for that),
+so a repeated question asked later is answered afresh.
+
+`SingleFlight` coalesces calls made from threads, e.g. a marimo chat callback;
+`AsyncSingleFlight` does the same for coroutines, e.g. the `serve` daemon.
+`CoalescingBot` wraps a QueryBot or StructuredBot with a `SingleFlight`.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from llamabot.components.messages import BaseMessage, to_basemessage
+
+
+class _Call:
+    """A call in flight, shared by its leader and any waiting followers."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Run at most one call per key at a time, sharing its outcome.
+
+    Safe to use from multiple threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self.shared = 0
+
+    def do(self, key: Hashable, func: Callable, *args, **kwargs) -> Any:
+        """Call `func`, or wait for an identical call already in flight.
+
+        :param key: Identifies calls that may share a result.
+        :param func: The function to call.
+        :param args: Positional arguments for `func`.
+        :param kwargs: Keyword arguments for `func`.
+        :return: The result of the shared call.
+        :raises BaseException: Whatever the shared call raised.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+
+        if leader:
+            try:
+                call.result = func(*args, **kwargs)
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+class AsyncSingleFlight:
+    """Run at most one coroutine per key at a time, sharing its outcome.
+
+    Must be used from a single event loop.
+    """
+
+    def __init__(self):
+        self._tasks: dict[Hashable, asyncio.Future] = {}
+        self.shared = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable]) -> Any:
+        """Await `func()`, or an identical awaitable already in flight.
+
+        A waiter that is cancelled does not cancel the shared call.
+
+        :param key: Identifies calls that may share a result.
+        :param func: Zero-argument function returning an awaitable.
+        :return: The result of the shared call.
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(func())
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+
+def call_key(*args, **kwargs) -> Hashable:
+    """Build a coalescing key from bot call arguments.
+
+    Strings and llamabot messages with the same role and content
+    produce the same key.
+
+    :param args: Messages passed to the bot, and any other positional
+        arguments such as QueryBot's `n_results`; all must be hashable.
+    :param kwargs: Keyword arguments passed to the bot; values must be hashable.
+    :return: A hashable key.
+    """
+    messages = tuple(
+        (m.role, m.content) if isinstance(m, BaseMessage) else m
+        for m in to_basemessage(args)
+    )
+    return messages, tuple(sorted(kwargs.items()))
+
+
+class CoalescingBot:
+    """Wrap a bot so that concurrent identical calls share one execution.
+
+    Works for QueryBot (`bot(query, n_results)`)
+    and StructuredBot (`bot(*messages, num_attempts=...)`).
+    Every other attribute is read from the wrapped bot.
+
+    :param bot: The bot to wrap.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.flight = SingleFlight()
+
+    def __call__(self, *args, **kwargs) -> Any:
+        """Call the bot, joining an identical call if one is in flight.
+
+        :param args: Positional arguments for the bot.
+        :param kwargs: Keyword arguments for the bot.
+        :return: The bot's response.
+        """
+        return self.flight.do(call_key(*args, **kwargs), self.bot, *args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        """Delegate attribute access to the wrapped bot.
+
+        :param name: Attribute name.
+        :return: The wrapped bot's attribute.
+        """
+        return getattr(self.bot, name)
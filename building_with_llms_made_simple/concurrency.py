@@ -0,0 +1,286 @@
+"""Adaptive client-side concurrency limits for LLM backends.
+
+A fixed concurrency either underuses a fast backend
+or pushes a slow one past its knee, where queueing makes tail latency explode.
+`AdaptiveLimiter` instead adjusts its in-flight limit with AIMD:
+
+- a successful call that completed close to the best latency seen so far
+  raises the limit by about one per full window of calls (additive increase);
+- an error, or a latency above `latency_tolerance` times that baseline,
+  multiplies the limit by `backoff` (multiplicative decrease),
+  at most once per baseline latency so that one burst is not punished twice.
+
+Limiters are kept per `(model_name, api_base)` pair,
+since e.g. a remote Modal-hosted Ollama and a local one saturate very differently.
+`configure_limiter` sets defaults for a model, an endpoint, or a specific pair.
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, replace
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from ._hooks import add_middleware
+
+
+@dataclass
+class LimiterConfig:
+    """Tuning knobs for an `AdaptiveLimiter`.
+
+    :param initial_limit: In-flight requests allowed before any feedback.
+    :param min_limit: The limit never drops below this.
+    :param max_limit: The limit never grows above this.
+    :param backoff: Factor applied to the limit on congestion.
+    :param latency_tolerance: Latency, as a multiple of the baseline,
+        above which a call counts as congestion.
+    :param baseline_drift: Per-sample relative growth of the baseline latency,
+        so that it can recover if the backend becomes permanently slower.
+    """
+
+    initial_limit: int = 4
+    min_limit: int = 1
+    max_limit: int = 64
+    backoff: float = 0.7
+    latency_tolerance: float = 2.0
+    baseline_drift: float = 0.01
+
+
+class AdaptiveLimiter:
+    """An AIMD concurrency limiter usable from threads and coroutines.
+
+    :param config: Tuning knobs; defaults to `LimiterConfig()`.
+    """
+
+    def __init__(self, config: Optional[LimiterConfig] = None):
+        self.config = config or LimiterConfig()
+        self._limit = float(self.config.initial_limit)
+        self.inflight = 0
+        self.baseline: Optional[float] = None
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._async_waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    @property
+    def limit(self) -> int:
+        """The current number of requests allowed in flight.
+
+        :return: The limit.
+        """
+        return int(self._limit)
+
+    def _try_acquire(self) -> bool:
+        """Take a slot if one is free; the lock must be held.
+
+        :return: Whether a slot was taken.
+        """
+        if self.inflight < self.limit:
+            self.inflight += 1
+            return True
+        return False
+
+    def _wake(self) -> None:
+        """Wake every waiter so it can retry; the lock must be held."""
+        self._available.notify_all()
+        for loop, future in self._async_waiters:
+            loop.call_soon_threadsafe(lambda f=future: f.done() or f.set_result(None))
+        self._async_waiters.clear()
+
+    def acquire(self) -> None:
+        """Block until a slot is free, then take it."""
+        with self._lock:
+            while not self._try_acquire():
+                self._available.wait()
+
+    async def aacquire(self) -> None:
+        """Wait without blocking the event loop until a slot is free, then take it."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self._try_acquire():
+                    return
+                future = loop.create_future()
+                self._async_waiters.append((loop, future))
+            await future
+
+    def release(self, latency: float, error: bool = False) -> None:
+        """Return a slot and adjust the limit from the call's outcome.
+
+        :param latency: How long the call took, in seconds.
+        :param error: Whether the call failed.
+        """
+        config = self.config
+        with self._lock:
+            saturated = self.inflight >= self.limit / 2
+            self.inflight -= 1
+            if not error:
+                drifted = (self.baseline or latency) * (1 + config.baseline_drift)
+                self.baseline = min(latency, drifted)
+            congested = error or latency > config.latency_tolerance * self.baseline
+            now = time.monotonic()
+            if congested:
+                if now - self._last_decrease >= (self.baseline or 0.0):
+                    self._limit = max(config.min_limit, self._limit * config.backoff)
+                    self._last_decrease = now
+            elif saturated:
+                # Grow only when the limit is actually being used.
+                self._limit = min(config.max_limit, self._limit + 1 / self._limit)
+            self._wake()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold a slot for the duration of a block, timing it for feedback.
+
+        Exceptions raised in the block count as errors and are re-raised.
+
+        :yield: Nothing.
+        """
+        self.acquire()
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.release(time.perf_counter() - start, error)
+
+    @asynccontextmanager
+    async def aslot(self) -> AsyncIterator[None]:
+        """Async counterpart of `slot`.
+
+        :yield: Nothing.
+        """
+        await self.aacquire()
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.release(time.perf_counter() - start, error)
+
+
+_configs: dict[tuple[Optional[str], Optional[str]], LimiterConfig] = {}
+_limiters: dict[tuple[str, Optional[str]], AdaptiveLimiter] = {}
+_registry_lock = threading.Lock()
+
+
+def configure_limiter(
+    config: LimiterConfig,
+    model_name: Optional[str] = None,
+    api_base: Optional[str] = None,
+) -> None:
+    """Set the configuration for limiters created afterwards.
+
+    The most specific match wins when a limiter is created:
+    model and endpoint, then endpoint only, then model only, then the default.
+
+    :param config: The configuration.
+    :param model_name: Apply to this model, or to any model if None.
+    :param api_base: Apply to this endpoint, or to any endpoint if None.
+    """
+    with _registry_lock:
+        _configs[model_name, api_base] = config
+
+
+def limiter_for(model_name: str, api_base: Optional[str] = None) -> AdaptiveLimiter:
+    """Get the shared limiter for a model served from an endpoint.
+
+    :param model_name: LiteLLM model string.
+    :param api_base: Endpoint URL, or None for the provider's default.
+    :return: The limiter, created on first use.
+    """
+    with _registry_lock:
+        limiter = _limiters.get((model_name, api_base))
+        if limiter is None:
+            config = next(
+                (
+                    _configs[key]
+                    for key in [
+                        (model_name, api_base),
+                        (None, api_base),
+                        (model_name, None),
+                        (None, None),
+                    ]
+                    if key in _configs
+                ),
+                LimiterConfig(),
+            )
+            limiter = _limiters[model_name, api_base] = AdaptiveLimiter(replace(config))
+        return limiter
+
+
+def bot_endpoint(bot: Any) -> tuple[str, Optional[str]]:
+    """Identify the backend a bot talks to.
+
+    :param bot: A llamabot bot.
+    :return: The bot's `(model_name, api_base)`.
+    """
+    return bot.model_name, getattr(bot, "completion_kwargs", {}).get("api_base")
+
+
+def _released_after(stream: Iterator, limiter: AdaptiveLimiter, start: float):
+    """Pass a streamed response through, releasing the slot once it ends.
+
+    :param stream: The streamed litellm response.
+    :param limiter: The limiter holding the slot.
+    :param start: When the call started, from `time.perf_counter`.
+    :yield: The stream's chunks, unchanged.
+    """
+    error = False
+    try:
+        yield from stream
+    except BaseException:
+        error = True
+        raise
+    finally:
+        limiter.release(time.perf_counter() - start, error)
+
+
+def _limiter_middleware(bot, messages, stream, call_next):
+    """Hold a limiter slot for the duration of an LLM call.
+
+    :param bot: The calling bot.
+    :param messages: Llamabot messages, system prompt included.
+    :param stream: Whether the bot asked for a streamed response.
+    :param call_next: Continues the call down the middleware chain.
+    :return: The response, or a stream that releases the slot when exhausted.
+    """
+    limiter = getattr(bot, "limiter", None)
+    if limiter is None:
+        return call_next(stream)
+    limiter.acquire()
+    start = time.perf_counter()
+    try:
+        response = call_next(stream)
+    except BaseException:
+        limiter.release(time.perf_counter() - start, error=True)
+        raise
+    if not stream:
+        limiter.release(time.perf_counter() - start)
+        return response
+    return _released_after(response, limiter, start)
+
+
+def enable_adaptive_concurrency(
+    bot: Any, limiter: Optional[AdaptiveLimiter] = None
+) -> Any:
+    """Limit a bot's concurrent LLM calls with an adaptive limiter.
+
+    By default the limiter is shared with every other bot
+    using the same model and endpoint.
+    Responses served from a response cache do not take a slot.
+
+    :param bot: A llamabot bot.
+    :param limiter: The limiter to use; defaults to `limiter_for` the bot's backend.
+    :return: The same bot, for chaining.
+    """
+    add_middleware(_limiter_middleware, order=10)
+    bot.limiter = limiter if limiter is not None else limiter_for(*bot_endpoint(bot))
+    return bot
@@ -0,0 +1,724 @@
+"""A LanceDB knowledge store that can be synced incrementally.
+
+`KnowledgeStore` is a drop-in replacement for llamabot's `LanceDBDocStore`
+(same `append`/`extend`/`retrieve`/`reset` interface, so QueryBot accepts it)
+that also stores a SHA-256 `content_hash` per chunk.
+`sync` uses the hashes to diff incoming chunks against the table:
+new chunks are embedded and added, vanished chunks are deleted,
+and unchanged chunks are left alone,
+so editing one paragraph of one document costs a handful of embeddings
+instead of a full `reset()` and `extend()`.
+
+Chunks may be plain strings or `chunking.SectionChunk`s,
+whose `document_title`, `section_number` and `section_level`
+are stored in columns of their own rather than appended to the embedded text.
+`retrieve` adds them back as a citation line for the LLM,
+and `retrieve_chunks` returns them as fields.
+
+Each row also records the `collection` it was written to and when.
+Several document families can therefore share one table:
+`MetadataFilter` predicates on these columns are answered by scalar indexes
+and applied before the vector search,
+and `filtered` scopes a store (e.g. the one given to a QueryBot) to a subset.
+
+Once the table crosses `ANNConfig.min_rows`, writes also maintain
+an approximate nearest neighbour index on the vectors (see `ann`),
+and `retrieve` takes the index's `nprobes` and `refine_factor` per query.
+Large stores can also search compact int8 or binary codes
+and rescore the shortlist with the full-precision vectors (see `quantize`).
+"""
+
+import copy
+import dataclasses
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable, Optional, Sequence, Union
+
+import slugify
+from llamabot.components.docstore import AbstractDocumentStore
+
+from .ann import ANNConfig, SearchParams, maintain_vector_index
+from .chunking import SectionChunk
+from .embeddings import CACHED_SENTENCE_TRANSFORMERS
+from .ingest import batched
+from .quantize import QUANTIZATIONS, binary_codes, code_bytes, int8_settings, rescore
+
+if TYPE_CHECKING:  # pragma: no cover
+    import pyarrow as pa
+
+# Rows per `add` call and hashes per `delete` predicate.
+WRITE_BATCH = 4096
+
+# Columns holding a chunk's provenance, with their Arrow types.
+PROVENANCE_COLUMNS = {
+    "document_title": "string",
+    "section_number": "string",
+    "section_level": "int64",
+}
+
+# Every column besides the document, its vector and its hash.
+METADATA_COLUMNS = {
+    **PROVENANCE_COLUMNS,
+    "collection": "string",
+    "ingested_at": "timestamp[us]",
+}
+
+# Scalar index type per filterable column:
+# bitmaps for low-cardinality columns, B-trees for ranges and prefixes.
+SCALAR_INDEXES = {
+    "document_title": "BITMAP",
+    "collection": "BITMAP",
+    "section_level": "BITMAP",
+    "section_number": "BTREE",
+    "ingested_at": "BTREE",
+}
+
+
+def content_hash(document: str) -> str:
+    """Hash a chunk's text.
+
+    :param document: The chunk text.
+    :return: The hex SHA-256 digest of the UTF-8 text.
+    """
+    return hashlib.sha256(document.encode()).hexdigest()
+
+
+def as_chunk(document: Union[str, SectionChunk]) -> SectionChunk:
+    """Treat a plain string as a chunk without provenance.
+
+    :param document: A chunk text or a `SectionChunk`.
+    :return: The `SectionChunk`.
+    """
+    return SectionChunk(document) if isinstance(document, str) else document
+
+
+def chunk_hash(chunk: SectionChunk, collection: Optional[str] = None) -> str:
+    """Hash a chunk's text, provenance and collection.
+
+    The same text in two sections or collections is two chunks;
+    a chunk without provenance or collection hashes like its bare text.
+
+    :param chunk: The chunk.
+    :param collection: The collection the chunk is written to.
+    :return: A hex SHA-256 digest.
+    """
+    parts = [chunk.text]
+    if chunk.document_title is not None or chunk.section_number is not None:
+        parts += [chunk.document_title or "", chunk.section_number or ""]
+    if collection is not None:
+        parts.append(collection)
+    return content_hash("\0".join(parts))
+
+
+def chunk_from_row(row: dict) -> SectionChunk:
+    """Build a chunk from a table row holding the document and provenance columns.
+
+    :param row: The row, as a dict.
+    :return: The chunk.
+    """
+    return SectionChunk(
+        row["document"],
+        row["document_title"],
+        row["section_number"],
+        row["section_level"] or 0,
+    )
+
+
+def cite(chunk: SectionChunk) -> str:
+    """Render a chunk for an LLM prompt, with its provenance as a citation line.
+
+    :param chunk: The chunk.
+    :return: The chunk text, followed by its source if known.
+    """
+    source = []
+    if chunk.document_title:
+        source.append(f"document {chunk.document_title}")
+    if chunk.section_number:
+        source.append(f"section {chunk.section_number}")
+    return f"{chunk.text}\n(from {', '.join(source)})" if source else chunk.text
+
+
+def _sql_string(value: str) -> str:
+    """Quote a string literal for a LanceDB SQL predicate.
+
+    :param value: The string.
+    :return: The quoted literal.
+    """
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _sql_timestamp(value: datetime) -> str:
+    """Render a datetime as a LanceDB SQL literal in UTC, as stored.
+
+    :param value: The datetime; naive datetimes are taken to be UTC.
+    :return: The timestamp literal.
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return f"timestamp '{value.isoformat(sep=' ')}'"
+
+
+@dataclass(frozen=True)
+class MetadataFilter:
+    """A predicate on chunk metadata, every given condition must hold.
+
+    :param collection: Collection name, or any of several.
+    :param document_title: Document title, or any of several.
+    :param section_prefix: Section number and its subsections,
+        e.g. "2.1" matches "2.1" and "2.1.3" but not "2.10".
+    :param max_section_level: Only sections at most this deep.
+    :param ingested_after: Only chunks written at or after this time.
+    :param ingested_before: Only chunks written before this time.
+    """
+
+    collection: Optional[Union[str, Sequence[str]]] = None
+    document_title: Optional[Union[str, Sequence[str]]] = None
+    section_prefix: Optional[str] = None
+    max_section_level: Optional[int] = None
+    ingested_after: Optional[datetime] = None
+    ingested_before: Optional[datetime] = None
+
+    def to_sql(self) -> Optional[str]:
+        """Render the filter as a LanceDB SQL predicate.
+
+        Each condition is a comparison or range that a scalar index can answer.
+
+        :return: The predicate, or None if the filter has no conditions.
+        """
+        clauses = []
+        for column in ("collection", "document_title"):
+            value = getattr(self, column)
+            if isinstance(value, str):
+                clauses.append(f"{column} = {_sql_string(value)}")
+            elif value is not None:
+                values = ", ".join(_sql_string(v) for v in value)
+                clauses.append(f"{column} IN ({values})")
+        if self.section_prefix is not None:
+            prefix = self.section_prefix.rstrip(".")
+            # "/" sorts right after ".", so this range holds exactly
+            # the subsections of `prefix`.
+            clauses.append(
+                f"(section_number = {_sql_string(prefix)} OR "
+                f"(section_number >= {_sql_string(prefix + '.')} AND "
+                f"section_number < {_sql_string(prefix + '/')}))"
+            )
+        if self.max_section_level is not None:
+            clauses.append(f"section_level <= {int(self.max_section_level)}")
+        if self.ingested_after is not None:
+            clauses.append(f"ingested_at >= {_sql_timestamp(self.ingested_after)}")
+        if self.ingested_before is not None:
+            clauses.append(f"ingested_at < {_sql_timestamp(self.ingested_before)}")
+        return " AND ".join(clauses) or None
+
+
+def _where_sql(where: Union[MetadataFilter, str, None]) -> Optional[str]:
+    """Normalise a filter argument to a SQL predicate.
+
+    :param where: A `MetadataFilter`, a raw LanceDB SQL predicate, or None.
+    :return: The predicate, or None for no filtering.
+    """
+    return where.to_sql() if isinstance(where, MetadataFilter) else where
+
+
+@dataclass
+class SyncStats:
+    """What a `KnowledgeStore.sync` call changed.
+
+    :param added: Chunks embedded and added.
+    :param deleted: Chunks removed because they are no longer present.
+    :param unchanged: Chunks already stored and left alone.
+    """
+
+    added: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+
+
+class KnowledgeStore(AbstractDocumentStore):
+    """A LanceDB document store keyed by content hash.
+
+    :param table_name: Name of the LanceDB table.
+    :param storage_path: Directory holding the LanceDB database.
+    :param embedding_registry: Name of the LanceDB embedding function.
+    :param embedding_model: Model used by the embedding function.
+    :param auto_create_fts_index: Whether to maintain a full-text index
+        on the documents.
+    :param rerank: Whether `retrieve` reranks results with ColBERT,
+        as `LanceDBDocStore` does.
+    :param scalar_indexes: Whether to index the metadata columns,
+        so that filtered searches do not scan them.
+    :param ann: When and how to build the vector index;
+        None keeps exact (brute-force) search at any size.
+    :param search_params: Default query-time vector index settings.
+    :param quantization: "binary" to search one-bit codes kept next to the
+        vectors, "int8" to index 8-bit codes (IVF-HNSW-SQ), or None to
+        search the float vectors. Both rescore a shortlist with the
+        float vectors; the binary codes replace the `ann` index.
+    :param rescore_factor: Shortlist this many times the requested results
+        for rescoring; for "int8" it is the default `refine_factor`.
+    :param optimize_after: `extend` folds new rows into the indexes
+        (see `optimize`) once this many have been added since the last time.
+        Until then, searches scan the unindexed rows.
+    :raises ValueError: If the quantization is unknown.
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        storage_path: Path = Path.home() / ".llamabot" / "lancedb",
+        embedding_registry: str = CACHED_SENTENCE_TRANSFORMERS,
+        embedding_model: str = "minishlab/potion-base-8M",
+        auto_create_fts_index: bool = True,
+        rerank: bool = True,
+        scalar_indexes: bool = True,
+        ann: Optional[ANNConfig] = ANNConfig(),
+        search_params: SearchParams = SearchParams(),
+        quantization: Optional[str] = None,
+        rescore_factor: int = 4,
+        optimize_after: int = 10_000,
+    ):
+        import lancedb
+        import pyarrow as pa
+        from lancedb.embeddings import get_registry
+        from lancedb.pydantic import LanceModel, Vector
+
+        self.embedding_func = (
+            get_registry().get(embedding_registry).create(name=embedding_model)
+        )
+
+        class KnowledgeEntry(LanceModel):
+            """A chunk of the knowledge base."""
+
+            document: str = self.embedding_func.SourceField()
+            vector: Vector(self.embedding_func.ndims()) = (
+                self.embedding_func.VectorField()
+            )
+            content_hash: str
+            document_title: Optional[str] = None
+            section_number: Optional[str] = None
+            section_level: Optional[int] = None
+            collection: Optional[str] = None
+            ingested_at: Optional[datetime] = None
+
+        if quantization not in (None, *QUANTIZATIONS):
+            raise ValueError(
+                f"Unknown quantization {quantization!r}; choose one of {QUANTIZATIONS}."
+            )
+        if quantization == "int8":
+            ann, search_params = int8_settings(ann, search_params, rescore_factor)
+        if quantization == "binary":
+            code_size = code_bytes(self.embedding_func.ndims())
+
+            class QuantizedKnowledgeEntry(KnowledgeEntry):
+                """A chunk of the knowledge base with the binary code of its vector."""
+
+                code: Vector(code_size, value_type=pa.uint8())
+
+            KnowledgeEntry = QuantizedKnowledgeEntry
+
+        self.schema = KnowledgeEntry
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor
+        self.table_name = slugify.slugify(table_name, separator="-")
+        self.auto_create_fts_index = auto_create_fts_index
+        self.scalar_indexes = scalar_indexes
+        self.ann = ann
+        self.search_params = search_params
+        self.optimize_after = optimize_after
+        self.unoptimized = 0
+        self.default_filter: Union[MetadataFilter, str, None] = None
+        storage_path.mkdir(parents=True, exist_ok=True)
+        self.db = lancedb.connect(storage_path)
+        try:
+            self.table = self.db.open_table(self.table_name)
+        except ValueError:
+            self.table = self.db.create_table(self.table_name, schema=self.schema)
+        if set(self.schema.field_names()) - set(self.table.schema.names):
+            self._upgrade_table()
+        self.hashes = self._stored_hashes()
+        self._ensure_indexes()
+
+        self.reranker = None
+        if rerank:
+            from lancedb.rerankers.colbert import ColbertReranker
+
+            self.reranker = ColbertReranker(column="document")
+
+    def _stored_hashes(self, where: Optional[str] = None) -> set[str]:
+        """Read the hashes of stored chunks, without loading vectors.
+
+        :param where: Only read rows matching this SQL predicate.
+        :return: The set of content hashes.
+        """
+        query = self.table.search().select(["content_hash"]).limit(None)
+        if where is not None:
+            query = query.where(where)
+        return set(query.to_arrow()["content_hash"].to_pylist())
+
+    def _upgrade_table(self) -> None:
+        """Add missing columns to a table written by an older store, in place.
+
+        Tables from `LanceDBDocStore` gain content hashes,
+        older `KnowledgeStore` tables gain empty metadata columns,
+        and binary codes are computed from the stored vectors.
+        Existing vectors are kept, so nothing is re-embedded.
+        """
+        import pyarrow as pa
+
+        rows = self.table.to_arrow()
+        if "content_hash" not in rows.column_names:
+            hashes = [content_hash(doc) for doc in rows["document"].to_pylist()]
+            rows = rows.append_column("content_hash", pa.array(hashes, pa.string()))
+        for name, type_ in METADATA_COLUMNS.items():
+            if name not in rows.column_names:
+                rows = rows.append_column(name, pa.nulls(len(rows), type_))
+        if self.quantization == "binary" and "code" not in rows.column_names:
+            codes = binary_codes(rows["vector"].to_pylist())
+            field = self.schema.to_arrow_schema().field("code")
+            rows = rows.append_column(field, pa.array(list(codes), field.type))
+        self.table = self.db.create_table(
+            self.table_name, data=rows, schema=self.schema, mode="overwrite"
+        )
+
+    def _ensure_indexes(self) -> None:
+        """Create the full-text and scalar indexes that are enabled but missing.
+
+        Later writes are folded into them by `table.optimize()`,
+        which indexes only the new rows instead of rebuilding.
+        The vector index is created, or rebuilt, as the table's size requires.
+        """
+        from lancedb.index import FTS, Bitmap, BTree
+
+        existing = {tuple(index.columns) for index in self.table.list_indices()}
+        if self.auto_create_fts_index and ("document",) not in existing:
+            self.table.create_index("document", config=FTS(), replace=True)
+        if self.scalar_indexes:
+            for column, index_type in SCALAR_INDEXES.items():
+                if (column,) not in existing:
+                    config = Bitmap() if index_type == "BITMAP" else BTree()
+                    self.table.create_index(column, config=config, replace=True)
+        if self.ann is not None and self.quantization != "binary":
+            maintain_vector_index(self.table, self.ann, self.embedding_func.ndims())
+
+    def optimize(self) -> None:
+        """Fold rows written since the last call into the table's indexes.
+
+        This compacts the table and indexes the new rows,
+        so its cost grows with the table: bulk loads should call it once,
+        at the end, rather than after every batch.
+        """
+        self.table.optimize()
+        self._ensure_indexes()
+        self.unoptimized = 0
+
+    def rebuild_vector_index(self) -> Optional[str]:
+        """Retrain the vector index on the current table, e.g. after tuning `ann`.
+
+        :return: "created" or "rebuilt", or None if the table is still
+            below `ann.min_rows` (or `ann` is None, or the store is binary).
+        """
+        if self.ann is None or self.quantization == "binary":
+            return None
+        return maintain_vector_index(
+            self.table, self.ann, self.embedding_func.ndims(), force=True
+        )
+
+    def __contains__(self, document: Union[str, SectionChunk]) -> bool:
+        """Check whether a chunk is stored outside any collection.
+
+        :param document: The chunk text or `SectionChunk`.
+        :return: True if the chunk is in the store.
+        """
+        return chunk_hash(as_chunk(document)) in self.hashes
+
+    def __len__(self) -> int:
+        """Count stored chunks.
+
+        :return: The number of chunks.
+        """
+        return len(self.hashes)
+
+    @property
+    def version(self) -> int:
+        """The table version, which changes with every write to the store.
+
+        :return: The LanceDB table version.
+        """
+        return self.table.version
+
+    def _add(
+        self,
+        documents: Iterable[Union[str, SectionChunk]],
+        collection: Optional[str] = None,
+        seen: Optional[set] = None,
+    ) -> int:
+        """Embed and add chunks that are not stored yet, in batches.
+
+        :param documents: Chunk texts or `SectionChunk`s;
+            duplicates and stored chunks are skipped.
+        :param collection: Collection recorded on the new rows.
+        :param seen: If given, receives the hash of every chunk in `documents`.
+        :return: The number of chunks added.
+        """
+        seen = set() if seen is None else seen
+        ingested_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        added = 0
+        for batch in batched(documents, WRITE_BATCH):
+            rows = {}
+            for document in batch:
+                chunk = as_chunk(document)
+                digest = chunk_hash(chunk, collection)
+                seen.add(digest)
+                if digest not in self.hashes and digest not in rows:
+                    rows[digest] = {
+                        "document": chunk.text,
+                        "content_hash": digest,
+                        "document_title": chunk.document_title,
+                        "section_number": chunk.section_number,
+                        "section_level": chunk.section_level,
+                        "collection": collection,
+                        "ingested_at": ingested_at,
+                    }
+            if rows:
+                if self.quantization == "binary":
+                    self._embed_with_codes(rows.values())
+                self.table.add(list(rows.values()))
+                self.hashes.update(rows)
+                added += len(rows)
+        return added
+
+    def _embed_with_codes(self, rows: Iterable[dict]) -> None:
+        """Embed new rows here, rather than in LanceDB, to add their binary codes.
+
+        :param rows: Rows to fill in, in place.
+        """
+        rows = list(rows)
+        documents = [row["document"] for row in rows]
+        vectors = self.embedding_func.compute_source_embeddings_with_retry(documents)
+        for row, vector, code in zip(rows, vectors, binary_codes(vectors)):
+            row["vector"] = vector
+            row["code"] = code.tolist()
+
+    def _delete(self, hashes: set[str]) -> None:
+        """Delete chunks by content hash.
+
+        :param hashes: Hashes of the chunks to delete.
+        """
+        ordered = sorted(hashes)
+        for start in range(0, len(ordered), WRITE_BATCH):
+            batch = ordered[start : start + WRITE_BATCH]
+            quoted = ", ".join(f"'{h}'" for h in batch)
+            self.table.delete(f"content_hash IN ({quoted})")
+        self.hashes -= hashes
+
+    def append(
+        self, document: Union[str, SectionChunk], collection: Optional[str] = None
+    ) -> None:
+        """Add one chunk, unless it is already stored.
+
+        :param document: The chunk text or `SectionChunk`.
+        :param collection: Collection to file the chunk under.
+        """
+        self.extend([document], collection)
+
+    def extend(
+        self,
+        documents: list[Union[str, SectionChunk]],
+        collection: Optional[str] = None,
+    ) -> None:
+        """Add chunks that are not already stored.
+
+        The indexes are only updated once `optimize_after` rows
+        have accumulated; call `optimize` after the last batch of a bulk load.
+
+        :param documents: The chunk texts or `SectionChunk`s.
+        :param collection: Collection to file the chunks under.
+        """
+        self.unoptimized += self._add(documents, collection)
+        if self.unoptimized >= self.optimize_after:
+            self.optimize()
+
+    def sync(
+        self,
+        documents: Iterable[Union[str, SectionChunk]],
+        collection: Optional[str] = None,
+    ) -> SyncStats:
+        """Make the store hold exactly `documents`, touching only what changed.
+
+        `documents` is consumed as a stream;
+        only the hashes of the chunks are held in memory.
+
+        :param documents: Every chunk that should be in the store,
+            or in `collection` if given.
+        :param collection: Only sync this collection, leaving other rows alone.
+            Without it, the whole table is synced.
+        :return: Counts of added, deleted and unchanged chunks.
+        """
+        if collection is None:
+            stored = set(self.hashes)
+        else:
+            stored = self._stored_hashes(MetadataFilter(collection=collection).to_sql())
+        seen: set[str] = set()
+        added = self._add(documents, collection, seen)
+        vanished = stored - seen
+        if vanished:
+            self._delete(vanished)
+        if added or vanished or self.unoptimized:
+            self.optimize()
+        return SyncStats(
+            added=added, deleted=len(vanished), unchanged=len(seen & stored)
+        )
+
+    def filtered(self, where: Union[MetadataFilter, str]) -> "KnowledgeStore":
+        """Scope retrieval to a subset of the table.
+
+        The returned store shares this one's table,
+        so e.g. a QueryBot can serve a single document family
+        out of a table holding several.
+
+        :param where: A `MetadataFilter` or a raw LanceDB SQL predicate.
+        :return: A store whose `retrieve` applies `where` by default.
+        """
+        scoped = copy.copy(self)
+        scoped.default_filter = where
+        return scoped
+
+    def vector_search(
+        self,
+        query: str,
+        nprobes: Optional[int] = None,
+        refine_factor: Optional[int] = None,
+        query_vector: Optional[Sequence[float]] = None,
+    ) -> Any:
+        """Start a vector search tuned by `search_params` and the index metric.
+
+        :param query: The query text, embedded by the table's embedding function.
+        :param nprobes: Overrides `search_params.nprobes`.
+        :param refine_factor: Overrides `search_params.refine_factor`.
+        :param query_vector: The query's embedding, if already computed;
+            the query text is then not embedded again.
+        :return: A LanceDB vector query builder.
+        """
+        overrides = dict(nprobes=nprobes, refine_factor=refine_factor)
+        params = dataclasses.replace(
+            self.search_params,
+            **{name: value for name, value in overrides.items() if value is not None},
+        )
+        search = self.table.search(
+            query if query_vector is None else query_vector, query_type="vector"
+        )
+        search = params.apply(search)
+        if self.ann is not None:
+            search = search.distance_type(self.ann.distance_type)
+        return search
+
+    def vector_rows(
+        self,
+        query: str,
+        limit: int,
+        where: Optional[str] = None,
+        columns: Sequence[str] = ("document",),
+        nprobes: Optional[int] = None,
+        refine_factor: Optional[int] = None,
+        query_vector: Optional[Sequence[float]] = None,
+    ) -> "pa.Table":
+        """Run a vector search and return the closest rows.
+
+        Binary stores rank `limit * rescore_factor` rows by the Hamming
+        distance of their codes, then read only those rows' float vectors
+        to keep the `limit` closest.
+
+        :param query: The query text.
+        :param limit: Number of rows to return.
+        :param where: SQL prefilter, or None.
+        :param columns: Columns to return, besides `_distance`.
+        :param nprobes: As for `vector_search`.
+        :param refine_factor: As for `vector_search`.
+        :param query_vector: As for `vector_search`.
+        :return: The rows, closest first.
+        """
+        if self.quantization != "binary":
+            search = self.vector_search(query, nprobes, refine_factor, query_vector)
+            if where is not None:
+                search = search.where(where, prefilter=True)
+            return search.limit(limit).select([*columns, "_distance"]).to_arrow()
+
+        vector = query_vector
+        if vector is None:
+            vector = self.embedding_func.compute_query_embeddings_with_retry(query)[0]
+        search = self.table.search(binary_codes(vector), vector_column_name="code")
+        search = search.distance_type("hamming")
+        if where is not None:
+            search = search.where(where, prefilter=True)
+        shortlist = search.limit(limit * self.rescore_factor)
+        rows = shortlist.select([*columns, "vector", "_distance"]).to_arrow()
+        distance_type = self.ann.distance_type if self.ann is not None else "l2"
+        return rescore(vector, rows, limit, distance_type)
+
+    def retrieve_chunks(
+        self,
+        query: str,
+        n_results: int = 10,
+        where: Union[MetadataFilter, str, None] = None,
+        nprobes: Optional[int] = None,
+        refine_factor: Optional[int] = None,
+        query_vector: Optional[Sequence[float]] = None,
+    ) -> list[SectionChunk]:
+        """Retrieve the chunks most relevant to a query, with their provenance.
+
+        :param query: The query.
+        :param n_results: Number of chunks to return.
+        :param where: Only consider chunks matching this `MetadataFilter`
+            or LanceDB SQL predicate; defaults to the store's `filtered` scope.
+            It is applied before the search, so up to `n_results`
+            matching chunks are returned however rare they are.
+        :param nprobes: IVF partitions to search,
+            overriding `search_params` for this query.
+        :param refine_factor: Full-precision re-ranking factor,
+            overriding `search_params` for this query.
+        :param query_vector: The query's embedding, if already computed,
+            e.g. shared with other stores by `fanout.fan_out`.
+        :return: The chunks, most relevant first.
+        """
+        predicate = _where_sql(where if where is not None else self.default_filter)
+        columns = ["document", *PROVENANCE_COLUMNS]
+        rows = self.vector_rows(
+            query, n_results, predicate, columns, nprobes, refine_factor, query_vector
+        )
+        if self.reranker is not None:
+            rows = self.reranker.rerank_vector(query, rows)
+        return [chunk_from_row(row) for row in rows.to_pylist()]
+
+    def retrieve(
+        self,
+        query: str,
+        n_results: int = 10,
+        where: Union[MetadataFilter, str, None] = None,
+        nprobes: Optional[int] = None,
+        refine_factor: Optional[int] = None,
+        query_vector: Optional[Sequence[float]] = None,
+    ) -> list[str]:
+        """Retrieve the chunks most relevant to a query, ready for a prompt.
+
+        :param query: The query.
+        :param n_results: Number of chunks to return.
+        :param where: Metadata filter, as for `retrieve_chunks`.
+        :param nprobes: IVF partitions to search, as for `retrieve_chunks`.
+        :param refine_factor: Re-ranking factor, as for `retrieve_chunks`.
+        :param query_vector: The query's embedding, as for `retrieve_chunks`.
+        :return: The chunk texts with citation lines, most relevant first.
+        """
+        chunks = self.retrieve_chunks(
+            query, n_results, where, nprobes, refine_factor, query_vector
+        )
+        return [cite(chunk) for chunk in chunks]
+
+    def reset(self) -> None:
+        """Remove every chunk, keeping the table's indexes."""
+        self.db.drop_table(self.table_name)
+        self.table = self.db.create_table(self.table_name, schema=self.schema)
+        self.hashes = set()
+        self.unoptimized = 0
+        self._ensure_indexes()
@@ -0,0 +1,188 @@
+"""A persistent embedding cache for the LanceDB docstores.
+
+The notebooks rebuild their docstores with `reset()` followed by `extend()`,
+which re-embeds every chunk even when almost none of them changed.
+`CachedEmbeddings` is a mixin for LanceDB embedding functions
+that looks each text up in an `EmbeddingCache`,
+keyed by the embedding model and a hash of the text,
+and only runs the model on the texts it has not seen.
+
+`CachedSentenceTransformerEmbeddings` is registered with LanceDB
+as `"cached-sentence-transformers"`, so a docstore can use it with
+
+    LanceDBDocStore(table_name, embedding_registry=CACHED_SENTENCE_TRANSFORMERS)
+
+LanceDB records the embedding function in the table's metadata,
+so tables created this way keep using the cache when reopened,
+provided this module has been imported (the `rag` factories do so).
+
+Both it and `SharedSentenceTransformerEmbeddings`
+(registered as `"shared-sentence-transformers"`) load their model through
+`model_registry`, so docstores using the same model share one loaded copy.
+"""
+
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+from lancedb.embeddings import get_registry
+from lancedb.embeddings.sentence_transformers import SentenceTransformerEmbeddings
+
+from .cache import DEFAULT_CACHE_DIR, DiskLRUCache
+from .model_registry import get_sentence_transformer
+
+CACHED_SENTENCE_TRANSFORMERS = "cached-sentence-transformers"
+SHARED_SENTENCE_TRANSFORMERS = "shared-sentence-transformers"
+
+# Embedding function fields that do not change the vectors it computes.
+_NON_MODEL_FIELDS = frozenset(
+    {"name", "max_retries", "trust_remote_code", "cache_path"}
+)
+
+
+class EmbeddingCache(DiskLRUCache):
+    """A `DiskLRUCache` of float32 embedding vectors.
+
+    :param path: Database file.
+    :param max_bytes: Upper bound on the total size of stored vectors;
+        the default holds about 700k 384-dimensional vectors.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path] = DEFAULT_CACHE_DIR / "embeddings.sqlite",
+        max_bytes: int = 1024 * 2**20,
+    ):
+        super().__init__(path, max_bytes)
+
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        """Build the cache key for a text embedded by a model.
+
+        :param model: Identifies the embedding model and its settings.
+        :param text: The embedded text.
+        :return: A hex digest.
+        """
+        return hashlib.sha256(f"{model}\0{text}".encode()).hexdigest()
+
+    def get_vectors(self, model: str, texts: list[str]) -> dict[str, list[float]]:
+        """Look up the cached embeddings of several texts.
+
+        :param model: Identifies the embedding model and its settings.
+        :param texts: The texts.
+        :return: Embeddings of the texts that were cached, by text.
+        """
+        keys = {self.key(model, text): text for text in texts}
+        found = self.get_many(list(keys))
+        return {
+            keys[key]: np.frombuffer(value, dtype=np.float32).tolist()
+            for key, value in found.items()
+        }
+
+    def set_vectors(self, model: str, vectors: dict[str, list[float]]) -> None:
+        """Store embeddings.
+
+        :param model: Identifies the embedding model and its settings.
+        :param vectors: Embeddings by text.
+        """
+        self.set_many(
+            {
+                self.key(model, text): np.asarray(vector, dtype=np.float32).tobytes()
+                for text, vector in vectors.items()
+            }
+        )
+
+
+_caches: dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(path: Optional[str] = None) -> EmbeddingCache:
+    """Get the process-wide embedding cache stored at `path`.
+
+    :param path: Database file; defaults to one under `~/.llamabot/cache`.
+    :return: The cache, opened on first use.
+    """
+    path = str(path or DEFAULT_CACHE_DIR / "embeddings.sqlite")
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = EmbeddingCache(path)
+        return _caches[path]
+
+
+class CachedEmbeddings:
+    """Mixin that serves a LanceDB text embedding function from an `EmbeddingCache`.
+
+    Place it before the embedding function class in the bases.
+    The concrete class must declare a `cache_path: Optional[str]` field.
+    """
+
+    def cache_namespace(self) -> str:
+        """Identify the model, and the settings, that produced a vector.
+
+        :return: The namespace used in cache keys: the model name,
+            then the settings that change its vectors (e.g. `normalize`
+            and `device`) as JSON.
+        """
+        settings = {
+            key: value
+            for key, value in self.model_dump().items()
+            if key not in _NON_MODEL_FIELDS
+        }
+        return f"{self.name} {json.dumps(settings, sort_keys=True, default=str)}"
+
+    def generate_embeddings(self, texts, *args, **kwargs) -> list:
+        """Embed texts, running the model only on those not cached yet.
+
+        :param texts: The texts to embed.
+        :param args: Passed through to the wrapped embedding function.
+        :param kwargs: Passed through to the wrapped embedding function.
+        :return: One embedding per text.
+        """
+        texts = [str(text) for text in texts]
+        cache = get_embedding_cache(self.cache_path)
+        namespace = self.cache_namespace()
+        vectors = cache.get_vectors(namespace, texts)
+        missing = list(dict.fromkeys(t for t in texts if t not in vectors))
+        if missing:
+            computed = super().generate_embeddings(missing, *args, **kwargs)
+            # Round to float32, as stored, so hits and misses agree exactly.
+            new = {
+                text: np.asarray(vector, dtype=np.float32).tolist()
+                for text, vector in zip(missing, computed)
+            }
+            cache.set_vectors(namespace, new)
+            vectors.update(new)
+        return [vectors[text] for text in texts]
+
+
+@get_registry().register(SHARED_SENTENCE_TRANSFORMERS)
+class SharedSentenceTransformerEmbeddings(SentenceTransformerEmbeddings):
+    """sentence-transformers embeddings from the process-wide model registry.
+
+    LanceDB caches only the most recently used instance's model,
+    so docstores with separate embedding functions reload each other's model.
+    """
+
+    def get_embedding_model(self):
+        """Get the shared model for this function's name and settings.
+
+        :return: A `sentence_transformers.SentenceTransformer`.
+        """
+        return get_sentence_transformer(self.name, self.device, self.trust_remote_code)
+
+
+@get_registry().register(CACHED_SENTENCE_TRANSFORMERS)
+class CachedSentenceTransformerEmbeddings(
+    CachedEmbeddings, SharedSentenceTransformerEmbeddings
+):
+    """sentence-transformers embeddings served from a persistent cache.
+
+    :param cache_path: Embedding cache database; defaults to one under
+        `~/.llamabot/cache`.
+    """
+
+    cache_path: Optional[str] = None
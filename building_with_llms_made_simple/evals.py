@@ -0,0 +1,124 @@
+"""Evaluation helpers for the docstring bots from `notebooks/04_evals.py`."""
+
+from typing import List, Optional
+
+import llamabot as lmb
+
+from .cache import ResponseCache, enable_response_cache
+from .models import DocstringBreakdown
+
+# Evaluation criteria definitions
+EVALUATION_CRITERIA = {
+    "has_docstring": {
+        "name": "Docstring Presence",
+        "question": "Does the function have a docstring present?",
+        "description": "Is there any docstring content between the triple quotes, "
+        + "or is the docstring empty/missing?",
+    },
+    "is_sphinx_style": {
+        "name": "Sphinx-Style Format",
+        "question": "Is the docstring written in Sphinx-style format?",
+        "description": "Does the docstring use Sphinx directives like :param:, :type:, "
+        + ":return:, :rtype: rather than other formats like Google, NumPy, or plain text?",  # noqa: E501
+    },
+}
+
+
+@lmb.prompt("system")
+def detailed_docstring_evaluation_system_prompt(
+    has_docstring_examples: dict, sphinx_style_examples: dict
+):
+    """You are a docstring quality evaluator. Assess docstrings based on two key
+    criteria with specific examples from human evaluators.
+
+    ## EVALUATION CRITERIA
+
+    ### 1. DOCSTRING PRESENCE
+    Does the function have a docstring present?
+
+    {% if has_docstring_examples.get('good') %}
+    Examples with docstrings present:
+    {% for example in has_docstring_examples['good'] %}
+    {{ example }}
+
+    {% endfor %}
+    {% endif %}
+
+    {% if has_docstring_examples.get('bad') %}
+    Examples with missing docstrings:
+    {% for example in has_docstring_examples['bad'] %}
+    {{ example }}
+
+    {% endfor %}
+    {% endif %}
+
+    ### 2. SPHINX-STYLE FORMAT
+    Is the docstring written in Sphinx-style format?
+
+    {% if sphinx_style_examples.get('good') %}
+    Examples of proper Sphinx-style format:
+    {% for example in sphinx_style_examples['good'] %}
+    {{ example }}
+
+    {% endfor %}
+    {% endif %}
+
+    {% if sphinx_style_examples.get('bad') %}
+    Examples of non-Sphinx-style format:
+    {% for example in sphinx_style_examples['bad'] %}
+    {{ example }}
+
+    {% endfor %}
+    {% endif %}
+
+    ## EVALUATION TASK
+    Evaluate the given docstring on each criterion:
+    1. First, check if a docstring is present (not empty)
+    2. Then, if present, check if it uses Sphinx-style formatting (:param:, :type:, :return:, :rtype:)
+
+    Use the human-labeled examples above as your reference standards.
+    """  # noqa: E501
+
+
+@lmb.prompt("system")
+def improved_system_prompt(good_examples: List[str]):
+    """You are a Python documentation assistant. Create high-quality function
+    breakdowns with clear, informative docstrings.
+
+    HIGH QUALITY DOCSTRINGS should:
+    - Clearly explain what the function does
+    - Document all parameters with types
+    - Document return values with types
+    - Use proper formatting and grammar
+
+    Examples of HIGH QUALITY docstrings:
+    {% for example in good_examples %}
+    {{ example }}
+
+    {% endfor %}
+
+    Generate a function breakdown following these quality standards."""
+
+
+def create_improved_docstring_bot(
+    good_examples: List[str],
+    model_name: str = "ollama_chat/gemma2:2b",
+    response_cache: Optional[ResponseCache] = None,
+) -> lmb.StructuredBot:
+    """Create an improved docstring bot using good examples.
+
+    :param good_examples: Human-approved docstrings to show the bot.
+    :param model_name: The LiteLLM model string to use.
+    :param response_cache: If given, re-running the same evaluation
+        is answered from this on-disk cache.
+    :return: A StructuredBot that returns `DocstringBreakdown` objects.
+    """
+    bot = lmb.StructuredBot(
+        system_prompt=improved_system_prompt(good_examples),
+        pydantic_model=DocstringBreakdown,
+        model_name=model_name,
+        temperature=0.0,
+    )
+    if response_cache is not None:
+        enable_response_cache(bot, response_cache)
+    return bot
@@ -0,0 +1,530 @@
+"""A deterministic stand-in for the Ollama HTTP API.
+
+Point any bot at it with `api_base=server.url` and an `ollama_chat/*` model name,
+and SimpleBot, StructuredBot, QueryBot and AgentBot all run
+without a GPU, a network connection or pulled models:
+
+- text replies are pseudo-random words, reproducible for a given request and seed;
+- when the request carries a JSON schema (StructuredBot),
+  the reply is a schema-valid JSON instance;
+- when the request carries tools (AgentBot),
+  the reply is a tool call, finishing with `respond_to_user` when it is available;
+- latency is sampled from a configurable distribution
+  and tokens are emitted at a configurable rate.
+
+Only the standard library is used.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Optional
+
+from ._http import Request, Response, start_server
+
+DEFAULT_MODELS = ("llama3.2", "phi4", "gemma2:2b", "mistral-small3.2")
+
+_WORDS = (
+    "the model answers questions about documents with care and cites each "
+    "section it uses while keeping responses short clear and grounded in the "
+    "retrieved context so that readers can verify every claim quickly"
+).split()
+
+
+@dataclass
+class LatencyModel:
+    """A distribution of delays, in seconds.
+
+    :param distribution: One of "fixed", "uniform", "normal", "lognormal"
+        or "exponential".
+    :param mean: Mean delay.
+    :param spread: Half-width for "uniform",
+        standard deviation for "normal",
+        and sigma of the underlying normal for "lognormal".
+    """
+
+    distribution: str = "fixed"
+    mean: float = 0.0
+    spread: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw one delay.
+
+        :param rng: Random number generator to draw from.
+        :return: A non-negative delay in seconds.
+        :raises ValueError: If the distribution name is unknown.
+        """
+        if self.mean <= 0 and self.distribution != "uniform":
+            return 0.0
+        if self.distribution == "fixed":
+            delay = self.mean
+        elif self.distribution == "uniform":
+            delay = rng.uniform(self.mean - self.spread, self.mean + self.spread)
+        elif self.distribution == "normal":
+            delay = rng.gauss(self.mean, self.spread)
+        elif self.distribution == "lognormal":
+            # Choose mu so that the distribution's mean equals `self.mean`.
+            mu = math.log(self.mean) - self.spread**2 / 2
+            delay = rng.lognormvariate(mu, self.spread)
+        elif self.distribution == "exponential":
+            delay = rng.expovariate(1 / self.mean)
+        else:
+            raise ValueError(f"Unknown latency distribution {self.distribution!r}")
+        return max(delay, 0.0)
+
+
+@dataclass
+class FakeOllamaConfig:
+    """Behaviour of the stand-in server.
+
+    :param latency: Delay before the first token (prompt processing time).
+    :param connect_latency: Delay before serving each new connection,
+        standing in for TCP and TLS handshakes with a remote host.
+    :param tokens_per_second: Generation speed; 0 means instantaneous.
+    :param response_tokens: Number of words in free-text replies.
+    :param seed: Base seed; replies are a function of the seed and the request.
+    :param max_tool_calls: Number of assistant turns that call a regular tool
+        before the fake model finishes.
+    :param terminal_tools: Tools that end an agent loop, called to finish.
+    :param embedding_dim: Dimensionality of `/api/embed` vectors.
+    :param models: Model names listed by `/api/tags`.
+    """
+
+    latency: LatencyModel = field(default_factory=LatencyModel)
+    connect_latency: float = 0.0
+    tokens_per_second: float = 0.0
+    response_tokens: int = 32
+    seed: int = 0
+    max_tool_calls: int = 1
+    terminal_tools: tuple[str, ...] = ("respond_to_user", "return_object_to_user")
+    embedding_dim: int = 384
+    models: tuple[str, ...] = DEFAULT_MODELS
+
+
+def fake_instance(
+    schema: dict, rng: random.Random, definitions: Optional[dict] = None
+) -> Any:
+    """Generate a value that validates against a JSON schema.
+
+    Supports the subset of JSON schema that pydantic emits:
+    `$ref`/`$defs`, `anyOf`/`oneOf`/`allOf`, `enum`/`const`,
+    objects, arrays, strings, numbers, integers, booleans and null.
+
+    :param schema: The JSON schema.
+    :param rng: Random number generator to draw from.
+    :param definitions: Named sub-schemas for resolving `$ref`;
+        taken from the root schema when not given.
+    :return: A JSON-compatible value.
+    """
+    if definitions is None:
+        definitions = {**schema.get("definitions", {}), **schema.get("$defs", {})}
+    if "$ref" in schema:
+        return fake_instance(
+            definitions[schema["$ref"].split("/")[-1]], rng, definitions
+        )
+    if "const" in schema:
+        return schema["const"]
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+    for key in ("anyOf", "oneOf", "allOf"):
+        if key in schema:
+            options = [s for s in schema[key] if s.get("type") != "null"]
+            return fake_instance((options or schema[key])[0], rng, definitions)
+
+    schema_type = schema.get("type", "object" if "properties" in schema else "string")
+    if isinstance(schema_type, list):
+        schema_type = next((t for t in schema_type if t != "null"), "null")
+
+    if schema_type == "object":
+        return {
+            name: fake_instance(subschema, rng, definitions)
+            for name, subschema in schema.get("properties", {}).items()
+        }
+    if schema_type == "array":
+        low = schema.get("minItems", 1)
+        high = max(low, min(schema.get("maxItems", low + 2), low + 2))
+        return [
+            fake_instance(schema.get("items", {}), rng, definitions)
+            for _ in range(rng.randint(low, high))
+        ]
+    if schema_type == "integer":
+        low = schema.get("minimum", schema.get("exclusiveMinimum", -1) + 1)
+        high = schema.get("maximum", schema.get("exclusiveMaximum", low + 101) - 1)
+        return rng.randint(low, max(low, high))
+    if schema_type == "number":
+        low = schema.get("minimum", schema.get("exclusiveMinimum", 0.0))
+        high = schema.get("maximum", schema.get("exclusiveMaximum", low + 100.0))
+        return round(rng.uniform(low, high), 3)
+    if schema_type == "boolean":
+        return rng.random() < 0.5
+    if schema_type == "null":
+        return None
+    return _fake_string(schema, rng)
+
+
+def _fake_string(schema: dict, rng: random.Random) -> str:
+    """Generate a string honouring `format`, `minLength` and `maxLength`.
+
+    :param schema: A string JSON schema.
+    :param rng: Random number generator to draw from.
+    :return: The string.
+    """
+    fmt = schema.get("format")
+    if fmt == "date-time":
+        return "2025-07-07T09:00:00Z"
+    if fmt == "date":
+        return "2025-07-07"
+    if fmt == "email":
+        return f"{rng.choice(_WORDS)}@example.com"
+    if fmt in ("uri", "url"):
+        return f"https://example.com/{rng.choice(_WORDS)}"
+    text = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(1, 4)))
+    text = text.ljust(schema.get("minLength", 0), "x")
+    return text[: schema["maxLength"]] if "maxLength" in schema else text
+
+
+def _request_rng(payload: dict, seed: int) -> random.Random:
+    """Derive a deterministic RNG from the request contents.
+
+    :param payload: The decoded request body.
+    :param seed: The server's base seed.
+    :return: A seeded random number generator.
+    """
+    relevant = {
+        key: payload.get(key) for key in ("model", "messages", "prompt", "format")
+    }
+    digest = hashlib.sha256(
+        json.dumps(relevant, sort_keys=True, default=str).encode()
+    ).digest()
+    return random.Random(seed ^ int.from_bytes(digest[:8], "big"))
+
+
+def _count_tokens(messages: list[dict]) -> int:
+    """Approximate the prompt length in tokens by counting words.
+
+    :param messages: Ollama chat messages.
+    :return: Approximate token count.
+    """
+    return sum(len(str(m.get("content") or "").split()) for m in messages)
+
+
+class FakeOllama:
+    """Request handler implementing the stand-in Ollama API.
+
+    :param config: Server behaviour; defaults to zero latency.
+    """
+
+    def __init__(self, config: Optional[FakeOllamaConfig] = None):
+        self.config = config or FakeOllamaConfig()
+        self.requests_served = 0
+
+    async def handle(self, request: Request) -> Response:
+        """Route a request to the matching Ollama endpoint.
+
+        :param request: The incoming request.
+        :return: The response.
+        """
+        routes = {
+            "/api/chat": self.chat,
+            "/api/generate": self.generate,
+            "/api/embed": self.embed,
+            "/api/show": self.show,
+            "/api/tags": self.tags,
+            "/api/version": self.version,
+        }
+        if request.path == "/":
+            return Response(body=b"Ollama is running", content_type="text/plain")
+        if request.path not in routes:
+            return Response.json({"error": f"unknown endpoint {request.path}"}, 404)
+        self.requests_served += 1
+        return await routes[request.path](request.json() or {})
+
+    async def tags(self, payload: dict) -> Response:
+        """List the configured models.
+
+        :param payload: Ignored.
+        :return: The `/api/tags` response.
+        """
+        return Response.json(
+            {"models": [{"name": m, "model": m} for m in self.config.models]}
+        )
+
+    async def show(self, payload: dict) -> Response:
+        """Describe a model.
+
+        :param payload: Request body with the model name.
+        :return: The `/api/show` response.
+        """
+        return Response.json(
+            {
+                "details": {"family": "fake", "parameter_size": "0B"},
+                "model_info": {"general.context_length": 131072},
+                "capabilities": ["completion", "tools"],
+                "template": "{{ .Prompt }}",
+            }
+        )
+
+    async def version(self, payload: dict) -> Response:
+        """Report a version string.
+
+        :param payload: Ignored.
+        :return: The `/api/version` response.
+        """
+        return Response.json({"version": "0.0.0-fake"})
+
+    async def embed(self, payload: dict) -> Response:
+        """Return deterministic unit-norm embeddings.
+
+        :param payload: Request body with `input` (a string or list of strings).
+        :return: The `/api/embed` response.
+        """
+        inputs = payload.get("input", [])
+        inputs = [inputs] if isinstance(inputs, str) else inputs
+        embeddings = []
+        for text in inputs:
+            rng = random.Random(hashlib.sha256(text.encode()).digest())
+            vector = [rng.gauss(0, 1) for _ in range(self.config.embedding_dim)]
+            norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+            embeddings.append([v / norm for v in vector])
+        return Response.json(
+            {"model": payload.get("model", ""), "embeddings": embeddings}
+        )
+
+    async def generate(self, payload: dict) -> Response:
+        """Serve the completion endpoint.
+
+        :param payload: The `/api/generate` request body.
+        :return: The response, streamed if requested.
+        """
+        messages = [{"role": "user", "content": payload.get("prompt", "")}]
+        return await self._reply(payload, messages, key="response")
+
+    async def chat(self, payload: dict) -> Response:
+        """Serve the chat endpoint.
+
+        :param payload: The `/api/chat` request body.
+        :return: The response, streamed if requested.
+        """
+        return await self._reply(payload, payload.get("messages", []), key="message")
+
+    def _plan(self, payload: dict, messages: list[dict], rng: random.Random):
+        """Decide what the fake model says.
+
+        :param payload: The request body.
+        :param messages: The conversation so far.
+        :param rng: The request's random number generator.
+        :return: A tuple of (content, tool_calls); tool_calls may be None.
+        """
+        tools = {
+            t["function"]["name"]: t["function"].get("parameters", {})
+            for t in payload.get("tools") or []
+        }
+        if tools:
+            assistant_turns = sum(1 for m in messages if m.get("role") == "assistant")
+            regular = [name for name in tools if name not in self.config.terminal_tools]
+            terminal = [name for name in tools if name in self.config.terminal_tools]
+            if regular and assistant_turns < self.config.max_tool_calls:
+                # Agent frameworks list built-in tools first,
+                # so the last regular tool is the one the user supplied.
+                name = regular[-1]
+            elif terminal:
+                name = terminal[0]
+            else:
+                name = None
+            if name is not None:
+                arguments = fake_instance(tools[name], rng)
+                return "", [{"function": {"name": name, "arguments": arguments}}]
+
+        fmt = payload.get("format")
+        if isinstance(fmt, dict):
+            return json.dumps(fake_instance(fmt, rng)), None
+        words = [rng.choice(_WORDS) for _ in range(self.config.response_tokens)]
+        if fmt == "json":
+            return json.dumps({"response": " ".join(words)}), None
+        return " ".join(words), None
+
+    async def _reply(self, payload: dict, messages: list[dict], key: str) -> Response:
+        """Build a (possibly streamed) reply with simulated latency.
+
+        :param payload: The request body.
+        :param messages: The conversation so far.
+        :param key: "message" for chat replies, "response" for completions.
+        :return: The response.
+        """
+        rng = _request_rng(payload, self.config.seed)
+        content, tool_calls = self._plan(payload, messages, rng)
+        first_token_delay = self.config.latency.sample(rng)
+        pieces = [w + " " for w in content.split(" ")] if content else [""]
+        pieces[-1] = pieces[-1].rstrip(" ")
+        per_token = (
+            1 / self.config.tokens_per_second if self.config.tokens_per_second else 0
+        )
+        model = payload.get("model", "")
+
+        def chunk(text: str, done: bool, calls: Optional[list] = None) -> dict:
+            """Build one response object in Ollama's format.
+
+            :param text: Content carried by this chunk.
+            :param done: Whether this is the final chunk.
+            :param calls: Tool calls to attach, if any.
+            :return: The response object.
+            """
+            body = {
+                "model": model,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "done": done,
+            }
+            if key == "message":
+                body["message"] = {"role": "assistant", "content": text}
+                if calls:
+                    body["message"]["tool_calls"] = calls
+            else:
+                body["response"] = text
+            if done:
+                body.update(
+                    done_reason="stop",
+                    prompt_eval_count=_count_tokens(messages),
+                    eval_count=len(pieces),
+                    total_duration=int(
+                        (first_token_delay + per_token * len(pieces)) * 1e9
+                    ),
+                )
+            return body
+
+        if not payload.get("stream", False):
+            await asyncio.sleep(first_token_delay + per_token * len(pieces))
+            return Response.json(chunk(content, True, tool_calls))
+
+        async def stream() -> AsyncIterator[bytes]:
+            """Emit newline-delimited JSON chunks at the configured pace.
+
+            :yield: Encoded chunks.
+            """
+            await asyncio.sleep(first_token_delay)
+            if tool_calls:
+                yield json.dumps(chunk("", False, tool_calls)).encode() + b"\n"
+            else:
+                for piece in pieces:
+                    await asyncio.sleep(per_token)
+                    yield json.dumps(chunk(piece, False)).encode() + b"\n"
+            yield json.dumps(chunk("", True)).encode() + b"\n"
+
+        return Response(body=stream(), content_type="application/x-ndjson")
+
+
+class FakeOllamaServer:
+    """Run a `FakeOllama` in a background thread.
+
+    Use it as a context manager:
+
+        with FakeOllamaServer() as server:
+            bot = lmb.SimpleBot("...", model_name="ollama_chat/llama3.2",
+                                api_base=server.url)
+
+    :param config: Server behaviour; defaults to zero latency.
+    :param host: Interface to bind.
+    :param port: Port to bind; 0 picks a free port.
+    """
+
+    def __init__(
+        self,
+        config: Optional[FakeOllamaConfig] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.app = FakeOllama(config)
+        self.host = host
+        self.port = port
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+
+    @property
+    def url(self) -> str:
+        """Base URL to pass to bots as `api_base`.
+
+        :return: The server's base URL.
+        """
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> "FakeOllamaServer":
+        """Start serving in a daemon thread.
+
+        :return: The running server.
+        """
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._started.wait()
+        return self
+
+    def _run(self) -> None:
+        """Run the event loop that serves requests."""
+        self._loop = asyncio.new_event_loop()
+        server = self._loop.run_until_complete(
+            start_server(
+                self.app.handle,
+                self.host,
+                self.port,
+                connect_delay=self.app.config.connect_latency,
+            )
+        )
+        self.port = server.sockets[0].getsockname()[1]
+        self._started.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            server.close()
+            # Close keep-alive connections that clients left open.
+            connections = asyncio.all_tasks(self._loop)
+            for task in connections:
+                task.cancel()
+            self._loop.run_until_complete(
+                asyncio.gather(*connections, return_exceptions=True)
+            )
+            self._loop.run_until_complete(server.wait_closed())
+            self._loop.close()
+
+    def stop(self) -> None:
+        """Stop serving and wait for the thread to exit."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+
+    def __enter__(self) -> "FakeOllamaServer":
+        """Start the server.
+
+        :return: The running server.
+        """
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        """Stop the server.
+
+        :param exc_info: Exception information, ignored.
+        """
+        self.stop()
+
+
+async def serve_fake_ollama(
+    config: Optional[FakeOllamaConfig] = None,
+    host: str = "127.0.0.1",
+    port: int = 11434,
+) -> None:
+    """Serve the stand-in API in the foreground until cancelled.
+
+    :param config: Server behaviour; defaults to zero latency.
+    :param host: Interface to bind.
+    :param port: Port to bind.
+    """
+    app = FakeOllama(config)
+    server = await start_server(
+        app.handle, host, port, connect_delay=app.config.connect_latency
+    )
+    async with server:
+        await server.serve_forever()
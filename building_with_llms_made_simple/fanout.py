@@ -0,0 +1,326 @@
+"""Concurrent retrieval across docstores, sharing one query embedding.
+
+QueryBot searches its `docstore`, then its `memory`,
+and each store embeds the question itself,
+so retrieval costs the sum of every embedding and every search.
+`fan_out` runs them all at once on a thread pool instead:
+
+- the question is embedded once per distinct embedding function,
+  concurrently with searches of stores that embed for themselves;
+- every store whose `retrieve` accepts a `query_vector`
+  (`KnowledgeStore`, `HybridRetriever`, `RerankingRetriever`,
+  `ConversationMemory`) searches with the shared embedding
+  as soon as it is ready;
+- the searches run concurrently, and the slowest store bounds retrieval.
+
+`afan_out` awaits the same work from async code.
+`FanOutRetriever` puts N docstores (e.g. one per chunking strategy, as
+compared in `notebooks/03_rag.py`) behind the docstore interface, merging
+their rankings by reciprocal rank fusion.
+`enable_concurrent_retrieval` makes a QueryBot retrieve from its docstore
+and its memory concurrently.
+"""
+
+import asyncio
+import inspect
+import json
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Hashable, Optional, Sequence
+
+from .retrieval import reciprocal_rank_fusion
+from .semantic_cache import store_version
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def retrieval_executor() -> ThreadPoolExecutor:
+    """Get the thread pool that retrieval fans out on, creating it on first use.
+
+    :return: The shared pool.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=16, thread_name_prefix="retrieval"
+            )
+        return _executor
+
+
+def embedding_key(store: Any) -> Optional[Hashable]:
+    """Identify the embedding a store can search with, if it takes one.
+
+    :param store: A docstore.
+    :return: A key shared by stores embedding queries identically,
+        or None if the store's `retrieve` does not accept a `query_vector`.
+    """
+    func = getattr(store, "embedding_func", None)
+    if func is None:
+        return None
+    try:
+        parameters = inspect.signature(store.retrieve).parameters
+    except (TypeError, ValueError):
+        return None
+    if "query_vector" not in parameters:
+        return None
+    settings = json.dumps(func.safe_model_dump(), sort_keys=True, default=str)
+    return type(func).__qualname__, settings
+
+
+def _search(
+    store: Any,
+    query: str,
+    n_results: int,
+    embedding: Optional["Future[Sequence[float]]"],
+) -> list[str]:
+    """Search one store, with the shared query embedding if it has one.
+
+    :param store: The docstore.
+    :param query: The query.
+    :param n_results: Number of results.
+    :param embedding: The pending query embedding, or None.
+    :return: The store's results.
+    """
+    if embedding is None:
+        return store.retrieve(query, n_results)
+    return store.retrieve(query, n_results, query_vector=embedding.result())
+
+
+def submit_fan_out(
+    query: str,
+    stores: Sequence[Any],
+    n_results: int = 10,
+    executor: Optional[Executor] = None,
+) -> list["Future[list[str]]"]:
+    """Start embedding a query and searching several stores, concurrently.
+
+    Embeddings are submitted before searches, so that a search waiting
+    for its embedding never holds up the embedding itself.
+
+    :param query: The query.
+    :param stores: The docstores.
+    :param n_results: Number of results per store.
+    :param executor: Where to run the work; defaults to `retrieval_executor()`.
+    :return: One future per store, resolving to its results.
+    """
+    executor = executor or retrieval_executor()
+    embeddings: dict[Hashable, Future] = {}
+    keys = [embedding_key(store) for store in stores]
+    for store, key in zip(stores, keys):
+        if key is not None and key not in embeddings:
+            embed = store.embedding_func.compute_query_embeddings_with_retry
+            embeddings[key] = executor.submit(lambda embed=embed: embed(query)[0])
+    return [
+        executor.submit(_search, store, query, n_results, embeddings.get(key))
+        for store, key in zip(stores, keys)
+    ]
+
+
+def fan_out(
+    query: str,
+    stores: Sequence[Any],
+    n_results: int = 10,
+    executor: Optional[Executor] = None,
+) -> list[list[str]]:
+    """Search several stores concurrently, sharing query embeddings.
+
+    :param query: The query.
+    :param stores: The docstores.
+    :param n_results: Number of results per store.
+    :param executor: As for `submit_fan_out`.
+    :return: Each store's results, in the order of `stores`.
+    """
+    futures = submit_fan_out(query, stores, n_results, executor)
+    return [future.result() for future in futures]
+
+
+async def afan_out(
+    query: str,
+    stores: Sequence[Any],
+    n_results: int = 10,
+    executor: Optional[Executor] = None,
+) -> list[list[str]]:
+    """Search several stores concurrently, without blocking the event loop.
+
+    :param query: The query.
+    :param stores: The docstores.
+    :param n_results: Number of results per store.
+    :param executor: As for `submit_fan_out`.
+    :return: Each store's results, in the order of `stores`.
+    """
+    futures = submit_fan_out(query, stores, n_results, executor)
+    return list(await asyncio.gather(*map(asyncio.wrap_future, futures)))
+
+
+class FanOutRetriever:
+    """Retrieve from several docstores at once and merge their rankings.
+
+    :param stores: The docstores, e.g. one `KnowledgeStore` per chunking strategy.
+    :param weights: RRF weight of each store's ranking; defaults to equal weights.
+    :param rrf_k: RRF rank offset.
+    :param candidates: Results fetched from each store before merging;
+        at least `n_results` are always fetched.
+    :param executor: As for `submit_fan_out`.
+    :raises ValueError: If the number of weights and stores differ.
+    """
+
+    def __init__(
+        self,
+        stores: Sequence[Any],
+        weights: Optional[Sequence[float]] = None,
+        rrf_k: float = 60.0,
+        candidates: int = 20,
+        executor: Optional[Executor] = None,
+    ):
+        if weights is not None and len(weights) != len(stores):
+            raise ValueError("Give one weight per store.")
+        self.stores = list(stores)
+        self.weights = weights
+        self.rrf_k = rrf_k
+        self.candidates = candidates
+        self.executor = executor
+
+    @property
+    def version(self) -> Optional[str]:
+        """Combine the stores' versions, e.g. for `SemanticCache` invalidation.
+
+        :return: The versions, or None if any store is unversioned.
+        """
+        versions = [store_version(store) for store in self.stores]
+        return None if None in versions else "+".join(versions)
+
+    def _merge(self, rankings: list[list[str]], n_results: int) -> list[str]:
+        """Fuse the stores' rankings; chunks found by several stores rank higher.
+
+        :param rankings: Each store's results, best first.
+        :param n_results: Number of results to keep.
+        :return: The merged results, best first.
+        """
+        fused = reciprocal_rank_fusion(rankings, self.weights, self.rrf_k)
+        return [text for text, _ in fused[:n_results]]
+
+    def retrieve(self, query: str, n_results: int = 10) -> list[str]:
+        """Retrieve from every store concurrently and merge the results.
+
+        :param query: The query.
+        :param n_results: Number of results to return.
+        :return: The merged results, best first.
+        """
+        limit = max(self.candidates, n_results)
+        rankings = fan_out(query, self.stores, limit, self.executor)
+        return self._merge(rankings, n_results)
+
+    async def aretrieve(self, query: str, n_results: int = 10) -> list[str]:
+        """Retrieve from every store concurrently, from async code.
+
+        :param query: The query.
+        :param n_results: Number of results to return.
+        :return: The merged results, best first.
+        """
+        limit = max(self.candidates, n_results)
+        rankings = await afan_out(query, self.stores, limit, self.executor)
+        return self._merge(rankings, n_results)
+
+
+class _PrefetchedMemory:
+    """Wrap a memory store to answer `retrieve` from results fetched earlier.
+
+    :param memory: The memory store.
+    """
+
+    def __init__(self, memory: Any):
+        self.memory = memory
+        self._local = threading.local()
+
+    def __getattr__(self, name: str) -> Any:
+        """Delegate everything else (`append`, `reset`, ...) to the memory store.
+
+        :param name: Attribute name.
+        :return: The memory store's attribute.
+        """
+        return getattr(self.memory, name)
+
+    def __bool__(self) -> bool:
+        """Be truthy exactly when the memory store is, as QueryBot checks.
+
+        :return: The memory store's truth value.
+        """
+        return bool(self.memory)
+
+    def prefetch(self, query: str, n_results: int, results: list[str]) -> None:
+        """Keep this thread's results for the `retrieve` call that follows.
+
+        :param query: The query they answer.
+        :param n_results: The number of results asked for.
+        :param results: The memory store's results.
+        """
+        self._local.prefetched = (query, n_results, results)
+
+    def retrieve(self, query: str, n_results: int = 10) -> list[str]:
+        """Return the prefetched results, or search the memory store.
+
+        :param query: The query.
+        :param n_results: Number of results.
+        :return: The memory store's results.
+        """
+        prefetched = self._local.__dict__.pop("prefetched", None)
+        if prefetched is not None and prefetched[:2] == (query, n_results):
+            return prefetched[2]
+        return self.memory.retrieve(query, n_results)
+
+
+class _ConcurrentDocstore:
+    """Wrap a QueryBot's docstore to search its memory at the same time.
+
+    :param docstore: The knowledge docstore.
+    :param memory: The bot's memory, wrapped to receive the prefetched results.
+    :param executor: As for `submit_fan_out`.
+    """
+
+    def __init__(
+        self, docstore: Any, memory: _PrefetchedMemory, executor: Optional[Executor]
+    ):
+        self.docstore = docstore
+        self.memory = memory
+        self.executor = executor
+
+    def __getattr__(self, name: str) -> Any:
+        """Delegate everything else to the docstore.
+
+        :param name: Attribute name.
+        :return: The docstore's attribute.
+        """
+        return getattr(self.docstore, name)
+
+    def retrieve(self, query: str, n_results: int = 10) -> list[str]:
+        """Search the docstore and prefetch the memory's results concurrently.
+
+        :param query: The query.
+        :param n_results: Number of results per store.
+        :return: The docstore's results.
+        """
+        if not self.memory:
+            return self.docstore.retrieve(query, n_results)
+        stores = [self.docstore, self.memory.memory]
+        documents, memories = fan_out(query, stores, n_results, self.executor)
+        self.memory.prefetch(query, n_results, memories)
+        return documents
+
+
+def enable_concurrent_retrieval(bot: Any, executor: Optional[Executor] = None) -> None:
+    """Make a QueryBot search its docstore and memory concurrently.
+
+    QueryBot's own flow is unchanged: when it retrieves from the docstore,
+    the memory search runs alongside (sharing the query embedding where the
+    stores embed alike), and its later memory lookup returns those results.
+
+    :param bot: The QueryBot; its `docstore` and `memory` are wrapped in place.
+    :param executor: As for `submit_fan_out`.
+    """
+    if bot.memory is None:
+        return
+    memory = _PrefetchedMemory(bot.memory)
+    bot.docstore = _ConcurrentDocstore(bot.docstore, memory, executor)
+    bot.memory = memory
@@ -0,0 +1,248 @@
+"""Streaming, parallel ingestion of a directory of documents into a docstore.
+
+This is the `03_rag.py` pipeline (read, chunk, `extend`) reshaped for large corpora:
+
+- files are read and chunked in a process pool,
+  with a bounded number of files in flight at any time;
+- the chunker's tokenizer is loaded before the workers are forked,
+  so they share its copy (see `model_registry`) instead of each loading one;
+  as forking a process that uses LanceDB may deadlock the workers,
+  create the pool (`chunking_pool`) before opening the docstore;
+- chunks are written to the docstore in fixed-size batches,
+  so embeddings are computed (and memory is held) one batch at a time.
+"""
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from os import cpu_count
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from .chunking import SectionChunker, create_chunker
+from .model_registry import shared_process_pool
+
+# Per-process chunker, built once by `_init_worker`.
+_chunker = None
+
+
+@dataclass
+class IngestStats:
+    """Counters describing a finished ingestion run.
+
+    :param files: Number of files read.
+    :param chunks: Number of chunks written to the docstore.
+    :param batches: Number of `extend` calls made.
+    :param added: With `sync`, chunks that were new and got embedded.
+    :param deleted: With `sync`, stored chunks that no longer exist.
+    """
+
+    files: int = 0
+    chunks: int = 0
+    batches: int = 0
+    added: int = 0
+    deleted: int = 0
+
+
+def iter_document_paths(directory: Path, pattern: str = "**/*.txt") -> Iterator[Path]:
+    """Yield the files under `directory` that match `pattern`.
+
+    :param directory: Root directory to search.
+    :param pattern: Glob pattern relative to `directory`.
+    :yield: Paths to matching files, in sorted order.
+    """
+    for path in sorted(Path(directory).glob(pattern)):
+        if path.is_file():
+            yield path
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[list]:
+    """Split an iterable into lists of at most `size` items.
+
+    :param iterable: The items to batch.
+    :param size: Maximum batch size.
+    :yield: Consecutive batches.
+    """
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _init_worker(strategy: str, chunker_kwargs: dict) -> None:
+    """Build the chunker once per worker process.
+
+    :param strategy: Chunking strategy name, see `chunking.CHUNKERS`.
+    :param chunker_kwargs: Keyword arguments for the chunker factory.
+    """
+    global _chunker
+    _chunker = create_chunker(strategy, **chunker_kwargs)
+
+
+def _chunk_file(path: Path) -> list:
+    """Read one file and chunk it with the worker's chunker.
+
+    :param path: The file to read.
+    :return: The chunk texts, or `SectionChunk`s titled with the file's stem
+        when chunking by section.
+    """
+    text = Path(path).read_text(encoding="utf-8", errors="replace")
+    if isinstance(_chunker, SectionChunker):
+        return _chunker(text, document_title=Path(path).stem)
+    return [chunk.text for chunk in _chunker(text)]
+
+
+def chunking_pool(
+    strategy: str = "token",
+    chunker_kwargs: Optional[dict] = None,
+    workers: Optional[int] = None,
+    start_method: str = "fork",
+) -> ProcessPoolExecutor:
+    """Start worker processes that each hold a chunker, for `iter_chunks`.
+
+    With fork, the chunker's tokenizer is loaded here first, so that the
+    workers share this process's copy; create the pool before opening
+    a LanceDB docstore.
+
+    :param strategy: Chunking strategy name, see `chunking.CHUNKERS`.
+    :param chunker_kwargs: Keyword arguments for the chunker factory.
+    :param workers: Number of worker processes; defaults to the CPU count.
+    :param start_method: A `multiprocessing` start method,
+        as for `model_registry.shared_process_pool`.
+    :return: The pool; shut it down when done.
+    """
+    initargs = (strategy, chunker_kwargs or {})
+    if start_method == "fork":
+        # Forked workers inherit the tokenizer;
+        # their own `_init_worker` then only builds a chunker around it.
+        _init_worker(*initargs)
+    return shared_process_pool(
+        workers or cpu_count() or 1, _init_worker, initargs, start_method
+    )
+
+
+def iter_chunks(
+    paths: Iterable[Path],
+    strategy: str = "token",
+    chunker_kwargs: Optional[dict] = None,
+    workers: Optional[int] = None,
+    max_pending: Optional[int] = None,
+    executor: Optional[ProcessPoolExecutor] = None,
+) -> Iterator[list]:
+    """Chunk files in parallel, yielding each file's chunks in input order.
+
+    At most `max_pending` files are submitted ahead of the consumer,
+    so memory use does not depend on the number of files.
+
+    :param paths: Files to chunk.
+    :param strategy: Chunking strategy name, see `chunking.CHUNKERS`.
+    :param chunker_kwargs: Keyword arguments for the chunker factory.
+    :param workers: Number of worker processes; defaults to the CPU count.
+    :param max_pending: Maximum number of files in flight;
+        defaults to four per worker.
+    :param executor: A `chunking_pool` to chunk with, which is left running;
+        `strategy` and `chunker_kwargs` are then ignored.
+        By default, a forked pool is started and shut down.
+    :yield: One list of chunks per file, as returned by `_chunk_file`.
+    """
+    workers = workers or cpu_count() or 1
+    max_pending = max_pending or 4 * workers
+    owned = executor is None
+    if owned:
+        executor = chunking_pool(strategy, chunker_kwargs, workers)
+    pending: deque[Future] = deque()
+    try:
+        for path in paths:
+            pending.append(executor.submit(_chunk_file, path))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        if owned:
+            executor.shutdown(cancel_futures=True)
+
+
+def ingest_directory(
+    directory: Path,
+    docstore,
+    pattern: str = "**/*.txt",
+    strategy: str = "token",
+    chunker_kwargs: Optional[dict] = None,
+    workers: Optional[int] = None,
+    batch_size: int = 256,
+    sync: bool = False,
+    collection: Optional[str] = None,
+    executor: Optional[ProcessPoolExecutor] = None,
+) -> IngestStats:
+    """Read, chunk and store every matching file under `directory`.
+
+    :param directory: Root directory of the corpus.
+    :param docstore: Any docstore with an `extend(list[str])` method,
+        e.g. a `LanceDBDocStore`;
+        the `section` strategy needs a `docstore.KnowledgeStore`,
+        which stores the chunks' provenance.
+    :param pattern: Glob pattern selecting the files to ingest.
+    :param strategy: Chunking strategy name, see `chunking.CHUNKERS`.
+    :param chunker_kwargs: Keyword arguments for the chunker factory.
+    :param workers: Number of worker processes; defaults to the CPU count.
+    :param batch_size: Number of chunks embedded and written per `extend` call.
+        A docstore with an `optimize` method has it called once, at the end.
+    :param sync: Instead of appending, make the docstore hold exactly
+        the corpus's chunks with `docstore.sync`,
+        which only embeds new chunks and deletes vanished ones.
+        Requires a `docstore.KnowledgeStore`.
+    :param collection: File the chunks under this collection of a
+        `docstore.KnowledgeStore`; with `sync`, only this collection is synced.
+    :param executor: A `chunking_pool`, created before `docstore` was opened,
+        to chunk with; `strategy` and `chunker_kwargs` are then ignored.
+        By default, as `docstore` is already open,
+        a pool is started with forkserver (where available) rather than fork,
+        and its workers load their own tokenizers.
+    :return: Counters for the run.
+    """
+    if executor is None:
+        executor = chunking_pool(strategy, chunker_kwargs, workers, "forkserver")
+        try:
+            return ingest_directory(
+                directory,
+                docstore,
+                pattern,
+                workers=workers,
+                batch_size=batch_size,
+                sync=sync,
+                collection=collection,
+                executor=executor,
+            )
+        finally:
+            executor.shutdown(cancel_futures=True)
+    stats = IngestStats()
+
+    def chunk_stream() -> Iterator:
+        """Flatten per-file chunk lists while counting files.
+
+        :yield: Chunks.
+        """
+        for file_chunks in iter_chunks(
+            iter_document_paths(directory, pattern),
+            workers=workers,
+            executor=executor,
+        ):
+            stats.files += 1
+            stats.chunks += len(file_chunks)
+            yield from file_chunks
+
+    # Only pass the collection along when set, so simpler docstores still work.
+    extra = {"collection": collection} if collection is not None else {}
+    if sync:
+        result = docstore.sync(chunk_stream(), **extra)
+        stats.added, stats.deleted = result.added, result.deleted
+        return stats
+    for batch in batched(chunk_stream(), batch_size):
+        docstore.extend(batch, **extra)
+        stats.batches += 1
+    if hasattr(docstore, "optimize"):
+        docstore.optimize()
+    return stats
@@ -0,0 +1,455 @@
+"""Bounded, compacting conversation memory for QueryBot.
+
+`rag.create_memory_store` returns a `LanceDBDocStore`
+that QueryBot appends every answer to and vector-searches on every question,
+so a long-running chat gets slower (and its memory noisier) with every turn.
+`ConversationMemory` has the same `append`/`retrieve`/`reset` interface
+but stays bounded:
+
+- the latest turns of each session sit in a ring buffer,
+  persisted in a plain table that is never embedded,
+  and are returned verbatim;
+- once the buffer is full, its oldest `summarize_every` turns are compacted
+  into one summary by a `Summarizer` (extractive by default, or an LLM),
+  and only summaries are embedded and searched;
+- records older than `ttl` are ignored, and deleted at each compaction,
+  and each session keeps at most `max_summaries` summaries;
+- every record belongs to a session: `session(...)` returns a view
+  reading and writing one session only, e.g. one per chat user.
+
+Each session has its own lock, held only for buffer and table updates:
+the summarizer, which may be an LLM call, runs outside it,
+so a compaction holds up neither other sessions nor this session's reads.
+"""
+
+import copy
+import re
+import threading
+from collections import deque
+from contextlib import ExitStack
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Iterable, NamedTuple, Optional, Sequence
+
+import llamabot as lmb
+import slugify
+
+from .docstore import _sql_string, _sql_timestamp
+from .embeddings import CACHED_SENTENCE_TRANSFORMERS
+
+# Summarizes several conversation turns, oldest first, into one text.
+Summarizer = Callable[[list[str]], str]
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+@lmb.prompt("system")
+def memory_summary_sysprompt():
+    """You compress chat history for a question-answering assistant.
+    You will be given several consecutive answers from the conversation.
+    Summarize them in at most three sentences,
+    keeping names, numbers, decisions and cited sources,
+    so the assistant can recall them later.
+    Reply with the summary only.
+    """
+
+
+def extractive_summary(turns: list[str], max_chars: int = 600) -> str:
+    """Summarize turns by keeping the leading sentence of each.
+
+    :param turns: Turn texts, oldest first.
+    :param max_chars: Approximate size of the summary.
+    :return: One line per turn.
+    """
+    budget = max(1, max_chars // max(1, len(turns)))
+    lines = []
+    for text in turns:
+        sentence = _SENTENCE_END.split(text.strip(), maxsplit=1)[0]
+        lines.append(sentence if len(sentence) <= budget else sentence[:budget] + "…")
+    return "\n".join(lines)
+
+
+def llm_summarizer(model_name: str = "ollama_chat/phi4", **kwargs) -> Summarizer:
+    """Build a summarizer that asks an LLM to compress turns.
+
+    :param model_name: The LiteLLM model string to summarize with.
+    :param kwargs: Extra keyword arguments passed to `SimpleBot`, e.g. `api_base`.
+    :return: A `Summarizer`.
+    """
+    bot = lmb.SimpleBot(
+        memory_summary_sysprompt(),
+        model_name=model_name,
+        temperature=0.0,
+        stream_target="none",
+        **kwargs,
+    )
+
+    def summarize(turns: list[str]) -> str:
+        """Summarize turns with the LLM.
+
+        :param turns: Turn texts, oldest first.
+        :return: The summary.
+        """
+        return bot("\n\n".join(turns)).content
+
+    return summarize
+
+
+@dataclass(frozen=True)
+class MemoryPolicy:
+    """How much conversation memory to keep, and for how long.
+
+    :param recent_turns: Size of each session's ring buffer of verbatim turns.
+    :param summarize_every: Turns compacted into one summary
+        when the buffer overflows; at most `recent_turns`.
+    :param ttl: Forget turns and summaries older than this; None keeps them.
+    :param max_summaries: Summaries kept per session, oldest dropped first;
+        None keeps them all.
+    """
+
+    recent_turns: int = 8
+    summarize_every: int = 4
+    ttl: Optional[timedelta] = None
+    max_summaries: Optional[int] = 64
+
+    def __post_init__(self):
+        """Validate the buffer sizes.
+
+        :raises ValueError: If `summarize_every` is not in 1..`recent_turns`.
+        """
+        if not 1 <= self.summarize_every <= self.recent_turns:
+            raise ValueError("summarize_every must be between 1 and recent_turns.")
+
+
+class Turn(NamedTuple):
+    """A conversation turn in a session's ring buffer."""
+
+    turn: int
+    text: str
+    created_at: datetime
+
+
+def _utcnow() -> datetime:
+    """Read the clock, as the naive UTC timestamps LanceDB stores.
+
+    :return: The current time.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class ConversationMemory:
+    """A QueryBot memory store with per-session, bounded, compacting memory.
+
+    :param table_name: Prefix of the LanceDB tables,
+        `<name>-turns` for buffered turns and `<name>-summaries` for summaries.
+    :param storage_path: Directory holding the LanceDB database.
+    :param embedding_registry: Name of the LanceDB embedding function.
+    :param embedding_model: Model used by the embedding function.
+    :param policy: Buffer sizes and retention.
+    :param summarizer: Compacts old turns into a summary.
+    :param session_id: Session that `append` and `retrieve` use.
+    """
+
+    def __init__(
+        self,
+        table_name: str = "memory",
+        storage_path: Path = Path.home() / ".llamabot" / "lancedb",
+        embedding_registry: str = CACHED_SENTENCE_TRANSFORMERS,
+        embedding_model: str = "minishlab/potion-base-8M",
+        policy: MemoryPolicy = MemoryPolicy(),
+        summarizer: Summarizer = extractive_summary,
+        session_id: str = "default",
+    ):
+        import lancedb
+        import pyarrow as pa
+        from lancedb.embeddings import get_registry
+        from lancedb.pydantic import LanceModel, Vector
+
+        self.embedding_func = (
+            get_registry().get(embedding_registry).create(name=embedding_model)
+        )
+
+        class MemorySummary(LanceModel):
+            """A summary of earlier turns of a session."""
+
+            text: str = self.embedding_func.SourceField()
+            vector: Vector(self.embedding_func.ndims()) = (
+                self.embedding_func.VectorField()
+            )
+            session_id: str
+            created_at: datetime
+            turns: int
+
+        self.schema = MemorySummary
+        self.turn_schema = pa.schema(
+            [
+                ("session_id", pa.string()),
+                ("turn", pa.int64()),
+                ("text", pa.string()),
+                ("created_at", pa.timestamp("us")),
+            ]
+        )
+        self.table_name = slugify.slugify(table_name, separator="-")
+        self.policy = policy
+        self.summarizer = summarizer
+        self.session_id = session_id
+        storage_path.mkdir(parents=True, exist_ok=True)
+        self.db = lancedb.connect(storage_path)
+        # Shared with `session` views, so that `reset` reaches all of them.
+        self._tables: dict = {}
+        self._open_tables()
+        self._buffers: dict[str, deque[Turn]] = {}
+        # Per-session locks, and the sessions whose turns are being summarized.
+        self._session_locks: dict[str, threading.Lock] = {}
+        self._compacting: set[str] = set()
+        # Guards `_session_locks`.
+        self._lock = threading.Lock()
+
+    def _open_tables(self) -> None:
+        """Open or create the turn and summary tables, indexed by session."""
+        from lancedb.index import Bitmap
+
+        tables = self._tables
+        for suffix, schema in [("turns", self.turn_schema), ("summaries", self.schema)]:
+            name = f"{self.table_name}-{suffix}"
+            try:
+                tables[suffix] = self.db.open_table(name)
+            except ValueError:
+                tables[suffix] = self.db.create_table(name, schema=schema)
+            indexed = {tuple(index.columns) for index in tables[suffix].list_indices()}
+            if ("session_id",) not in indexed:
+                tables[suffix].create_index("session_id", config=Bitmap(), replace=True)
+
+    @property
+    def turns(self) -> Any:
+        """The table of buffered turns, of every session.
+
+        :return: A LanceDB table.
+        """
+        return self._tables["turns"]
+
+    @property
+    def summaries(self) -> Any:
+        """The table of summaries, of every session.
+
+        :return: A LanceDB table.
+        """
+        return self._tables["summaries"]
+
+    def session(self, session_id: str) -> "ConversationMemory":
+        """View the memory of another session.
+
+        The view shares tables and buffers with this store,
+        so e.g. a chat server can give each user's QueryBot its own view.
+
+        :param session_id: The session.
+        :return: A store whose `append` and `retrieve` use that session.
+        """
+        view = copy.copy(self)
+        view.session_id = session_id
+        return view
+
+    def _session_lock(self, session_id: Optional[str] = None) -> threading.Lock:
+        """Get the lock guarding a session's buffer and rows.
+
+        :param session_id: The session; defaults to this view's.
+        :return: The lock.
+        """
+        session_id = self.session_id if session_id is None else session_id
+        with self._lock:
+            return self._session_locks.setdefault(session_id, threading.Lock())
+
+    def _where(self) -> str:
+        """Build the SQL predicate selecting this session's live records.
+
+        :return: The predicate.
+        """
+        predicate = f"session_id = {_sql_string(self.session_id)}"
+        if self.policy.ttl is not None:
+            cutoff = _sql_timestamp(_utcnow() - self.policy.ttl)
+            predicate += f" AND created_at >= {cutoff}"
+        return predicate
+
+    def _buffer(self) -> deque[Turn]:
+        """Get this session's ring buffer, loading it on first use.
+
+        The session lock must be held.
+
+        :return: The buffered turns, oldest first.
+        """
+        buffer = self._buffers.get(self.session_id)
+        if buffer is None:
+            rows = (
+                self.turns.search()
+                .where(f"session_id = {_sql_string(self.session_id)}")
+                .select(["turn", "text", "created_at"])
+                .limit(None)
+                .to_arrow()
+                .sort_by("turn")
+                .to_pylist()
+            )
+            buffer = self._buffers[self.session_id] = deque(Turn(**row) for row in rows)
+        return buffer
+
+    def append(self, document: str) -> None:
+        """Remember a turn, compacting the oldest turns if the buffer overflows.
+
+        :param document: The turn's text, e.g. a QueryBot answer.
+        """
+        with self._session_lock():
+            buffer = self._buffer()
+            turn = Turn(buffer[-1].turn + 1 if buffer else 0, document, _utcnow())
+            self.turns.add([{"session_id": self.session_id, **turn._asdict()}])
+            buffer.append(turn)
+            old = self._claim_compaction(buffer)
+        if old:
+            self._compact(buffer, old)
+
+    def extend(self, documents: Iterable[str]) -> None:
+        """Remember several turns.
+
+        :param documents: The turns' texts, oldest first.
+        """
+        for document in documents:
+            self.append(document)
+
+    def _claim_compaction(self, buffer: deque[Turn]) -> list[Turn]:
+        """Pick the turns to summarize next; the session lock must be held.
+
+        :param buffer: This session's ring buffer.
+        :return: Its oldest `summarize_every` turns, or none if it fits
+            or another thread is already compacting this session.
+        """
+        if (
+            len(buffer) <= self.policy.recent_turns
+            or self.session_id in self._compacting
+        ):
+            return []
+        self._compacting.add(self.session_id)
+        return list(islice(buffer, self.policy.summarize_every))
+
+    def _compact(self, buffer: deque[Turn], old: list[Turn]) -> None:
+        """Replace the oldest buffered turns by summaries, until the buffer fits.
+
+        Turns are summarized without holding the session lock,
+        so they stay readable, and appendable to, meanwhile.
+
+        :param buffer: This session's ring buffer.
+        :param old: Turns claimed by `_claim_compaction`.
+        """
+        while old:
+            try:
+                summary = self.summarizer([turn.text for turn in old])
+            except BaseException:
+                self._compacting.discard(self.session_id)
+                raise
+            with self._session_lock():
+                # Unless forgotten, reset or expired meanwhile.
+                current = self._buffers.get(self.session_id)
+                if current is buffer and buffer and buffer[0] is old[0]:
+                    self._store_summary(buffer, old, summary)
+                self._compacting.discard(self.session_id)
+                old = self._claim_compaction(buffer)
+        self.evict_expired()
+
+    def _store_summary(self, buffer: deque[Turn], old: list[Turn], text: str) -> None:
+        """Swap summarized turns for their summary; the session lock must be held.
+
+        :param buffer: This session's ring buffer, starting with `old`.
+        :param old: The summarized turns.
+        :param text: Their summary.
+        """
+        for _ in old:
+            buffer.popleft()
+        session = _sql_string(self.session_id)
+        self.summaries.add(
+            [
+                {
+                    "text": text,
+                    "session_id": self.session_id,
+                    "created_at": old[-1].created_at,
+                    "turns": len(old),
+                }
+            ]
+        )
+        self.turns.delete(f"session_id = {session} AND turn <= {old[-1].turn}")
+        if self.policy.max_summaries is not None:
+            created = (
+                self.summaries.search()
+                .where(f"session_id = {session}")
+                .select(["created_at"])
+                .limit(None)
+                .to_arrow()["created_at"]
+                .to_pylist()
+            )
+            if len(created) > self.policy.max_summaries:
+                keep_from = sorted(created)[-self.policy.max_summaries]
+                self.summaries.delete(
+                    f"session_id = {session} "
+                    f"AND created_at < {_sql_timestamp(keep_from)}"
+                )
+
+    def evict_expired(self) -> None:
+        """Delete every session's turns and summaries older than the TTL."""
+        if self.policy.ttl is None:
+            return
+        cutoff = _utcnow() - self.policy.ttl
+        for table in (self.turns, self.summaries):
+            table.delete(f"created_at < {_sql_timestamp(cutoff)}")
+        for session_id, buffer in list(self._buffers.items()):
+            with self._session_lock(session_id):
+                while buffer and buffer[0].created_at < cutoff:
+                    buffer.popleft()
+
+    def retrieve(
+        self,
+        query: str,
+        n_results: int = 10,
+        query_vector: Optional[Sequence[float]] = None,
+    ) -> list[str]:
+        """Recall the session's recent turns and the summaries closest to a query.
+
+        :param query: The query.
+        :param n_results: Maximum number of records to return;
+            buffered turns come first, summaries fill the rest.
+        :param query_vector: The query's embedding, if already computed.
+        :return: Summaries, most relevant first,
+            then buffered turns, oldest first.
+        """
+        with self._session_lock():
+            buffer = list(self._buffer())
+        if self.policy.ttl is not None:
+            cutoff = _utcnow() - self.policy.ttl
+            buffer = [turn for turn in buffer if turn.created_at >= cutoff]
+        turns = [turn.text for turn in buffer[-n_results:]] if n_results > 0 else []
+        summaries = []
+        if n_results > len(turns):
+            search = self.summaries.search(
+                query if query_vector is None else query_vector, query_type="vector"
+            )
+            search = search.where(self._where(), prefilter=True)
+            rows = search.limit(n_results - len(turns)).select(["text", "_distance"])
+            summaries = rows.to_arrow()["text"].to_pylist()
+        return summaries + turns
+
+    def forget(self) -> None:
+        """Delete this session's turns and summaries."""
+        session = _sql_string(self.session_id)
+        with self._session_lock():
+            self.turns.delete(f"session_id = {session}")
+            self.summaries.delete(f"session_id = {session}")
+            self._buffers.pop(self.session_id, None)
+
+    def reset(self) -> None:
+        """Delete the memory of every session."""
+        with self._lock:
+            locks = list(self._session_locks.values())
+        with ExitStack() as stack:
+            for lock in locks:
+                stack.enter_context(lock)
+            for suffix in ("turns", "summaries"):
+                self.db.drop_table(f"{self.table_name}-{suffix}")
+            self._open_tables()
+            self._buffers.clear()
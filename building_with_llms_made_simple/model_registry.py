@@ -0,0 +1,179 @@
+"""Load each tokenizer and embedding model once per process, and share it.
+
+Every chunker built by `chunking` used to load its tokenizer by name,
+and LanceDB's sentence-transformers embedding function caches only the
+latest instance's model, so a knowledge store and a memory store
+evict (and reload) each other's copy of the same weights.
+Here models are loaded on first use, keyed by name and settings,
+and every chunker, docstore and embedding function asks for the shared copy.
+
+For multi-process work, load the models first (`warm_up`), then start the
+workers with `shared_process_pool`: forked workers inherit the loaded models,
+whose weights stay shared with the parent, copy-on-write,
+instead of each worker loading its own copy.
+Fork before opening LanceDB tables or starting threads in the parent;
+a forked child only gets the thread that forked it,
+and LanceDB warns that it may deadlock.
+"""
+
+import gc
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Hashable, Optional, Sequence
+
+_models: dict[Hashable, Any] = {}
+_loading: dict[Hashable, threading.Lock] = {}
+_lock = threading.Lock()
+
+
+def _shared(key: Hashable, load: Callable[[], Any]) -> Any:
+    """Return the model registered under `key`, loading it on first use.
+
+    Concurrent first uses of one key load it once;
+    different keys load in parallel.
+
+    :param key: Identifies the model and its settings.
+    :param load: Loads the model.
+    :return: The shared model.
+    """
+    with _lock:
+        if key in _models:
+            return _models[key]
+        key_lock = _loading.setdefault(key, threading.Lock())
+    with key_lock:
+        if key not in _models:
+            model = load()
+            with _lock:
+                _models[key] = model
+        return _models[key]
+
+
+def _load_tokenizer(name: str) -> Any:
+    """Load a tokenizer.
+
+    :param name: Tokenizer identifier understood by chonkie.
+    :return: A `chonkie.tokenizer.Tokenizer`.
+    """
+    from chonkie.tokenizer import Tokenizer
+
+    return Tokenizer(name)
+
+
+def get_tokenizer(name: str = "gpt2") -> Any:
+    """Get the process-wide tokenizer called `name`.
+
+    Chunkers take its backend, `get_tokenizer(name).tokenizer`,
+    so that they count tokens with the shared copy.
+
+    :param name: Tokenizer identifier understood by chonkie, e.g. "gpt2" or "word".
+    :return: A `chonkie.tokenizer.Tokenizer`.
+    """
+    return _shared(("tokenizer", name), lambda: _load_tokenizer(name))
+
+
+def _load_sentence_transformer(name: str, device: str, trust_remote_code: bool) -> Any:
+    """Load a sentence-transformers model.
+
+    :param name: Model name or path.
+    :param device: Device to load the model on.
+    :param trust_remote_code: Whether to run code shipped with the model.
+    :return: A `sentence_transformers.SentenceTransformer`.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(name, device=device, trust_remote_code=trust_remote_code)
+
+
+def get_sentence_transformer(
+    name: str = "minishlab/potion-base-8M",
+    device: str = "cpu",
+    trust_remote_code: bool = True,
+) -> Any:
+    """Get the process-wide sentence-transformers model with these settings.
+
+    :param name: Model name or path.
+    :param device: Device to load the model on.
+    :param trust_remote_code: Whether to run code shipped with the model.
+    :return: A `sentence_transformers.SentenceTransformer`.
+    """
+    return _shared(
+        ("sentence-transformers", name, device, trust_remote_code),
+        lambda: _load_sentence_transformer(name, device, trust_remote_code),
+    )
+
+
+def loaded_models() -> list[Hashable]:
+    """List the models loaded in this process.
+
+    :return: Their registry keys, in loading order.
+    """
+    with _lock:
+        return list(_models)
+
+
+def clear_models() -> None:
+    """Forget every loaded model, e.g. to free memory or in tests."""
+    with _lock:
+        _models.clear()
+        _loading.clear()
+
+
+def warm_up(
+    tokenizers: Sequence[str] = ("gpt2",),
+    embedding_models: Sequence[str] = (),
+    device: str = "cpu",
+) -> None:
+    """Load models ahead of use, e.g. before forking workers.
+
+    :param tokenizers: Tokenizer identifiers understood by chonkie.
+    :param embedding_models: sentence-transformers model names or paths.
+    :param device: Device to load the embedding models on.
+    """
+    for name in tokenizers:
+        get_tokenizer(name)
+    for name in embedding_models:
+        # Encode once, so that lazily initialised state exists before a fork.
+        get_sentence_transformer(name, device).encode(["warm up"])
+
+
+def shared_process_pool(
+    max_workers: Optional[int] = None,
+    initializer: Optional[Callable] = None,
+    initargs: tuple = (),
+    start_method: str = "fork",
+) -> ProcessPoolExecutor:
+    """Start worker processes that share this process's loaded models.
+
+    With fork, every worker is forked before this returns,
+    with the garbage collector's view of existing objects frozen
+    (`gc.freeze`) meanwhile, so that collections in the workers do not
+    write to, and so copy, the pages holding the shared models.
+    Call it before opening LanceDB tables: a process forked from one that
+    uses LanceDB may deadlock.
+    Other start methods (and platforms without fork, which get spawn)
+    give workers that load their own copies.
+
+    :param max_workers: Number of worker processes; defaults to the CPU count.
+    :param initializer: Called in each worker on start-up.
+    :param initargs: Arguments for `initializer`.
+    :param start_method: A `multiprocessing` start method.
+    :return: The pool.
+    """
+    if start_method not in multiprocessing.get_all_start_methods():
+        start_method = "spawn"
+    executor = ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context(start_method),
+        initializer=initializer,
+        initargs=initargs,
+    )
+    if start_method == "fork":
+        gc.collect()
+        gc.freeze()
+        try:
+            # The first task forks every worker at once.
+            executor.submit(int).result()
+        finally:
+            gc.unfreeze()
+    return executor
@@ -0,0 +1,82 @@
+"""Pydantic models used throughout the tutorial.
+
+These are the structured-output schemas from the notebooks
+(`02_structured_bot.py` and `04_evals.py`),
+collected here so that they can be reused by the CLI, benchmarks and tests.
+"""
+
+import json
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class Person(BaseModel):
+    """A model representing a person with basic attributes.
+
+    :param name: The person's full name
+    :param age: The person's age in years
+    :param occupation: The person's current job or profession
+    """
+
+    name: str = Field(description="Their name. Any ethnicity is okay.")
+    age: int = Field(description="Their age in years.")
+    occupation: str = Field(description="Their current job description.")
+
+    def _mime_(self) -> tuple[str, str]:
+        """Return a MIME type and JSON representation of the person.
+
+        :return: A tuple containing the MIME type and JSON string
+        """
+        return ("application/json", json.dumps(self.model_dump()))
+
+
+class Tutorial(BaseModel):
+    """A model representing a tutorial session with attendees.
+
+    :param attendees: List of Person objects attending the tutorial
+    """
+
+    attendees: list[Person]
+
+    def _mime_(self) -> tuple[str, str]:
+        """Return a MIME type and JSON representation of the tutorial.
+
+        :return: A tuple containing the MIME type and JSON string
+        """
+        return ("application/json", json.dumps(self.model_dump()))
+
+
+class DocstringBreakdown(BaseModel):
+    """Model for breaking down a function into its components."""
+
+    function_name: str = Field(description="The name of the function")
+    function_signature: str = Field(
+        description="The complete function signature including parameters and types. Excludes the content of the docstring."  # noqa: E501
+    )
+    docstring: str = Field(
+        description="A docstring for this function. This is the stuff between the triple quotes."  # noqa: E501
+    )
+
+
+class DocstringEvaluation(BaseModel):
+    """Model for storing docstring evaluation criteria focused on presence and style."""
+
+    has_docstring: Optional[bool] = Field(
+        description="Does the function have a docstring present?", default=None
+    )
+    is_sphinx_style: Optional[bool] = Field(
+        description="Is the docstring written in Sphinx-style format?", default=None
+    )
+
+    def overall_quality(self) -> Optional[str]:
+        """Determine overall quality based on individual criteria.
+
+        :return: "good" if both criteria hold, "bad" otherwise,
+            or None if any criterion has not been rated yet.
+        """
+        if any(score is None for score in [self.has_docstring, self.is_sphinx_style]):
+            return None
+
+        # Good if both criteria are true
+        return "good" if self.has_docstring and self.is_sphinx_style else "bad"
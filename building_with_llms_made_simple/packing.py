@@ -0,0 +1,274 @@
+"""Pack retrieved chunks into a token budget before they reach the prompt.
+
+`TokenChunker(chunk_size=128, chunk_overlap=8)` and `SentenceChunker`
+make chunks that share text with their neighbours, and a question often
+retrieves several neighbours, so the prompt repeats text (and citation
+lines) that the model has to read before its first token.
+`ContextPacker` shrinks the retrieved context in three steps:
+
+1. chunks of the same document whose text overlaps (one ends with the
+   other's start, or contains it) are merged into one chunk;
+2. chunks whose word shingles are near-identical to a better-ranked chunk
+   are dropped;
+3. the remaining chunks, best first, fill a token budget counted by a
+   tokenizer that is loaded once per process, with counts cached per text.
+
+`PackingRetriever` applies it to a docstore's results for a QueryBot
+(see `rag.create_rag_bot(..., context_budget=...)`).
+"""
+
+import functools
+from typing import Any, Optional, Sequence, Union
+
+from .chunking import SectionChunk
+from .docstore import MetadataFilter, as_chunk, cite
+from .model_registry import get_tokenizer
+
+
+@functools.lru_cache(maxsize=16_384)
+def count_tokens(text: str, tokenizer: str = "gpt2") -> int:
+    """Count a text's tokens, remembering the counts of recent texts.
+
+    :param text: The text.
+    :param tokenizer: As for `get_tokenizer`.
+    :return: The number of tokens.
+    """
+    return get_tokenizer(tokenizer).count_tokens(text)
+
+
+def overlap_merge(first: str, second: str, min_overlap: int = 16) -> Optional[str]:
+    """Join two texts if the end of the first is the start of the second.
+
+    :param first: The earlier text.
+    :param second: The later text.
+    :param min_overlap: Fewest shared characters that count as an overlap.
+    :return: The joined text, or None if they do not overlap.
+    """
+    if len(second) < min_overlap or len(first) < min_overlap:
+        return None
+    head = second[:min_overlap]
+    start = first.find(head, max(0, len(first) - len(second)))
+    while start != -1:
+        if second.startswith(first[start:]):
+            return first[:start] + second
+        start = first.find(head, start + 1)
+    return None
+
+
+def _merge_sections(first: Optional[str], second: Optional[str]) -> Optional[str]:
+    """Combine the section numbers of merged chunks, for the citation line.
+
+    :param first: The better-ranked chunk's section number.
+    :param second: The other chunk's section number.
+    :return: Both section numbers, or the one that is known.
+    """
+    if first is None or second is None or first == second:
+        return first or second
+    return f"{first}, {second}"
+
+
+def merge_chunks(
+    first: SectionChunk, second: SectionChunk, min_overlap: int = 16
+) -> Optional[SectionChunk]:
+    """Merge two chunks of the same document whose texts overlap.
+
+    :param first: The better-ranked chunk, whose provenance is kept.
+    :param second: The other chunk.
+    :param min_overlap: As for `overlap_merge`.
+    :return: The merged chunk, or None if the chunks do not overlap
+        or come from different documents.
+    """
+    if first.document_title != second.document_title:
+        return None
+    if second.text in first.text:
+        return first
+    if first.text in second.text:
+        text = second.text
+    else:
+        text = overlap_merge(first.text, second.text, min_overlap)
+        if text is None:
+            text = overlap_merge(second.text, first.text, min_overlap)
+        if text is None:
+            return None
+    return first._replace(
+        text=text,
+        section_number=_merge_sections(first.section_number, second.section_number),
+        section_level=min(first.section_level, second.section_level),
+    )
+
+
+def _shingles(text: str, size: int = 3) -> frozenset:
+    """Collect the word n-grams of a text.
+
+    :param text: The text.
+    :param size: Words per shingle.
+    :return: The shingles; texts shorter than `size` words give one shingle.
+    """
+    words = text.casefold().split()
+    return frozenset(
+        tuple(words[i : i + size]) for i in range(max(1, len(words) - size + 1))
+    )
+
+
+def jaccard(first: frozenset, second: frozenset) -> float:
+    """Measure the overlap of two sets.
+
+    :param first: A set.
+    :param second: Another set.
+    :return: Their Jaccard similarity, 1.0 for two empty sets.
+    """
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
+
+
+class ContextPacker:
+    """Merge, deduplicate and budget retrieved chunks.
+
+    :param budget: Maximum tokens of packed context, citation lines included;
+        None merges and deduplicates without a budget.
+    :param tokenizer: Tokenizer the budget is counted with, as for `get_tokenizer`.
+    :param min_overlap: Fewest shared characters for two chunks to be merged.
+    :param duplicate_threshold: Word-shingle Jaccard similarity
+        above which a chunk is a near-duplicate of a better-ranked one.
+    """
+
+    def __init__(
+        self,
+        budget: Optional[int] = 1536,
+        tokenizer: str = "gpt2",
+        min_overlap: int = 16,
+        duplicate_threshold: float = 0.8,
+    ):
+        self.budget = budget
+        self.tokenizer = tokenizer
+        self.min_overlap = min_overlap
+        self.duplicate_threshold = duplicate_threshold
+
+    def merge(self, chunks: Sequence[SectionChunk]) -> list[SectionChunk]:
+        """Merge overlapping chunks of the same document.
+
+        :param chunks: The chunks, best first.
+        :return: The merged chunks, each at the rank of its best part.
+        """
+        merged: list[SectionChunk] = []
+        for chunk in chunks:
+            position, i = len(merged), 0
+            while i < len(merged):
+                joined = merge_chunks(merged[i], chunk, self.min_overlap)
+                if joined is None:
+                    i += 1
+                    continue
+                # The merged chunk may now overlap chunks kept earlier: rescan.
+                del merged[i]
+                position, chunk, i = min(position, i), joined, 0
+            merged.insert(position, chunk)
+        return merged
+
+    def deduplicate(self, chunks: Sequence[SectionChunk]) -> list[SectionChunk]:
+        """Drop chunks that nearly repeat a better-ranked chunk.
+
+        :param chunks: The chunks, best first.
+        :return: The chunks that add new text.
+        """
+        kept: list[tuple[SectionChunk, frozenset]] = []
+        for chunk in chunks:
+            shingles = _shingles(chunk.text)
+            if all(
+                jaccard(shingles, other) < self.duplicate_threshold for _, other in kept
+            ):
+                kept.append((chunk, shingles))
+        return [chunk for chunk, _ in kept]
+
+    def fit(self, chunks: Sequence[SectionChunk]) -> list[SectionChunk]:
+        """Keep the best chunks that fit the token budget together.
+
+        A chunk that does not fit is skipped, so that smaller,
+        lower-ranked chunks can still use the remaining budget.
+
+        :param chunks: The chunks, best first.
+        :return: The chunks that fit, best first.
+        """
+        if self.budget is None:
+            return list(chunks)
+        fitted, used = [], 0
+        for chunk in chunks:
+            tokens = count_tokens(cite(chunk), self.tokenizer)
+            if used + tokens <= self.budget:
+                fitted.append(chunk)
+                used += tokens
+        return fitted
+
+    def pack(self, chunks: Sequence[Union[str, SectionChunk]]) -> list[SectionChunk]:
+        """Merge, deduplicate and budget chunks.
+
+        :param chunks: Chunk texts or `SectionChunk`s, best first.
+        :return: The packed chunks, best first.
+        """
+        chunks = [as_chunk(chunk) for chunk in chunks]
+        return self.fit(self.deduplicate(self.merge(chunks)))
+
+
+class PackingRetriever:
+    """Retrieve from a docstore and pack the results with a `ContextPacker`.
+
+    Writes are passed through to the wrapped docstore.
+
+    :param store: A `KnowledgeStore`, a retriever wrapping one,
+        or any docstore with a `retrieve(query, n_results)` method.
+    :param packer: The packer.
+    """
+
+    def __init__(self, store: Any, packer: ContextPacker):
+        self.store = store
+        self.packer = packer
+
+    def __getattr__(self, name: str) -> Any:
+        """Delegate everything else to the wrapped store.
+
+        :param name: Attribute name.
+        :return: The store's attribute.
+        """
+        return getattr(self.store, name)
+
+    def retrieve_chunks(
+        self,
+        query: str,
+        n_results: int = 10,
+        where: Union[MetadataFilter, str, None] = None,
+        query_vector: Optional[Sequence[float]] = None,
+    ) -> list[SectionChunk]:
+        """Retrieve chunks and pack them.
+
+        :param query: The question.
+        :param n_results: Number of chunks to retrieve before packing.
+        :param where: Metadata filter, passed to stores that support one.
+        :param query_vector: The question's embedding, if already computed,
+            passed to stores that support one.
+        :return: The packed chunks, most relevant first.
+        """
+        if hasattr(self.store, "retrieve_chunks"):
+            chunks = self.store.retrieve_chunks(
+                query, n_results, where, query_vector=query_vector
+            )
+        else:
+            chunks = self.store.retrieve(query, n_results)
+        return self.packer.pack(chunks)
+
+    def retrieve(
+        self,
+        query: str,
+        n_results: int = 10,
+        where: Union[MetadataFilter, str, None] = None,
+        query_vector: Optional[Sequence[float]] = None,
+    ) -> list[str]:
+        """Retrieve packed chunks ready for a prompt.
+
+        :param query: The question.
+        :param n_results: Number of chunks to retrieve before packing.
+        :param where: Metadata filter, as for `retrieve_chunks`.
+        :param query_vector: The question's embedding, as for `retrieve_chunks`.
+        :return: The chunk texts with citation lines, most relevant first.
+        """
+        chunks = self.retrieve_chunks(query, n_results, where, query_vector)
+        return [cite(chunk) for chunk in chunks]
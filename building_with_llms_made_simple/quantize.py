@@ -0,0 +1,118 @@
+"""Compact embedding codes for `KnowledgeStore`, with full-precision rescoring.
+
+A float32 embedding costs 4 bytes per dimension,
+so a large knowledge base stops fitting in the page cache of a serving node
+and every vector search goes to disk.
+Two quantizations trade a little recall for memory:
+
+- "binary" keeps one bit per dimension (the sign) in a `code` column, 32x
+  smaller than the vectors. Searches scan the codes by Hamming distance,
+  shortlist `rescore_factor` times the requested results, and read the
+  float32 vectors of the shortlist only, to rank it by the exact distance.
+- "int8" keeps one byte per dimension in LanceDB's scalar-quantized
+  IVF-HNSW-SQ index, 4x smaller. LanceDB cannot search an int8 column
+  directly, so the index holds the codes, and `refine_factor` re-ranks
+  its shortlist against the stored vectors.
+
+In both cases the float32 vectors stay in their own column on disk
+and are only read for the shortlisted rows.
+"""
+
+import dataclasses
+from typing import TYPE_CHECKING, Optional, Sequence, Union
+
+import numpy as np
+
+from .ann import ANNConfig, SearchParams
+
+if TYPE_CHECKING:  # pragma: no cover
+    import pyarrow as pa
+
+QUANTIZATIONS = ("int8", "binary")
+
+
+def binary_codes(vectors: Union[Sequence[Sequence[float]], np.ndarray]) -> np.ndarray:
+    """Pack the signs of vectors into bits.
+
+    :param vectors: Vectors of shape (rows, dims).
+    :return: uint8 codes of shape (rows, ceil(dims / 8)).
+    """
+    return np.packbits(np.asarray(vectors) > 0, axis=-1)
+
+
+def code_bytes(ndims: int) -> int:
+    """Size of the binary code of a vector.
+
+    :param ndims: The vector dimension.
+    :return: Bytes per code.
+    """
+    return -(-ndims // 8)
+
+
+def distances(
+    query: Sequence[float], vectors: np.ndarray, distance_type: str = "l2"
+) -> np.ndarray:
+    """Compute exact distances, ordered as LanceDB orders them.
+
+    :param query: The query vector.
+    :param vectors: Candidate vectors of shape (rows, dims).
+    :param distance_type: "l2" (squared, as LanceDB reports it),
+        "cosine" or "dot".
+    :return: One distance per candidate; smaller is closer.
+    :raises ValueError: If the distance type is unknown.
+    """
+    query = np.asarray(query, dtype=np.float32)
+    if distance_type == "l2":
+        return ((vectors - query) ** 2).sum(axis=1)
+    if distance_type == "cosine":
+        norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query)
+        return 1 - (vectors @ query) / np.where(norms == 0, 1, norms)
+    if distance_type == "dot":
+        return 1 - vectors @ query
+    raise ValueError(f"Unknown distance type {distance_type!r}.")
+
+
+def rescore(
+    query: Sequence[float],
+    rows: "pa.Table",
+    limit: int,
+    distance_type: str = "l2",
+    column: str = "vector",
+) -> "pa.Table":
+    """Rank a shortlist by exact distance and keep the best rows.
+
+    :param query: The query vector.
+    :param rows: Shortlisted rows, including the full-precision vectors.
+    :param limit: Number of rows to keep.
+    :param distance_type: As for `distances`.
+    :param column: The vector column, dropped from the result.
+    :return: The best rows, closest first,
+        with `_distance` replaced by the exact distance.
+    """
+    import pyarrow as pa
+
+    if len(rows) == 0:
+        return rows.drop_columns([column])
+    vectors = rows[column].combine_chunks().flatten().to_numpy(zero_copy_only=False)
+    exact = distances(query, vectors.reshape(len(rows), -1), distance_type)
+    order = np.argsort(exact, kind="stable")[:limit]
+    rows = rows.take(order).drop_columns([column])
+    if "_distance" in rows.column_names:
+        rows = rows.drop_columns(["_distance"])
+    return rows.append_column("_distance", pa.array(exact[order], pa.float32()))
+
+
+def int8_settings(
+    ann: Optional[ANNConfig], search_params: SearchParams, rescore_factor: int
+) -> tuple[ANNConfig, SearchParams]:
+    """Adapt vector index settings to keep int8 codes and rescore with floats.
+
+    :param ann: The store's index policy; None means the default policy.
+    :param search_params: The store's query-time settings.
+    :param rescore_factor: Default `refine_factor`, if none is set.
+    :return: The index policy and query-time settings to use.
+    """
+    ann = dataclasses.replace(ann or ANNConfig(), index_type="IVF_HNSW_SQ")
+    if search_params.refine_factor is None:
+        search_params = dataclasses.replace(search_params, refine_factor=rescore_factor)
+    return ann, search_params
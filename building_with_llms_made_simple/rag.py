@@ -0,0 +1,213 @@
+"""Docstore factories and the RAG bot from `notebooks/03_rag.py`."""
+
+import copy
+from typing import Any, Optional, Sequence, Union
+
+import llamabot as lmb
+
+from .cache import ResponseCache, enable_response_cache
+from .docstore import KnowledgeStore
+from .embeddings import CACHED_SENTENCE_TRANSFORMERS, SHARED_SENTENCE_TRANSFORMERS
+from .fanout import FanOutRetriever, enable_concurrent_retrieval
+from .memory import ConversationMemory, MemoryPolicy, Summarizer, extractive_summary
+from .packing import ContextPacker, PackingRetriever
+from .rerank import CrossEncoderReranker, RerankingRetriever
+from .retrieval import HybridRetriever
+from .semantic_cache import SemanticCache, SemanticCachingBot
+
+
+@lmb.prompt("system")
+def rag_bot_sysprompt():
+    """You are a helpful programming language assistant.
+    You will be provided documents to answer questions.
+    Answer questions solely based on the provided documents
+    and not your background knowledge.
+    If you're not sure about something, say so.
+    Keep your responses concise and focused on the question asked.
+    Be concise and to the point!
+    When you respond, ensure that you cite the source of your answer,
+    including section number and original document.
+    """
+
+
+def _embedding_registry(cache_embeddings: bool) -> str:
+    """Pick the LanceDB embedding function for a docstore.
+
+    :param cache_embeddings: Whether to serve embeddings from the on-disk cache.
+    :return: The name of the registered embedding function.
+    """
+    if cache_embeddings:
+        return CACHED_SENTENCE_TRANSFORMERS
+    return SHARED_SENTENCE_TRANSFORMERS
+
+
+def create_knowledge_store(
+    table_name: str = "knowledge_base",
+    reset: bool = True,
+    cache_embeddings: bool = True,
+    quantization: Optional[str] = None,
+    rerank: bool = True,
+) -> KnowledgeStore:
+    """Create and initialize a knowledge store for document storage.
+
+    :param table_name: Name of the LanceDB table backing the store.
+    :param reset: Whether to empty the store before returning it.
+        Pass False to reopen an existing knowledge base.
+    :param cache_embeddings: Whether to look chunks up in the persistent
+        embedding cache before embedding them, so that rebuilding the store
+        from mostly unchanged chunks is cheap.
+        Only applies to newly created (or reset) tables.
+    :param quantization: "int8" or "binary" to search compact codes
+        and rescore with the full vectors, for knowledge bases
+        whose vectors do not fit in memory; see `KnowledgeStore`.
+    :param rerank: Whether `retrieve` reranks results with ColBERT.
+        Pass False when a `RerankingRetriever` reranks them instead.
+    :return: A LanceDB document store configured for storing the knowledge base.
+        By default the store is reset before being returned
+        to ensure a clean state;
+        to update an existing knowledge base in place,
+        pass `reset=False` and call `sync` with the full set of chunks.
+    """
+    knowledge_store = KnowledgeStore(
+        table_name=table_name,
+        embedding_registry=_embedding_registry(cache_embeddings),
+        quantization=quantization,
+        rerank=rerank,
+    )
+    if reset:
+        knowledge_store.reset()
+    return knowledge_store
+
+
+def _without_colbert(store: KnowledgeStore) -> KnowledgeStore:
+    """View a knowledge store without its ColBERT reranking.
+
+    :param store: The knowledge store, which is left unchanged.
+    :return: A store sharing its table whose `retrieve` does not rerank.
+    """
+    if store.reranker is None:
+        return store
+    view = copy.copy(store)
+    view.reranker = None
+    return view
+
+
+def create_memory_store(
+    table_name: str = "memory",
+    reset: bool = True,
+    cache_embeddings: bool = True,
+    policy: Optional[MemoryPolicy] = None,
+    summarizer: Summarizer = extractive_summary,
+) -> Union[lmb.LanceDBDocStore, ConversationMemory]:
+    """Create and initialize a memory store for conversation history.
+
+    :param table_name: Name of the LanceDB table backing the store.
+    :param reset: Whether to empty the store before returning it.
+    :param cache_embeddings: Whether to use the persistent embedding cache.
+    :param policy: If given, return a bounded `ConversationMemory`
+        that keeps recent turns verbatim and compacts older ones into summaries,
+        so long chats do not slow down; see `memory`.
+    :param summarizer: How a `ConversationMemory` compacts old turns,
+        e.g. `memory.llm_summarizer()`.
+    :return: A LanceDB document store configured for storing conversation memory.
+        By default the store is reset before being returned
+        to ensure a clean state.
+    """
+    if policy is not None:
+        memory_store = ConversationMemory(
+            table_name=table_name,
+            embedding_registry=_embedding_registry(cache_embeddings),
+            policy=policy,
+            summarizer=summarizer,
+        )
+    else:
+        memory_store = lmb.LanceDBDocStore(
+            table_name=table_name,
+            embedding_registry=_embedding_registry(cache_embeddings),
+        )
+    if reset:
+        memory_store.reset()
+    return memory_store
+
+
+def create_rag_bot(
+    knowledge_store: Union[KnowledgeStore, Any, Sequence[Any]],
+    memory_store: Union[lmb.LanceDBDocStore, ConversationMemory],
+    model_name: str = "ollama_chat/phi4",
+    response_cache: Optional[ResponseCache] = None,
+    hybrid: bool = False,
+    reranker: Optional[CrossEncoderReranker] = None,
+    rerank_candidates: int = 50,
+    semantic_cache: Optional[SemanticCache] = None,
+    concurrent_retrieval: bool = False,
+    context_budget: Optional[int] = None,
+    **kwargs,
+) -> Union[lmb.QueryBot, SemanticCachingBot]:
+    """Create a RAG bot configured with knowledge and memory stores.
+
+    :param knowledge_store: The document store containing the knowledge base
+        for answering questions (a `KnowledgeStore` or a retriever wrapping one),
+        or a list or tuple of several (e.g. one per chunking strategy),
+        searched concurrently with their rankings merged by `FanOutRetriever`.
+    :param memory_store: The document store for maintaining conversation history.
+    :param model_name: The LiteLLM model string to generate answers with.
+    :param response_cache: If given, identical questions over identical
+        retrieved context are answered from this on-disk cache.
+    :param hybrid: Retrieve knowledge by fusing full-text (BM25) and vector
+        search, which ranks keyword-heavy questions better.
+        For custom fusion weights, pass a `retrieval.HybridRetriever`
+        as the knowledge store instead.
+    :param reranker: If given, retrieve `rerank_candidates` chunks
+        and keep the ones this cross-encoder scores best,
+        so fewer chunks need to be sent to the model.
+        It replaces the knowledge stores' own ColBERT reranking.
+    :param rerank_candidates: Chunks retrieved per question before reranking.
+    :param semantic_cache: If given, questions similar enough to one already
+        answered from the same knowledge store version are answered from
+        this cache, with the chunks the cached answer was generated from,
+        before any retrieval.
+    :param concurrent_retrieval: Search the knowledge and memory stores
+        concurrently, sharing the question's embedding where they can.
+    :param context_budget: If given, merge overlapping retrieved chunks,
+        drop near-duplicates and keep the best that fit this many tokens.
+    :param kwargs: Extra keyword arguments passed through to `QueryBot`,
+        e.g. `api_base` or `stream_target`.
+    :return: A configured RAG bot that can answer questions based on the provided
+        knowledge store and maintain conversation context using the memory store.
+    """
+    stores = (
+        list(knowledge_store)
+        if isinstance(knowledge_store, (list, tuple))
+        else [knowledge_store]
+    )
+    if reranker is not None:
+        stores = [
+            _without_colbert(store) if isinstance(store, KnowledgeStore) else store
+            for store in stores
+        ]
+    if hybrid:
+        stores = [HybridRetriever(store) for store in stores]
+    knowledge_store = stores[0] if len(stores) == 1 else FanOutRetriever(stores)
+    if reranker is not None:
+        knowledge_store = RerankingRetriever(
+            knowledge_store, reranker, rerank_candidates
+        )
+    if context_budget is not None:
+        knowledge_store = PackingRetriever(
+            knowledge_store, ContextPacker(context_budget)
+        )
+    bot = lmb.QueryBot(
+        system_prompt=rag_bot_sysprompt(),
+        docstore=knowledge_store,
+        memory=memory_store,
+        model_name=model_name,
+        temperature=0.0,  # Keep responses deterministic
+        **kwargs,
+    )
+    if response_cache is not None:
+        enable_response_cache(bot, response_cache)
+    if concurrent_retrieval:
+        enable_concurrent_retrieval(bot)
+    if semantic_cache is not None:
+        return SemanticCachingBot(bot, semantic_cache)
+    return bot
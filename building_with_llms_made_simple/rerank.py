@@ -0,0 +1,238 @@
+"""A cross-encoder rerank stage between retrieval and prompt assembly.
+
+Bi-encoder retrieval is cheap but coarse, so RAG pipelines tend to send many
+chunks to the LLM to be safe, and prompt length drives phi4's latency.
+`RerankingRetriever` instead over-fetches candidates from a docstore,
+scores every (question, chunk) pair with a cross-encoder
+in one batched CPU forward pass, and keeps only the best `n_results`.
+
+Scores are memoised in a `ScoreCache` keyed by the model, the question
+and the chunk's content hash, so a repeated question costs no model calls
+and a question over a partly changed knowledge base only scores new chunks.
+"""
+
+import hashlib
+import struct
+from pathlib import Path
+from typing import Any, Callable, Optional, Sequence, Union
+
+from .cache import DEFAULT_CACHE_DIR, DiskLRUCache
+from .chunking import SectionChunk
+from .docstore import MetadataFilter, as_chunk, chunk_hash, cite
+
+# Scores (question, chunk) text pairs; higher is more relevant.
+Scorer = Callable[[list[tuple[str, str]]], Sequence[float]]
+
+
+class ScoreCache(DiskLRUCache):
+    """A `DiskLRUCache` of cross-encoder relevance scores.
+
+    :param path: Database file.
+    :param max_bytes: Upper bound on the total size of stored scores.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path] = DEFAULT_CACHE_DIR / "rerank.sqlite",
+        max_bytes: int = 64 * 2**20,
+    ):
+        super().__init__(path, max_bytes)
+
+    @staticmethod
+    def key(model: str, query: str, chunk_id: str) -> str:
+        """Build the cache key for a scored pair.
+
+        :param model: The cross-encoder.
+        :param query: The question.
+        :param chunk_id: The chunk's content hash.
+        :return: A hex digest.
+        """
+        return hashlib.sha256(f"{model}\0{query}\0{chunk_id}".encode()).hexdigest()
+
+    def get_scores(
+        self, model: str, query: str, chunk_ids: Sequence[str]
+    ) -> dict[str, float]:
+        """Look up the cached scores of several chunks for a question.
+
+        :param model: The cross-encoder.
+        :param query: The question.
+        :param chunk_ids: The chunks' content hashes.
+        :return: Scores of the chunks that were cached, by chunk id.
+        """
+        keys = {self.key(model, query, chunk_id): chunk_id for chunk_id in chunk_ids}
+        found = self.get_many(list(keys))
+        return {
+            keys[key]: struct.unpack("<d", value)[0] for key, value in found.items()
+        }
+
+    def set_scores(self, model: str, query: str, scores: dict[str, float]) -> None:
+        """Store scores.
+
+        :param model: The cross-encoder.
+        :param query: The question.
+        :param scores: Scores by chunk id.
+        """
+        self.set_many(
+            {
+                self.key(model, query, chunk_id): struct.pack("<d", score)
+                for chunk_id, score in scores.items()
+            }
+        )
+
+
+class CrossEncoderReranker:
+    """Rerank chunks with a sentence-transformers cross-encoder on CPU.
+
+    :param model_name: Hugging Face cross-encoder to load.
+    :param batch_size: Pairs per forward pass; defaults to scoring
+        all uncached candidates in a single pass.
+    :param max_length: Token limit per (question, chunk) pair.
+    :param cache: Score cache; None disables caching.
+    :param scorer: Scores text pairs instead of the loaded model, e.g. in tests.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        batch_size: Optional[int] = None,
+        max_length: int = 512,
+        cache: Optional[ScoreCache] = None,
+        scorer: Optional[Scorer] = None,
+    ):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.cache = cache
+        self._scorer = scorer
+
+    @property
+    def scorer(self) -> Scorer:
+        """The pair scorer, loading the cross-encoder on first use.
+
+        :return: A function scoring text pairs.
+        """
+        if self._scorer is None:
+            from sentence_transformers import CrossEncoder
+
+            model = CrossEncoder(
+                self.model_name, max_length=self.max_length, device="cpu"
+            )
+
+            def predict(pairs: list[tuple[str, str]]) -> Sequence[float]:
+                """Score pairs in as few forward passes as `batch_size` allows.
+
+                :param pairs: (question, chunk) pairs.
+                :return: One relevance score per pair.
+                """
+                batch_size = self.batch_size or len(pairs)
+                return model.predict(pairs, batch_size=batch_size).tolist()
+
+            self._scorer = predict
+        return self._scorer
+
+    def score(self, query: str, chunks: Sequence[SectionChunk]) -> list[float]:
+        """Score chunks for a question, running the model only on uncached pairs.
+
+        :param query: The question.
+        :param chunks: The candidate chunks.
+        :return: One score per chunk, higher is more relevant.
+        """
+        ids = [chunk_hash(chunk) for chunk in chunks]
+        scores = {}
+        if self.cache is not None:
+            scores = self.cache.get_scores(self.model_name, query, ids)
+        missing = {i: chunk.text for i, chunk in zip(ids, chunks) if i not in scores}
+        if missing:
+            computed = self.scorer([(query, text) for text in missing.values()])
+            new = {i: float(score) for i, score in zip(missing, computed)}
+            if self.cache is not None:
+                self.cache.set_scores(self.model_name, query, new)
+            scores.update(new)
+        return [scores[i] for i in ids]
+
+    def rerank(
+        self, query: str, chunks: Sequence[SectionChunk], top_k: int
+    ) -> list[SectionChunk]:
+        """Keep the chunks most relevant to a question.
+
+        :param query: The question.
+        :param chunks: The candidate chunks.
+        :param top_k: Number of chunks to keep.
+        :return: The best chunks, most relevant first.
+        """
+        scores = self.score(query, chunks)
+        order = sorted(range(len(chunks)), key=lambda i: scores[i], reverse=True)
+        return [chunks[i] for i in order[:top_k]]
+
+
+class RerankingRetriever:
+    """Over-fetch from a docstore and keep the candidates a reranker prefers.
+
+    Writes are passed through to the wrapped docstore.
+
+    :param store: A `KnowledgeStore`, `HybridRetriever`,
+        or any docstore with a `retrieve(query, n_results)` method.
+        Disable a `KnowledgeStore`'s own ColBERT reranking (`rerank=False`),
+        which this stage replaces.
+    :param reranker: The reranker.
+    :param candidates: Chunks fetched from the store per question;
+        at least `n_results` are always fetched.
+    """
+
+    def __init__(
+        self, store: Any, reranker: CrossEncoderReranker, candidates: int = 50
+    ):
+        self.store = store
+        self.reranker = reranker
+        self.candidates = candidates
+
+    def __getattr__(self, name: str) -> Any:
+        """Delegate everything else to the wrapped store.
+
+        :param name: Attribute name.
+        :return: The store's attribute.
+        """
+        return getattr(self.store, name)
+
+    def retrieve_chunks(
+        self,
+        query: str,
+        n_results: int = 10,
+        where: Union[MetadataFilter, str, None] = None,
+        query_vector: Optional[Sequence[float]] = None,
+    ) -> list[SectionChunk]:
+        """Retrieve candidates and keep the best `n_results` by reranker score.
+
+        :param query: The question.
+        :param n_results: Number of chunks to return.
+        :param where: Metadata filter, passed to stores that support one.
+        :param query_vector: The question's embedding, if already computed,
+            passed to stores that support one.
+        :return: The chunks, most relevant first.
+        """
+        limit = max(self.candidates, n_results)
+        if hasattr(self.store, "retrieve_chunks"):
+            candidates = self.store.retrieve_chunks(
+                query, limit, where, query_vector=query_vector
+            )
+        else:
+            candidates = [as_chunk(text) for text in self.store.retrieve(query, limit)]
+        return self.reranker.rerank(query, candidates, n_results)
+
+    def retrieve(
+        self,
+        query: str,
+        n_results: int = 10,
+        where: Union[MetadataFilter, str, None] = None,
+        query_vector: Optional[Sequence[float]] = None,
+    ) -> list[str]:
+        """Retrieve reranked chunks ready for a prompt.
+
+        :param query: The question.
+        :param n_results: Number of chunks to return.
+        :param where: Metadata filter, as for `retrieve_chunks`.
+        :param query_vector: The question's embedding, as for `retrieve_chunks`.
+        :return: The chunk texts with citation lines, most relevant first.
+        """
+        chunks = self.retrieve_chunks(query, n_results, where, query_vector)
+        return [cite(chunk) for chunk in chunks]
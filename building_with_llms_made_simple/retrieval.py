@@ -0,0 +1,178 @@
+"""Hybrid keyword + vector retrieval over a `KnowledgeStore`.
+
+SOP questions such as "What are the roles of the personnel involved in
+quality monitoring?" are full of exact keywords that embeddings rank poorly,
+which tempts callers to over-fetch `n_results` and bloat the prompt.
+`HybridRetriever` runs the table's BM25 full-text search and its vector search
+separately, each with the same metadata prefilter,
+and fuses the two rankings by weighted reciprocal rank fusion (RRF):
+
+    score(chunk) = sum over rankings of weight / (rrf_k + rank)
+
+RRF needs no score calibration between BM25 and vector distances,
+and `rrf_k` damps the influence of any single ranking's top positions.
+The retriever has the docstore interface, so it can be given to a QueryBot
+(see `rag.create_rag_bot(..., hybrid=True)`).
+"""
+
+from typing import Any, Hashable, Optional, Sequence, TypeVar, Union
+
+from .chunking import SectionChunk
+from .docstore import (
+    PROVENANCE_COLUMNS,
+    KnowledgeStore,
+    MetadataFilter,
+    chunk_from_row,
+    cite,
+)
+
+K = TypeVar("K", bound=Hashable)
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[K]],
+    weights: Optional[Sequence[float]] = None,
+    rrf_k: float = 60.0,
+) -> list[tuple[K, float]]:
+    """Fuse several rankings of the same kind of items.
+
+    :param rankings: Item keys, best first, one sequence per ranking.
+    :param weights: One weight per ranking; defaults to equal weights.
+    :param rrf_k: Rank offset; larger values flatten the contribution of ranks.
+    :return: `(key, score)` pairs, best first; ties keep first-seen order.
+    """
+    weights = weights if weights is not None else [1.0] * len(rankings)
+    scores: dict[K, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + weight / (rrf_k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class HybridRetriever:
+    """Retrieve from a `KnowledgeStore` by fusing full-text and vector search.
+
+    Writes (`extend`, `sync`, `reset`, ...) are passed through to the store.
+
+    :param store: The store to search; needs its full-text index
+        (`auto_create_fts_index=True`) for the keyword ranking,
+        and falls back to vector search alone without one.
+    :param vector_weight: RRF weight of the vector ranking.
+    :param text_weight: RRF weight of the full-text ranking.
+    :param rrf_k: RRF rank offset.
+    :param candidates: Chunks fetched from each ranking before fusion;
+        at least `n_results` are always fetched.
+    """
+
+    def __init__(
+        self,
+        store: KnowledgeStore,
+        vector_weight: float = 1.0,
+        text_weight: float = 1.0,
+        rrf_k: float = 60.0,
+        candidates: int = 50,
+    ):
+        self.store = store
+        self.vector_weight = vector_weight
+        self.text_weight = text_weight
+        self.rrf_k = rrf_k
+        self.candidates = candidates
+
+    def __getattr__(self, name: str) -> Any:
+        """Delegate everything else to the wrapped store.
+
+        :param name: Attribute name.
+        :return: The store's attribute.
+        """
+        return getattr(self.store, name)
+
+    def _has_fts_index(self) -> bool:
+        """Check whether the store's table has a full-text index.
+
+        :return: Whether keyword search is available.
+        """
+        return any(
+            index.index_type == "FTS" for index in self.store.table.list_indices()
+        )
+
+    def _ranking(
+        self,
+        query: str,
+        query_type: str,
+        limit: int,
+        where: Optional[str],
+        query_vector: Optional[Sequence[float]] = None,
+    ) -> list[dict]:
+        """Run one search and return its rows, best first.
+
+        :param query: The query.
+        :param query_type: "vector" or "fts".
+        :param limit: Number of rows to fetch.
+        :param where: SQL prefilter, or None.
+        :param query_vector: The query's embedding for vector search, if computed.
+        :return: Rows with the content hash, document and provenance columns.
+        """
+        columns = ["content_hash", "document", *PROVENANCE_COLUMNS]
+        if query_type == "vector":
+            rows = self.store.vector_rows(
+                query, limit, where, columns, query_vector=query_vector
+            )
+            return rows.to_pylist()
+        search = self.store.table.search(query, query_type=query_type)
+        if where is not None:
+            search = search.where(where, prefilter=True)
+        # Ask for the score column explicitly; LanceDB warns when it is implied.
+        rows = search.limit(limit).select([*columns, "_score"]).to_arrow()
+        return rows.to_pylist()
+
+    def retrieve_chunks(
+        self,
+        query: str,
+        n_results: int = 10,
+        where: Union[MetadataFilter, str, None] = None,
+        query_vector: Optional[Sequence[float]] = None,
+    ) -> list[SectionChunk]:
+        """Retrieve the chunks ranked best by fused keyword and vector search.
+
+        :param query: The query.
+        :param n_results: Number of chunks to return.
+        :param where: Metadata filter, applied to both searches before ranking;
+            defaults to the store's `filtered` scope.
+        :param query_vector: The query's embedding, if already computed.
+        :return: The chunks, best first.
+        """
+        if where is None:
+            where = self.store.default_filter
+        predicate = where.to_sql() if isinstance(where, MetadataFilter) else where
+        limit = max(self.candidates, n_results)
+        rankings = [self._ranking(query, "vector", limit, predicate, query_vector)]
+        weights = [self.vector_weight]
+        if self.text_weight and query.strip() and self._has_fts_index():
+            rankings.append(self._ranking(query, "fts", limit, predicate))
+            weights.append(self.text_weight)
+
+        rows = {row["content_hash"]: row for ranking in rankings for row in ranking}
+        fused = reciprocal_rank_fusion(
+            [[row["content_hash"] for row in ranking] for ranking in rankings],
+            weights,
+            self.rrf_k,
+        )
+        return [chunk_from_row(rows[key]) for key, _ in fused[:n_results]]
+
+    def retrieve(
+        self,
+        query: str,
+        n_results: int = 10,
+        where: Union[MetadataFilter, str, None] = None,
+        query_vector: Optional[Sequence[float]] = None,
+    ) -> list[str]:
+        """Retrieve chunks ready for a prompt, as `KnowledgeStore.retrieve` does.
+
+        :param query: The query.
+        :param n_results: Number of chunks to return.
+        :param where: Metadata filter, as for `retrieve_chunks`.
+        :param query_vector: The query's embedding, if already computed.
+        :return: The chunk texts with citation lines, best first.
+        """
+        chunks = self.retrieve_chunks(query, n_results, where, query_vector)
+        return [cite(chunk) for chunk in chunks]
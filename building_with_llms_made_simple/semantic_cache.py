@@ -0,0 +1,379 @@
+"""A semantic cache of RAG answers for near-duplicate questions.
+
+`cache.ResponseCache` only helps when the final prompt is byte-for-byte
+identical, and by the time the prompt is known retrieval has already run.
+Users rarely repeat themselves exactly:
+"How is Zenthing used in Data science?" and
+"How is Zenthing used for data science" deserve the same answer.
+`SemanticCachingBot` wraps a QueryBot and looks each question up in a
+`SemanticCache` before retrieval: if a previously answered question is at
+least `threshold` cosine-similar, its answer and source chunks are returned
+and neither retrieval nor generation runs.
+
+Entries are scoped by the model, system prompt, `n_results`
+and the retrieval setup (the knowledge store's table and default filter,
+and the settings of any hybrid, reranking or packing retrievers around it),
+and tagged with the store's version (`KnowledgeStore.version`,
+the LanceDB table version, which changes with every write),
+so any `extend`, `sync` or `reset` of the knowledge base
+invalidates earlier answers automatically.
+Answers do not depend on the conversation so far;
+bots whose answers should follow earlier turns are better served uncached.
+"""
+
+import dataclasses
+import hashlib
+import json
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, NamedTuple, Optional, Union
+
+import slugify
+from llamabot.components.messages import AIMessage, BaseMessage
+
+from .docstore import _sql_string, _sql_timestamp, _where_sql
+from .embeddings import CACHED_SENTENCE_TRANSFORMERS
+
+
+def normalize_question(question: str) -> str:
+    """Canonicalise a question's case, whitespace and final punctuation.
+
+    :param question: The question.
+    :return: The normalised question, which is what gets embedded.
+    """
+    return " ".join(question.casefold().split()).rstrip("?!. ")
+
+
+def store_version(store: Any) -> Optional[str]:
+    """Read the version of a docstore's contents.
+
+    :param store: A `KnowledgeStore`, a retriever wrapping one,
+        or a `LanceDBDocStore`.
+    :return: A string that changes whenever the contents do,
+        or None if the store does not expose one.
+    """
+    version = getattr(store, "version", None)
+    if version is None and hasattr(store, "table"):
+        version = store.table.version
+    return None if version is None else str(version)
+
+
+# Attributes holding the stores a retriever wraps.
+_STORES = ("store", "stores", "docstore")
+# Attributes holding the rerankers and packers applied to retrieved chunks.
+_STAGES = ("reranker", "packer")
+# Attributes that change with writes rather than with the retrieval setup.
+_VOLATILE = ("unoptimized",)
+
+
+def retrieval_config(store: Any, stages: bool = True) -> Any:
+    """Describe how a docstore retrieves, for use in cache keys.
+
+    Wrapping retrievers are described with the stores they wrap,
+    so e.g. two `filtered` views of one table, or a table searched with and
+    without reranking, get different descriptions.
+
+    :param store: A `KnowledgeStore`, a retriever wrapping one,
+        or a list of either.
+    :param stages: Whether to follow `store`'s wrapped stores, rerankers
+        and packers. Rerankers and packers are described without following
+        theirs, as e.g. the model a reranker loads on first use is not a setting.
+    :return: JSON-serialisable settings: the class names, simple settings,
+        default filters (as SQL) and nested parts of the retrieval chain.
+    """
+    if isinstance(store, (list, tuple)):
+        return [retrieval_config(item) for item in store]
+    config: dict[str, Any] = {"type": type(store).__qualname__}
+    for name, value in vars(store).items():
+        if name.startswith("_") or name in _VOLATILE:
+            continue
+        if not stages and name in _STORES + _STAGES:
+            continue
+        if name == "default_filter":
+            config[name] = _where_sql(value)
+        elif name in _STORES and value is not None:
+            config[name] = retrieval_config(value)
+        elif name in _STAGES and value is not None:
+            config[name] = retrieval_config(value, stages=False)
+        elif dataclasses.is_dataclass(value) and not isinstance(value, type):
+            config[name] = dataclasses.asdict(value)
+        elif value is None or isinstance(value, (str, int, float, bool)):
+            config[name] = value
+    return config
+
+
+def cache_scope(bot: Any, n_results: int) -> str:
+    """Hash what, besides the question, determines a QueryBot's answer.
+
+    :param bot: The QueryBot.
+    :param n_results: Number of chunks retrieved per question.
+    :return: A hex digest.
+    """
+    system_prompt = getattr(bot, "system_prompt", None)
+    scope = {
+        "model": getattr(bot, "model_name", None),
+        "system_prompt": getattr(system_prompt, "content", system_prompt),
+        "n_results": n_results,
+        "retrieval": retrieval_config(bot.docstore),
+    }
+    encoded = json.dumps(scope, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class CachedAnswer(NamedTuple):
+    """An answer and the chunks it was generated from.
+
+    :param answer: The answer text.
+    :param sources: Retrieved chunks the answer was generated from.
+    :param question: The question that was originally answered.
+    :param similarity: Cosine similarity of the cached question to the asked one,
+        or None if the answer was generated for this call.
+    """
+
+    answer: str
+    sources: list[str]
+    question: str
+    similarity: Optional[float] = None
+
+
+class SemanticCache:
+    """Answers to earlier questions, looked up by question similarity.
+
+    :param table_name: Name of the LanceDB table.
+    :param storage_path: Directory holding the LanceDB database.
+    :param embedding_registry: Name of the LanceDB embedding function.
+    :param embedding_model: Model used by the embedding function.
+    :param threshold: Minimum cosine similarity for a cached answer to be reused.
+    :param max_entries: Keep at most this many answers, dropping the oldest.
+        Eviction drops a tenth of them at once,
+        so that it does not run on every `add` of a full cache.
+    """
+
+    def __init__(
+        self,
+        table_name: str = "semantic_cache",
+        storage_path: Path = Path.home() / ".llamabot" / "lancedb",
+        embedding_registry: str = CACHED_SENTENCE_TRANSFORMERS,
+        embedding_model: str = "minishlab/potion-base-8M",
+        threshold: float = 0.92,
+        max_entries: Optional[int] = 10_000,
+    ):
+        import lancedb
+        from lancedb.embeddings import get_registry
+        from lancedb.pydantic import LanceModel, Vector
+
+        self.embedding_func = (
+            get_registry().get(embedding_registry).create(name=embedding_model)
+        )
+
+        class CachedEntry(LanceModel):
+            """An answered question."""
+
+            question: str = self.embedding_func.SourceField()
+            vector: Vector(self.embedding_func.ndims()) = (
+                self.embedding_func.VectorField()
+            )
+            asked: str
+            answer: str
+            sources: list[str]
+            scope: str
+            store_version: str
+            created_at: datetime
+
+        self.schema = CachedEntry
+        self.table_name = slugify.slugify(table_name, separator="-")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        storage_path.mkdir(parents=True, exist_ok=True)
+        self.db = lancedb.connect(storage_path)
+        try:
+            self.table = self.db.open_table(self.table_name)
+        except ValueError:
+            self.table = self.db.create_table(self.table_name, schema=self.schema)
+
+    def __len__(self) -> int:
+        """Count cached answers.
+
+        :return: The number of entries.
+        """
+        return self.table.count_rows()
+
+    def lookup(self, question: str, scope: str, version: str) -> Optional[CachedAnswer]:
+        """Find the answer to the most similar earlier question.
+
+        :param question: The question.
+        :param scope: From `cache_scope`.
+        :param version: The knowledge store's current version.
+        :return: The cached answer, or None if no question is similar enough.
+        """
+        where = (
+            f"scope = {_sql_string(scope)} AND store_version = {_sql_string(version)}"
+        )
+        search = self.table.search(normalize_question(question), query_type="vector")
+        search = search.distance_type("cosine").where(where, prefilter=True)
+        columns = ["asked", "answer", "sources", "_distance"]
+        rows = search.limit(1).select(columns).to_arrow().to_pylist()
+        similarity = 1 - rows[0]["_distance"] if rows else None
+        with self._lock:
+            if similarity is None or similarity < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+        row = rows[0]
+        return CachedAnswer(row["answer"], row["sources"], row["asked"], similarity)
+
+    def add(
+        self,
+        question: str,
+        answer: str,
+        sources: list[str],
+        scope: str,
+        version: str,
+    ) -> None:
+        """Cache an answer, dropping answers from older store versions.
+
+        :param question: The question.
+        :param answer: The answer.
+        :param sources: Chunks the answer was generated from.
+        :param scope: From `cache_scope`.
+        :param version: The knowledge store version the answer was generated from.
+        """
+        entry = {
+            "question": normalize_question(question),
+            "asked": question,
+            "answer": answer,
+            "sources": sources,
+            "scope": scope,
+            "store_version": version,
+            "created_at": datetime.now(timezone.utc).replace(tzinfo=None),
+        }
+        with self._lock:
+            self.table.delete(
+                f"scope = {_sql_string(scope)} "
+                f"AND store_version != {_sql_string(version)}"
+            )
+            self.table.add([entry])
+            if self.max_entries is not None and len(self) > self.max_entries:
+                self._evict(self.max_entries - self.max_entries // 10)
+
+    def _evict(self, keep: int) -> None:
+        """Drop the oldest answers, reading only their timestamps.
+
+        :param keep: Number of the newest answers to keep.
+        """
+        query = self.table.search().select(["created_at"]).limit(None)
+        created = query.to_arrow()["created_at"].to_pylist()
+        keep_from = sorted(created)[-keep]
+        self.table.delete(f"created_at < {_sql_timestamp(keep_from)}")
+
+    def clear(self) -> None:
+        """Remove every cached answer and reset the counters."""
+        with self._lock:
+            self.db.drop_table(self.table_name)
+            self.table = self.db.create_table(self.table_name, schema=self.schema)
+            self.hits = self.misses = 0
+
+
+class _RecordingStore:
+    """Wrap a docstore to remember, per thread, what `retrieve` last returned.
+
+    :param store: The docstore.
+    """
+
+    def __init__(self, store: Any):
+        self.store = store
+        self._local = threading.local()
+
+    def __getattr__(self, name: str) -> Any:
+        """Delegate everything else to the wrapped store.
+
+        :param name: Attribute name.
+        :return: The store's attribute.
+        """
+        return getattr(self.store, name)
+
+    def retrieve(self, query: str, n_results: int = 10, *args, **kwargs) -> list:
+        """Retrieve from the store, recording the results.
+
+        :param query: The query.
+        :param n_results: Number of chunks to return.
+        :param args: Extra positional arguments for the store.
+        :param kwargs: Extra keyword arguments for the store.
+        :return: The store's results.
+        """
+        results = self.store.retrieve(query, n_results, *args, **kwargs)
+        self._local.results = list(results)
+        return results
+
+    def pop(self) -> list[str]:
+        """Take the results of this thread's last retrieval.
+
+        :return: The chunks, or an empty list if nothing was retrieved.
+        """
+        return self._local.__dict__.pop("results", [])
+
+
+class SemanticCachingBot:
+    """Answer near-duplicate questions from a `SemanticCache`.
+
+    Every other attribute is read from the wrapped bot.
+
+    :param bot: The QueryBot to wrap; its docstore is wrapped
+        to record the chunks each answer is generated from.
+    :param cache: The cache.
+    """
+
+    def __init__(self, bot: Any, cache: SemanticCache):
+        self.bot = bot
+        self.cache = cache
+        self.recorder = _RecordingStore(bot.docstore)
+        bot.docstore = self.recorder
+
+    def __getattr__(self, name: str) -> Any:
+        """Delegate attribute access to the wrapped bot.
+
+        :param name: Attribute name.
+        :return: The wrapped bot's attribute.
+        """
+        return getattr(self.bot, name)
+
+    def ask(self, query: Union[str, BaseMessage], n_results: int = 20) -> CachedAnswer:
+        """Answer a question, from the cache if a similar one was answered.
+
+        :param query: The question.
+        :param n_results: Number of chunks to retrieve on a cache miss.
+        :return: The answer with its sources.
+        """
+        question = query if isinstance(query, str) else query.content
+        version = store_version(self.recorder.store)
+        scope = cache_scope(self.bot, n_results)
+        if version is not None:
+            hit = self.cache.lookup(question, scope, version)
+            if hit is not None:
+                if self.bot.memory:
+                    self.bot.memory.append(hit.answer)
+                if self.bot.stream_target == "stdout":
+                    print(hit.answer, end="")
+                return hit
+
+        self.recorder.pop()
+        answer = self.bot(query, n_results).content
+        sources = self.recorder.pop()
+        if version is not None:
+            self.cache.add(question, answer, sources, scope, version)
+        return CachedAnswer(answer, sources, question)
+
+    def __call__(
+        self, query: Union[str, BaseMessage], n_results: int = 20
+    ) -> AIMessage:
+        """Answer a question like `QueryBot.__call__` does.
+
+        :param query: The question.
+        :param n_results: Number of chunks to retrieve on a cache miss.
+        :return: The answer.
+        """
+        return AIMessage(content=self.ask(query, n_results).answer)
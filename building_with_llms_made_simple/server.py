@@ -0,0 +1,126 @@
+"""A warm, long-running HTTP daemon around the RAG QueryBot.
+
+The QueryBot is built once at startup,
+so the embedding model, LanceDB tables and prompt templates stay loaded
+and each request only pays for retrieval and generation.
+
+API:
+
+- `GET /health` returns `{"status": "ok"}`.
+- `POST /query` with `{"question": ..., "n_results": ...}`
+  returns `{"answer": ..., "elapsed": ...}`;
+  a malformed request gets a 400 with `{"error": ...}`.
+
+Identical questions arriving while one is being answered
+join the in-flight call instead of queueing their own retrieval and generation.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from ._http import Request, Response, start_server
+from .client import DEFAULT_HOST, DEFAULT_PORT
+from .coalesce import AsyncSingleFlight
+
+
+def parse_query(request: Request) -> tuple[str, int]:
+    """Read and validate the body of a query request.
+
+    :param request: A `POST /query` request.
+    :return: The question, and the number of chunks to retrieve (default 20).
+    :raises ValueError: If the body is not a JSON object,
+        the question is not a non-empty string,
+        or `n_results` is not a positive integer.
+    """
+    try:
+        payload = request.json() or {}
+    except ValueError:
+        raise ValueError("The request body must be JSON.")
+    if not isinstance(payload, dict):
+        raise ValueError("The request body must be a JSON object.")
+    question = payload.get("question")
+    if not isinstance(question, str) or not question:
+        raise ValueError("'question' must be a string")
+    n_results = payload.get("n_results", 20)
+    if isinstance(n_results, bool) or not isinstance(n_results, int) or n_results < 1:
+        raise ValueError("'n_results' must be a positive integer")
+    return question, n_results
+
+
+class BotServer:
+    """Serve a QueryBot (or any callable bot) over HTTP.
+
+    Bot calls run on a thread pool so the event loop stays responsive.
+    The default of one worker serialises calls,
+    because QueryBot mutates its memory store and run metadata on every call.
+
+    :param bot: The bot to serve; called as `bot(question, n_results)`.
+    :param workers: Number of bot calls allowed to run at once.
+    """
+
+    def __init__(self, bot, workers: int = 1):
+        self.bot = bot
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="bot"
+        )
+        self.inflight = AsyncSingleFlight()
+
+    def warm_up(self) -> None:
+        """Load lazily initialised models by running one retrieval."""
+        self.bot.docstore.retrieve("warm up", 1)
+
+    def answer(self, question: str, n_results: int) -> str:
+        """Answer one question with the bot.
+
+        :param question: The user's question.
+        :param n_results: Number of chunks to retrieve.
+        :return: The bot's answer text.
+        """
+        response = self.bot(question, n_results)
+        return getattr(response, "content", response)
+
+    async def handle(self, request: Request) -> Response:
+        """Route a request.
+
+        :param request: The incoming request.
+        :return: The response.
+        """
+        if request.path == "/health":
+            return Response.json({"status": "ok"})
+        if request.path != "/query":
+            return Response.json({"error": f"Unknown path {request.path}"}, 404)
+        if request.method != "POST":
+            return Response.json({"error": "Use POST /query"}, 405)
+
+        try:
+            question, n_results = parse_query(request)
+        except ValueError as e:
+            return Response.json({"error": str(e)}, 400)
+
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        answer = await self.inflight.do(
+            (question, n_results),
+            lambda: loop.run_in_executor(
+                self.executor, self.answer, question, n_results
+            ),
+        )
+        return Response.json({"answer": answer, "elapsed": time.perf_counter() - start})
+
+    async def serve_forever(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        socket_path: Optional[str] = None,
+    ) -> None:
+        """Serve requests until cancelled.
+
+        :param host: Interface to bind when serving over TCP.
+        :param port: Port to bind when serving over TCP.
+        :param socket_path: If given, serve on this Unix socket instead of TCP.
+        """
+        server = await start_server(self.handle, host, port, socket_path)
+        async with server:
+            await server.serve_forever()
@@ -0,0 +1,124 @@
+"""A shared, pooled HTTP transport for bots talking to remote `api_base` endpoints.
+
+litellm accepts an HTTP handler through the `client` completion argument.
+`pooled_client` returns one process-wide handler per `PoolConfig`,
+whose httpx connection pool keeps HTTP/1.1 connections alive between calls,
+so consecutive calls from any number of bots skip the TCP and TLS handshakes.
+HTTP/2 is used when requested and the `h2` package is installed.
+
+httpx async clients are tied to the event loop they were first used on,
+so `async_pooled_client` keeps one pool per running loop.
+"""
+
+import asyncio
+import importlib.util
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any, Optional
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    """Connection pool settings.
+
+    :param max_connections: Upper bound on open connections.
+    :param max_keepalive_connections: Idle connections kept open for reuse.
+    :param keepalive_expiry: Seconds an idle connection is kept open.
+    :param http2: Negotiate HTTP/2 when the `h2` package is installed.
+    :param timeout: Read/write timeout in seconds; generation can be slow.
+    :param connect_timeout: Connection timeout in seconds.
+    """
+
+    max_connections: int = 64
+    max_keepalive_connections: int = 32
+    keepalive_expiry: float = 300.0
+    http2: bool = False
+    timeout: float = 600.0
+    connect_timeout: float = 5.0
+
+    def httpx_kwargs(self) -> dict:
+        """Build keyword arguments for an `httpx.Client` or `httpx.AsyncClient`.
+
+        :return: The keyword arguments.
+        """
+        import httpx
+
+        return dict(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            http2=self.http2 and importlib.util.find_spec("h2") is not None,
+            follow_redirects=True,
+        )
+
+
+# Pool settings that disable keep-alive, opening a connection per request.
+NO_POOLING = PoolConfig(max_keepalive_connections=0, keepalive_expiry=0.0)
+
+_lock = threading.Lock()
+_sync_clients: dict[PoolConfig, Any] = {}
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def pooled_client(config: PoolConfig = PoolConfig()):
+    """Get the process-wide litellm HTTP handler for `config`.
+
+    :param config: Pool settings.
+    :return: A `litellm` `HTTPHandler` wrapping a pooled `httpx.Client`.
+    """
+    import httpx
+    from litellm.llms.custom_httpx.http_handler import HTTPHandler
+
+    with _lock:
+        if config not in _sync_clients:
+            _sync_clients[config] = HTTPHandler(
+                client=httpx.Client(**config.httpx_kwargs())
+            )
+        return _sync_clients[config]
+
+
+def async_pooled_client(config: PoolConfig = PoolConfig()):
+    """Get the litellm async HTTP handler for `config` on the running event loop.
+
+    :param config: Pool settings.
+    :return: A `litellm` `AsyncHTTPHandler` wrapping a pooled `httpx.AsyncClient`.
+    """
+    import httpx
+    from litellm.llms.custom_httpx.http_handler import AsyncHTTPHandler
+
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        if config not in clients:
+            handler = AsyncHTTPHandler(timeout=config.timeout)
+            handler.client = httpx.AsyncClient(**config.httpx_kwargs())
+            clients[config] = handler
+        return clients[config]
+
+
+def async_counterpart(client: Any):
+    """Find the async handler sharing a sync handler's pool settings.
+
+    :param client: A handler from `pooled_client`.
+    :return: The matching `async_pooled_client`, or None for foreign handlers.
+    """
+    with _lock:
+        config = next((c for c, h in _sync_clients.items() if h is client), None)
+    return async_pooled_client(config) if config is not None else None
+
+
+def enable_pooling(bot: Any, config: Optional[PoolConfig] = None) -> Any:
+    """Make a bot send its LLM calls through the shared connection pool.
+
+    :param bot: A llamabot bot.
+    :param config: Pool settings; bots with equal settings share a pool.
+    :return: The same bot, for chaining.
+    """
+    bot.completion_kwargs["client"] = pooled_client(config or PoolConfig())
+    return bot
@@ -0,0 +1,72 @@
+"""Shared fixtures for the test suite."""
+
+import hashlib
+from typing import ClassVar
+
+import pytest
+from lancedb.embeddings import TextEmbeddingFunction, get_registry
+
+from building_with_llms_made_simple.docstore import KnowledgeStore
+
+
+@get_registry().register("test-docstore-hash")
+class HashEmbeddings(TextEmbeddingFunction):
+    """Deterministic hash embeddings that record every text they embed."""
+
+    name: str = "hash"
+    embedded: ClassVar[list[str]] = []
+
+    def ndims(self) -> int:
+        """Report the vector size.
+
+        :return: The vector size.
+        """
+        return 8
+
+    def generate_embeddings(self, texts, *args, **kwargs) -> list:
+        """Embed texts by hashing them.
+
+        :param texts: The texts.
+        :param args: Ignored.
+        :param kwargs: Ignored.
+        :return: One vector per text.
+        """
+        HashEmbeddings.embedded.extend(texts)
+        return [
+            [b / 255 for b in hashlib.sha256(t.encode()).digest()[:8]] for t in texts
+        ]
+
+
+@pytest.fixture
+def embedded():
+    """Record the texts embedded during a test.
+
+    :return: The texts passed to `HashEmbeddings`, in order.
+    """
+    HashEmbeddings.embedded.clear()
+    return HashEmbeddings.embedded
+
+
+@pytest.fixture
+def open_store(tmp_path):
+    """Build a factory for stores sharing a temporary database.
+
+    :return: A function opening the test table.
+    """
+
+    def open_store(**kwargs) -> KnowledgeStore:
+        """Open the test table.
+
+        :param kwargs: Extra `KnowledgeStore` arguments.
+        :return: The store.
+        """
+        kwargs.setdefault("rerank", False)
+        return KnowledgeStore(
+            "knowledge",
+            storage_path=tmp_path,
+            embedding_registry="test-docstore-hash",
+            embedding_model="hash",
+            **kwargs,
+        )
+
+    return open_store
@@ -1 +1,83 @@
 """Tests for building with llms made simple."""
+
+import subprocess
+import sys
+
+import pytest
+
+# Modules that take seconds to import and must never load at startup.
+HEAVY_MODULES = {
+    "chonkie",
+    "lancedb",
+    "litellm",
+    "llamabot",
+    "openai",
+    "sentence_transformers",
+    "torch",
+    "transformers",
+}
+
+# Budget for importing the package itself, in microseconds.
+PACKAGE_IMPORT_BUDGET_US = 50_000
+
+# Budget for what the CLI adds to startup on top of typer, in microseconds.
+# typer alone takes about 65ms to import, so the CLI's total cannot be held
+# under the package budget; everything the CLI loads besides typer can.
+CLI_IMPORT_BUDGET_US = 10_000
+
+
+def import_profile(statement: str) -> dict[str, int]:
+    """Run `statement` under `python -X importtime` in a fresh interpreter.
+
+    :param statement: Python source to execute, e.g. an import statement.
+    :return: Mapping of imported module name to cumulative import time in µs.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, module = line.split("|")
+        profile[module.strip()] = int(cumulative)
+    return profile
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "import building_with_llms_made_simple",
+        "import building_with_llms_made_simple.cli",
+    ],
+)
+def test_no_heavy_modules_at_startup(statement):
+    """Importing the package or the CLI must not pull in heavy dependencies."""
+    loaded = {name.split(".")[0] for name in import_profile(statement)}
+    assert not loaded & HEAVY_MODULES
+
+
+def test_package_import_budget():
+    """The package import itself should stay well under the startup budget."""
+    profile = import_profile("import building_with_llms_made_simple")
+    assert profile["building_with_llms_made_simple"] < PACKAGE_IMPORT_BUDGET_US
+
+
+def test_cli_import_budget():
+    """The CLI adds little to startup beyond importing typer."""
+    profile = import_profile("import building_with_llms_made_simple.cli")
+    own = profile["building_with_llms_made_simple.cli"] - profile["typer"]
+    assert own < CLI_IMPORT_BUDGET_US
+
+
+def test_lazy_attribute_resolution():
+    """Top-level names resolve on access and are listed by `dir()`."""
+    import building_with_llms_made_simple as pkg
+
+    assert "create_rag_bot" in dir(pkg)
+    assert pkg.insert_delimiter.__module__ == "building_with_llms_made_simple.chunking"
+    with pytest.raises(AttributeError):
+        pkg.does_not_exist
@@ -0,0 +1,97 @@
+"""Tests for building_with_llms_made_simple.ann."""
+
+import lancedb
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from building_with_llms_made_simple.ann import (
+    ANNConfig,
+    SearchParams,
+    maintain_vector_index,
+    trained_rows,
+    vector_index,
+)
+
+DIMS = 16
+
+
+def _rows(count: int, start: int = 0) -> pa.Table:
+    """Build rows of random vectors.
+
+    :param count: Number of rows.
+    :param start: Seed, also the first id.
+    :return: An Arrow table with `id` and `vector` columns.
+    """
+    vectors = np.random.default_rng(start).standard_normal((count, DIMS))
+    return pa.table(
+        {
+            "id": pa.array(range(start, start + count)),
+            "vector": pa.FixedSizeListArray.from_arrays(
+                pa.array(vectors.ravel(), pa.float32()), DIMS
+            ),
+        }
+    )
+
+
+@pytest.fixture
+def table(tmp_path):
+    """Create a table of 300 random vectors.
+
+    :return: The LanceDB table.
+    """
+    return lancedb.connect(tmp_path).create_table("vectors", _rows(300))
+
+
+def test_config_sizes_index_for_table():
+    """Partitions grow with the table; sub-vectors divide the dimension."""
+    config = ANNConfig()
+    assert config.partitions_for(100) == 1
+    assert config.partitions_for(1_000_000) == 244
+    assert ANNConfig(index_type="IVF_HNSW_SQ").partitions_for(1_000_000) == 1
+    assert ANNConfig(num_partitions=7).partitions_for(10) == 7
+    assert config.sub_vectors_for(256) == 16
+    assert config.sub_vectors_for(24) == 3
+    assert config.sub_vectors_for(7) == 7
+    with pytest.raises(ValueError):
+        ANNConfig(index_type="FLAT")
+
+
+def test_index_waits_for_threshold(table):
+    """Small tables keep exact search."""
+    assert maintain_vector_index(table, ANNConfig(min_rows=1000), DIMS) is None
+    assert vector_index(table) is None
+
+
+def test_index_is_rebuilt_after_growth(table):
+    """The index is trained once, then retrained when the table doubles."""
+    config = ANNConfig(min_rows=256)
+    assert maintain_vector_index(table, config, DIMS) == "created"
+    assert trained_rows(vector_index(table)) == 300
+
+    table.add(_rows(200, start=300))
+    assert maintain_vector_index(table, config, DIMS) is None
+
+    table.add(_rows(200, start=500))
+    assert maintain_vector_index(table, config, DIMS) == "rebuilt"
+    (index,) = table.list_indices()
+    assert trained_rows(index) == 700
+    assert table.index_stats(index.name).num_unindexed_rows == 0
+
+
+def test_force_rebuilds_hnsw(table):
+    """A forced rebuild retrains even without growth, here as HNSW."""
+    config = ANNConfig(index_type="IVF_HNSW_SQ", min_rows=256)
+    assert maintain_vector_index(table, config, DIMS) == "created"
+    assert maintain_vector_index(table, config, DIMS, force=True) == "rebuilt"
+    assert vector_index(table).index_type == "IvfHnswSq"
+
+
+def test_search_params_tune_queries(table):
+    """Search parameters are applied to the query; full probing finds the row."""
+    maintain_vector_index(table, ANNConfig(min_rows=256, num_partitions=4), DIMS)
+    target = table.to_arrow()["vector"][42].as_py()
+    params = SearchParams(nprobes=4, refine_factor=5)
+    search = params.apply(table.search(target).limit(1))
+    assert search.select(["id", "_distance"]).to_arrow()["id"].to_pylist() == [42]
+    assert SearchParams().apply(search) is search
@@ -0,0 +1,87 @@
+"""Tests for building_with_llms_made_simple.batch."""
+
+import asyncio
+import time
+
+import llamabot as lmb
+import pytest
+
+from building_with_llms_made_simple.batch import batch
+from building_with_llms_made_simple.concurrency import AdaptiveLimiter
+from building_with_llms_made_simple.fake_ollama import (
+    FakeOllamaConfig,
+    FakeOllamaServer,
+    LatencyModel,
+)
+
+LATENCY = 0.1
+
+
+@pytest.fixture(scope="module")
+def bot():
+    """A SimpleBot pointed at a fake server with a fixed response delay."""
+    config = FakeOllamaConfig(latency=LatencyModel("fixed", LATENCY))
+    with FakeOllamaServer(config) as server:
+        yield lmb.SimpleBot(
+            "You summarise news articles.",
+            model_name="ollama_chat/llama3.2",
+            api_base=server.url,
+            stream_target="none",
+        )
+
+
+def test_results_match_serial_calls_in_order(bot):
+    """Batched replies line up with the prompts and match one-off calls."""
+    prompts = [f"Article {i}" for i in range(4)]
+    results = batch(bot, prompts, concurrency=4)
+    assert [r.prompt for r in results] == prompts
+    assert [r.response.content for r in results] == [bot(p).content for p in prompts]
+    assert all(r.latency >= LATENCY for r in results)
+
+
+def test_concurrency_cap(bot):
+    """Requests overlap, but never more than `concurrency` at a time."""
+    start = time.perf_counter()
+    results = batch(bot, [f"Article {i}" for i in range(8)], concurrency=4)
+    elapsed = time.perf_counter() - start
+    assert 2 * LATENCY <= elapsed < 8 * LATENCY
+    assert max(r.wait for r in results) >= LATENCY
+
+
+def test_batch_inside_running_loop(bot):
+    """In a running event loop, as in a Jupyter cell, `batch` still works."""
+    prompts = [f"Article {i}" for i in range(4)]
+
+    async def cell():
+        """Call `batch` the way a notebook cell would.
+
+        :return: The batch results.
+        """
+        return batch(bot, prompts, concurrency=4)
+
+    results = asyncio.run(cell())
+    assert [r.prompt for r in results] == prompts
+    assert all(r.error is None for r in results)
+
+
+def test_errors_can_be_returned():
+    """Failures are reported per prompt when `return_exceptions` is set."""
+    bot = lmb.SimpleBot(
+        "sys",
+        model_name="ollama_chat/llama3.2",
+        api_base="http://127.0.0.1:9",
+        stream_target="none",
+        num_retries=0,
+    )
+    limiter = AdaptiveLimiter()
+    results = batch(bot, ["a"] * 8, return_exceptions=True, limiter=limiter)
+    assert all(r.response is None and r.error is not None for r in results)
+    # The limiter saw failures: it backed off and learned no baseline latency.
+    assert limiter.limit < limiter.config.initial_limit
+    assert limiter.baseline is None and limiter.inflight == 0
+
+
+def test_invalid_concurrency(bot):
+    """A concurrency cap below one is rejected."""
+    with pytest.raises(ValueError):
+        batch(bot, ["a"], concurrency=0)
@@ -0,0 +1,85 @@
+"""Tests for building_with_llms_made_simple.benchmarks."""
+
+import pytest
+
+from building_with_llms_made_simple.benchmarks import (
+    BenchConfig,
+    BenchRun,
+    compare_results,
+    run_benchmarks,
+    summarize,
+    synthetic_sop,
+)
+from building_with_llms_made_simple.chunking import insert_delimiter
+
+CONFIG = BenchConfig(
+    repeat=2,
+    text_bytes=20_000,
+    tokenizer="word",
+    ann_sizes=(300,),
+    ann_dims=16,
+    ann_queries=5,
+    ann_nprobes=(1,),
+)
+
+
+def test_summarize():
+    """Summaries report order statistics and per-item time."""
+    stats = summarize([3.0, 1.0, 2.0], items=2)
+    assert (stats["min"], stats["median"], stats["max"]) == (1.0, 2.0, 3.0)
+    assert stats["per_item"] == 1.0
+
+
+def test_synthetic_sop_has_numbered_sections():
+    """The synthetic SOP is large enough and splits into top-level sections."""
+    text = synthetic_sop(20_000)
+    assert len(text) >= 20_000
+    assert insert_delimiter(text, level=1).count("|||SECTION|||") > 10
+
+
+@pytest.mark.parametrize(
+    "name",
+    [
+        "insert_delimiter",
+        "token_chunker",
+        "structured_parse",
+        "agentbot_step",
+        "transport",
+        "ann",
+    ],
+)
+def test_run_benchmark(name, tmp_path):
+    """Cheap benchmarks run and round-trip through JSON."""
+    run = run_benchmarks([name], CONFIG)
+    assert run.results[name]
+    assert all(stats["n"] >= 1 for stats in run.results[name].values())
+
+    path = tmp_path / "results.json"
+    run.save(path)
+    assert BenchRun.load(path).results == run.results
+
+
+def test_unknown_benchmark():
+    """Unknown names are rejected."""
+    with pytest.raises(ValueError):
+        run_benchmarks(["nope"], CONFIG)
+
+
+def test_compare_results():
+    """Only metrics slower than the threshold are reported."""
+    baseline = BenchRun(
+        results={"b": {"fast": {"median": 1.0}, "slow": {"median": 1.0}}}
+    )
+    current = BenchRun(
+        results={"b": {"fast": {"median": 1.1}, "slow": {"median": 2.0}}}
+    )
+    regressions = compare_results(baseline, current, threshold=0.2)
+    assert [r["metric"] for r in regressions] == ["slow"]
+
+
+def test_ann_benchmark_reports_recall():
+    """Exact search finds the true neighbours; indexed searches report recall."""
+    results = run_benchmarks(["ann"], CONFIG).results["ann"]
+    assert results["flat_300"]["recall_at_k"] == 1.0
+    assert 0 < results["binary_4_300"]["recall_at_k"] <= 1
+    assert 0 < results["nprobes_1_refine_10_300"]["recall_at_k"] <= 1
@@ -0,0 +1,94 @@
+"""Tests for building_with_llms_made_simple.cache."""
+
+import llamabot as lmb
+import pytest
+
+from building_with_llms_made_simple.cache import (
+    DiskLRUCache,
+    ResponseCache,
+    enable_response_cache,
+)
+from building_with_llms_made_simple.fake_ollama import FakeOllamaServer
+from building_with_llms_made_simple.models import Person
+
+
+@pytest.fixture(scope="module")
+def server():
+    """A fake Ollama server shared by the tests in this module."""
+    with FakeOllamaServer() as running:
+        yield running
+
+
+def test_lru_eviction(tmp_path):
+    """The least recently used entries go first once over budget."""
+    cache = DiskLRUCache(tmp_path / "lru.sqlite", max_bytes=30)
+    cache.set("a", b"x" * 10)
+    cache.set("b", b"x" * 10)
+    cache.set("c", b"x" * 10)
+    assert cache.get("a") is not None  # Touch "a" so that "b" is now oldest.
+    cache.set("d", b"x" * 10)
+    assert "b" not in cache
+    assert all(key in cache for key in "acd")
+    assert cache.stats().size_bytes <= 30
+
+
+def test_counters_persist(tmp_path):
+    """Hit and miss counts survive reopening the cache."""
+    cache = DiskLRUCache(tmp_path / "lru.sqlite")
+    cache.set("a", b"1")
+    cache.get("a")
+    cache.get("missing")
+    cache.close()
+    stats = DiskLRUCache(tmp_path / "lru.sqlite").stats()
+    assert (stats.hits, stats.misses, stats.entries) == (1, 1, 1)
+    assert stats.hit_rate == 0.5
+
+
+@pytest.mark.parametrize("stream_target", ["none", "stdout"])
+def test_simple_bot_is_served_from_cache(server, tmp_path, stream_target):
+    """Repeated temperature-0 calls reach the model only once."""
+    bot = lmb.SimpleBot(
+        "sys",
+        model_name="ollama_chat/llama3.2",
+        api_base=server.url,
+        stream_target=stream_target,
+    )
+    enable_response_cache(bot, ResponseCache(tmp_path / "responses.sqlite"))
+    before = server.app.requests_served
+    first = bot("hello")
+    second = bot("hello")
+    assert first.content == second.content
+    assert server.app.requests_served - before == 1
+    assert bot.response_cache.stats().hits == 1
+
+
+def test_structured_bot_is_served_from_cache(server, tmp_path):
+    """Structured replies are cached and still validate."""
+    bot = lmb.StructuredBot(
+        "sys",
+        pydantic_model=Person,
+        model_name="ollama_chat/llama3.2",
+        api_base=server.url,
+        stream_target="none",
+    )
+    enable_response_cache(bot, ResponseCache(tmp_path / "responses.sqlite"))
+    before = server.app.requests_served
+    assert bot("make a person") == bot("make a person")
+    assert server.app.requests_served - before == 1
+
+
+def test_nonzero_temperature_is_not_cached(server, tmp_path):
+    """Sampling calls always reach the model."""
+    bot = lmb.SimpleBot(
+        "sys",
+        temperature=0.7,
+        model_name="ollama_chat/llama3.2",
+        api_base=server.url,
+        stream_target="none",
+    )
+    enable_response_cache(bot, ResponseCache(tmp_path / "responses.sqlite"))
+    before = server.app.requests_served
+    bot("hello")
+    bot("hello")
+    assert server.app.requests_served - before == 2
+    assert len(bot.response_cache) == 0
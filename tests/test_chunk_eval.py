@@ -0,0 +1,107 @@
+"""Tests for building_with_llms_made_simple.chunk_eval."""
+
+import csv
+import json
+
+import pytest
+
+from building_with_llms_made_simple.chunk_eval import (
+    ChunkingConfig,
+    EvalSettings,
+    LabelledQuestion,
+    config_grid,
+    evaluate_chunkers,
+    first_relevant_rank,
+    format_table,
+    is_relevant,
+    load_questions,
+    synthetic_corpus,
+    synthetic_questions,
+    write_table,
+)
+from building_with_llms_made_simple.chunking import SectionChunk
+
+SETTINGS = EvalSettings(
+    k=3,
+    embedding_registry="test-docstore-hash",
+    embedding_model="hash",
+    repeat=1,
+    latency_questions=2,
+    # Worker processes register the test embeddings too.
+    imports=("conftest",),
+)
+
+
+def test_relevance_matches_evidence_across_chunkers():
+    """A chunk is relevant if it holds the evidence or is part of it."""
+    question = LabelledQuestion("q", "the calibration  record", "doc")
+    assert is_relevant(
+        SectionChunk("verify the calibration record daily", "doc"), question
+    )
+    assert is_relevant(SectionChunk("calibration", "doc"), question)
+    assert not is_relevant(SectionChunk("the calibration record", "other"), question)
+    assert not is_relevant(SectionChunk("record keeping", "doc"), question)
+    chunks = [SectionChunk("nothing"), SectionChunk("the calibration record", "doc")]
+    assert first_relevant_rank(chunks, question) == 2
+    assert first_relevant_rank(chunks[:1], question) is None
+
+
+def test_synthetic_questions_quote_their_evidence():
+    """Each synthetic question starts its evidence sentence, from its document."""
+    corpus = synthetic_corpus(documents=2, text_bytes=10_000)
+    questions = synthetic_questions(corpus, count=5)
+    assert len(questions) == 5
+    for question in questions:
+        assert question.evidence.startswith(question.question)
+        assert question.evidence in corpus[question.document_title]
+
+
+def test_load_questions(tmp_path):
+    """Questions are read from JSON Lines, skipping blank lines."""
+    path = tmp_path / "questions.jsonl"
+    path.write_text(
+        json.dumps({"question": "q", "evidence": "e"})
+        + "\n\n"
+        + json.dumps({"question": "r", "evidence": "f", "document_title": "d"})
+    )
+    assert load_questions(path) == [
+        LabelledQuestion("q", "e"),
+        LabelledQuestion("r", "f", "d"),
+    ]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_evaluate_chunkers(workers):
+    """Every configuration gets a row of cost and quality metrics."""
+    corpus = synthetic_corpus(documents=2, text_bytes=10_000)
+    questions = synthetic_questions(corpus, count=4)
+    configs = config_grid(("token", "section"), (32,), 4, "word")
+    rows = evaluate_chunkers(configs, corpus, questions, SETTINGS, workers)
+    assert [row["config"] for row in rows] == ["token-32-4", "section-32-4"]
+    for row in rows:
+        assert row["chunks"] > 0 and row["mean_chunk_tokens"] <= 32
+        assert row["chunk_mb_per_s"] > 0 and row["index_mb"] > 0
+        assert 0 <= row["mrr"] <= row["recall_at_3"] <= 1
+        assert row["context_tokens"] > 0 and row["answer_p50_ms"] > 0
+
+
+def test_config_label():
+    """Configurations are labelled by strategy and sizes unless named."""
+    assert ChunkingConfig().label == "token-128-8"
+    assert ChunkingConfig(name="mine").label == "mine"
+
+
+def test_write_table(tmp_path):
+    """Rows are saved as CSV, JSON or Markdown by file extension."""
+    rows = [{"config": "a", "mrr": 0.123456, "answer_p50_ms": None}]
+    write_table(rows, tmp_path / "r.csv")
+    with open(tmp_path / "r.csv") as f:
+        assert list(csv.DictReader(f)) == [
+            {"config": "a", "mrr": "0.123456", "answer_p50_ms": ""}
+        ]
+    write_table(rows, tmp_path / "r.json")
+    assert json.loads((tmp_path / "r.json").read_text()) == rows
+    write_table(rows, tmp_path / "r.md")
+    assert (tmp_path / "r.md").read_text() == format_table(rows) + "\n"
+    assert format_table(rows).splitlines()[-1] == "| a | 0.1235 |  |"
+    assert format_table([]) == ""
@@ -0,0 +1,95 @@
+"""Tests for building_with_llms_made_simple.chunking."""
+
+import io
+
+import pytest
+
+from building_with_llms_made_simple.benchmarks import synthetic_sop
+from building_with_llms_made_simple.chunking import (
+    Section,
+    create_section_chunker,
+    insert_delimiter,
+    iter_sections,
+)
+
+DOCUMENT = """Lab protocol
+
+1.\tPurpose
+Describe the lab.
+2.\tScope
+2.1 Personnel
+  2.1.1 Training
+2.2. Equipment
+2.
+3.a not a header"""
+
+
+def test_insert_delimiter_marks_headers_up_to_level():
+    """Headers at or above the level get a delimiter after their indentation."""
+    marked = insert_delimiter(DOCUMENT, level=2, delim="|")
+    assert marked.splitlines()[2:8] == [
+        "| 1.\tPurpose",
+        "Describe the lab.",
+        "| 2.\tScope",
+        "| 2.1 Personnel",
+        "  2.1.1 Training",
+        "| 2.2. Equipment",
+    ]
+
+
+def test_iter_sections_level_1():
+    """Top-level headers start sections; deeper headers stay inside them."""
+    sections = list(iter_sections(DOCUMENT))
+    assert [(s.number, s.level) for s in sections] == [(None, 0), ("1", 1), ("2", 1)]
+    assert sections[0].text == "Lab protocol"
+    assert sections[1].text == "1.\tPurpose\nDescribe the lab."
+    assert sections[2].text.endswith("3.a not a header")
+
+
+def test_iter_sections_level_2():
+    """Deeper levels split subsections out, with their parents attached."""
+    sections = list(iter_sections(io.StringIO(DOCUMENT), level=2))
+    assert [s.number for s in sections] == [None, "1", "2", "2.1", "2.2"]
+    assert sections[3] == Section("2.1", 2, "2.1 Personnel\n  2.1.1 Training")
+    assert sections[3].parents == ("2",)
+    assert Section("1.2.3", 3, "").parents == ("1", "1.2")
+
+
+def test_iter_sections_skips_blank_preamble():
+    """Whitespace before the first header is not a section."""
+    assert [s.number for s in iter_sections("\n\n1. A\n")] == ["1"]
+    assert list(iter_sections("")) == []
+
+
+@pytest.mark.parametrize("level", [1, 2, 3])
+def test_iter_sections_matches_delimiter_split(level):
+    """Sections are the delimiter-split chunks, minus the delimiter artifacts."""
+    text = synthetic_sop(20_000)
+    chunks = insert_delimiter(text, level=level, delim="|").split("|")
+    expected = [chunk.lstrip(" ").rstrip("\n") for chunk in chunks[1:]]
+    assert [s.text for s in iter_sections(text, level=level)] == expected
+
+
+def test_section_chunker_keeps_provenance_out_of_text():
+    """Sections become chunks carrying their title and number as fields."""
+    chunker = create_section_chunker(tokenizer="word", chunk_size=50)
+    chunks = chunker(DOCUMENT, document_title="lab protocol")
+
+    assert [(c.section_number, c.section_level) for c in chunks] == [
+        (None, 0),
+        ("1", 1),
+        ("2", 1),
+    ]
+    assert {c.document_title for c in chunks} == {"lab protocol"}
+    assert chunks[1].text == "1.\tPurpose\nDescribe the lab."
+
+
+def test_section_chunker_splits_oversize_sections():
+    """Sections over the token budget are split, each piece keeping its section."""
+    text = "1. Intro\n" + " ".join(f"w{i}" for i in range(25)) + "\n2. Short"
+    chunks = create_section_chunker(tokenizer="word", chunk_size=10, chunk_overlap=0)(
+        text
+    )
+
+    assert [c.section_number for c in chunks] == ["1", "1", "1", "2"]
+    assert " ".join(c.text for c in chunks[:3]).split() == text.split()[:27]
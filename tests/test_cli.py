@@ -1 +1,14 @@
 """Tests for building_with_llms_made_simple.cli."""
+
+from typer.testing import CliRunner
+
+from building_with_llms_made_simple.cli import app
+
+runner = CliRunner()
+
+
+def test_hello():
+    """`hello` echoes the project name."""
+    result = runner.invoke(app, ["hello"])
+    assert result.exit_code == 0
+    assert "building with llms made simple" in result.output
@@ -0,0 +1,129 @@
+"""Tests for building_with_llms_made_simple.coalesce."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from llamabot.components.messages import HumanMessage
+
+from building_with_llms_made_simple._http import Request
+from building_with_llms_made_simple.coalesce import (
+    AsyncSingleFlight,
+    CoalescingBot,
+    call_key,
+)
+from building_with_llms_made_simple.server import BotServer
+
+
+class SlowBot:
+    """Stand-in for QueryBot that takes a while and counts its calls."""
+
+    def __init__(self, delay: float = 0.2):
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+        self.docstore = "knowledge"
+
+    def __call__(self, query, n_results=20):
+        """Answer slowly.
+
+        :param query: The question.
+        :param n_results: Echoed back.
+        :return: The answer.
+        :raises ValueError: If the question is "fail".
+        """
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if query == "fail":
+            raise ValueError("boom")
+        return f"{query}/{n_results}"
+
+
+def test_call_key_normalises_messages():
+    """Strings and equivalent human messages coalesce together."""
+    assert call_key("hi", 3) == call_key(HumanMessage(content="hi"), 3)
+    assert call_key("hi", 3) != call_key("hi", 4)
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    """Only one of many simultaneous identical calls reaches the bot."""
+    bot = CoalescingBot(SlowBot())
+    with ThreadPoolExecutor(8) as pool:
+        answers = list(pool.map(lambda _: bot("q", 5), range(8)))
+    assert answers == ["q/5"] * 8
+    assert bot.calls == 1
+    assert bot.flight.shared == 7
+    assert bot.docstore == "knowledge"
+
+
+def test_different_calls_are_not_coalesced():
+    """Distinct arguments run separately, and later calls run afresh."""
+    bot = CoalescingBot(SlowBot(delay=0.05))
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda i: bot("q", i), range(4)))
+    bot("q", 0)
+    assert bot.calls == 5
+
+
+def test_errors_reach_every_waiter():
+    """Followers see the leader's exception."""
+    bot = CoalescingBot(SlowBot())
+
+    def ask(_):
+        """Ask the failing question.
+
+        :return: The exception raised.
+        """
+        with pytest.raises(ValueError) as info:
+            bot("fail")
+        return info.value
+
+    with ThreadPoolExecutor(4) as pool:
+        errors = list(pool.map(ask, range(4)))
+    assert bot.calls == 1 and len({id(e) for e in errors}) == 1
+
+
+def test_async_single_flight():
+    """Coroutines awaiting the same key share one execution."""
+    calls = []
+
+    async def work():
+        """Record the call and return after a short wait.
+
+        :return: A fixed value.
+        """
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def main():
+        """Issue identical awaits concurrently.
+
+        :return: The results.
+        """
+        flight = AsyncSingleFlight()
+        return await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+
+    assert asyncio.run(main()) == [42] * 5
+    assert len(calls) == 1
+
+
+def test_server_coalesces_identical_questions():
+    """The daemon answers a burst of identical questions with one bot call."""
+    bot = SlowBot()
+    server = BotServer(bot, workers=4)
+    request = Request("POST", "/query", body=b'{"question": "q", "n_results": 3}')
+
+    async def main():
+        """Send a burst of identical requests.
+
+        :return: The responses.
+        """
+        return await asyncio.gather(*(server.handle(request) for _ in range(6)))
+
+    responses = asyncio.run(main())
+    assert all(response.status == 200 for response in responses)
+    assert bot.calls == 1
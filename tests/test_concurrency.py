@@ -0,0 +1,144 @@
+"""Tests for building_with_llms_made_simple.concurrency."""
+
+import asyncio
+import threading
+
+import llamabot as lmb
+import pytest
+
+from building_with_llms_made_simple import concurrency
+from building_with_llms_made_simple.batch import batch
+from building_with_llms_made_simple.concurrency import (
+    AdaptiveLimiter,
+    LimiterConfig,
+    configure_limiter,
+    enable_adaptive_concurrency,
+    limiter_for,
+)
+from building_with_llms_made_simple.fake_ollama import FakeOllamaServer
+
+
+def run_saturated(limiter: AdaptiveLimiter, latency: float, rounds: int, **kw):
+    """Fill every slot, then release them all with the given outcome.
+
+    :param limiter: The limiter.
+    :param latency: Reported latency for every call.
+    :param rounds: How many times to repeat.
+    :param kw: Extra arguments for `release`.
+    """
+    for _ in range(rounds):
+        slots = limiter.limit
+        for _ in range(slots):
+            limiter.acquire()
+        for _ in range(slots):
+            limiter.release(latency, **kw)
+
+
+def test_limit_grows_while_latency_holds():
+    """Fast, successful calls at full utilisation raise the limit additively."""
+    limiter = AdaptiveLimiter(LimiterConfig(initial_limit=2, max_limit=5))
+    run_saturated(limiter, 0.1, rounds=10)
+    assert limiter.limit == 5
+
+
+def test_limit_backs_off_on_errors_and_slow_calls():
+    """Errors and latency spikes shrink the limit multiplicatively."""
+    limiter = AdaptiveLimiter(LimiterConfig(initial_limit=10))
+    limiter.acquire()
+    limiter.release(0.1)
+    limiter._last_decrease = float("-inf")
+    limiter.acquire()
+    limiter.release(0.1, error=True)
+    assert limiter.limit == 7
+
+    limiter._last_decrease = float("-inf")
+    limiter.acquire()
+    limiter.release(1.0)
+    assert limiter.limit == 4
+    assert limiter.inflight == 0
+
+
+def test_one_decrease_per_baseline_latency():
+    """A burst of failures within one round trip only backs off once."""
+    limiter = AdaptiveLimiter(LimiterConfig(initial_limit=10))
+    run_saturated(limiter, 10.0, rounds=1)
+    run_saturated(limiter, 10.0, rounds=1, error=True)
+    assert limiter.limit == 7
+
+
+def test_acquire_blocks_at_limit():
+    """A caller waits until a slot is released."""
+    limiter = AdaptiveLimiter(LimiterConfig(initial_limit=1))
+    limiter.acquire()
+    acquired = threading.Event()
+    waiter = threading.Thread(target=lambda: (limiter.acquire(), acquired.set()))
+    waiter.start()
+    assert not acquired.wait(0.1)
+    limiter.release(0.01)
+    assert acquired.wait(1)
+    waiter.join()
+
+
+def test_async_slots():
+    """Coroutines never exceed the limit."""
+    limiter = AdaptiveLimiter(LimiterConfig(initial_limit=2, max_limit=2))
+    peak = 0
+
+    async def work():
+        """Hold a slot briefly and record the peak concurrency."""
+        nonlocal peak
+        async with limiter.aslot():
+            peak = max(peak, limiter.inflight)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        """Run several workers at once."""
+        await asyncio.gather(*(work() for _ in range(6)))
+
+    asyncio.run(main())
+    assert peak == 2 and limiter.inflight == 0
+
+
+def test_registry_prefers_most_specific_config(monkeypatch):
+    """Pair beats endpoint beats model beats default, and limiters are shared."""
+    monkeypatch.setattr(concurrency, "_configs", {})
+    monkeypatch.setattr(concurrency, "_limiters", {})
+    configure_limiter(LimiterConfig(initial_limit=1), model_name="m")
+    configure_limiter(LimiterConfig(initial_limit=2), api_base="http://remote")
+    configure_limiter(LimiterConfig(initial_limit=3), "m", "http://remote")
+    assert limiter_for("m", "http://remote").limit == 3
+    assert limiter_for("other", "http://remote").limit == 2
+    assert limiter_for("m", "http://local").limit == 1
+    assert limiter_for("other").limit == LimiterConfig().initial_limit
+    assert limiter_for("m") is limiter_for("m")
+
+
+@pytest.fixture(scope="module")
+def server():
+    """A fake Ollama server shared by the tests in this module."""
+    with FakeOllamaServer() as running:
+        yield running
+
+
+@pytest.mark.parametrize("stream_target", ["none", "stdout"])
+def test_bot_calls_feed_the_limiter(server, stream_target):
+    """A limited bot takes and releases a slot around each LLM call."""
+    bot = lmb.SimpleBot(
+        "sys",
+        model_name="ollama_chat/llama3.2",
+        api_base=server.url,
+        stream_target=stream_target,
+    )
+    limiter = AdaptiveLimiter()
+    enable_adaptive_concurrency(bot, limiter)
+    bot("hello")
+    assert limiter.baseline is not None and limiter.inflight == 0
+
+
+def test_batch_respects_limiter(server):
+    """Batches can be throttled by a shared limiter."""
+    bot = lmb.SimpleBot("sys", model_name="ollama_chat/llama3.2", api_base=server.url)
+    limiter = AdaptiveLimiter()
+    results = batch(bot, ["a", "b", "c"], limiter=limiter)
+    assert all(r.response for r in results)
+    assert limiter.baseline is not None and limiter.inflight == 0
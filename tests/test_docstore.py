@@ -0,0 +1,247 @@
+"""Tests for building_with_llms_made_simple.docstore."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from building_with_llms_made_simple.ann import ANNConfig, trained_rows, vector_index
+from building_with_llms_made_simple.chunking import SectionChunk
+from building_with_llms_made_simple.docstore import (
+    MetadataFilter,
+    SyncStats,
+    cite,
+)
+from building_with_llms_made_simple.quantize import binary_codes
+
+
+def test_extend_skips_stored_chunks(open_store, embedded):
+    """Chunks already in the store are neither embedded nor added again."""
+    store = open_store()
+    store.extend(["a", "b", "a"])
+    store.append("b")
+
+    assert len(store) == store.table.count_rows() == 2
+    assert "a" in store and "c" not in store
+    assert sorted(embedded) == ["a", "b"]
+
+
+def test_sync_touches_only_changes(open_store, embedded):
+    """Sync embeds new chunks, deletes vanished ones and keeps the rest."""
+    store = open_store()
+    assert store.sync(["a", "b", "c"]) == SyncStats(added=3, deleted=0, unchanged=0)
+    embedded.clear()
+
+    stats = store.sync(iter(["b", "c", "d", "d"]))
+
+    assert stats == SyncStats(added=1, deleted=1, unchanged=2)
+    assert embedded == ["d"]
+    documents = store.table.to_arrow()["document"].to_pylist()
+    assert sorted(documents) == ["b", "c", "d"]
+    for index in store.table.list_indices():
+        assert store.table.index_stats(index.name).num_unindexed_rows == 0
+
+
+def test_extend_defers_index_updates(open_store):
+    """Batches are indexed together once enough rows accumulate, not one by one."""
+    store = open_store(optimize_after=3)
+    store.extend(["a", "b"])
+    assert store.unoptimized == 2
+    assert store.retrieve("a", n_results=1) == ["a"]
+    store.extend(["c"])
+    assert store.unoptimized == 0
+    for index in store.table.list_indices():
+        assert store.table.index_stats(index.name).num_unindexed_rows == 0
+
+
+def test_reset_keeps_indexes(open_store):
+    """After a reset, a small load is searchable by keyword without `optimize`."""
+    store = open_store()
+    store.reset()
+    store.extend(["apples and pears", "bananas", "cherries"])
+    assert store.unoptimized == 3
+    indexed = {tuple(index.columns) for index in store.table.list_indices()}
+    assert ("document",) in indexed
+    hits = store.table.search("bananas", query_type="fts").limit(3).to_list()
+    assert [hit["document"] for hit in hits] == ["bananas"]
+
+
+def test_reopened_store_remembers_hashes(open_store, embedded):
+    """A reopened store syncs against what is already on disk."""
+    open_store().sync(["a", "b"])
+    embedded.clear()
+
+    assert open_store().sync(["a", "b"]) == SyncStats(unchanged=2)
+    assert embedded == []
+
+
+def test_retrieve(open_store):
+    """Retrieval finds an exact match first."""
+    store = open_store()
+    store.extend(["apples and pears", "bananas", "cherries"])
+
+    assert store.retrieve("bananas", n_results=2)[0] == "bananas"
+
+
+def test_legacy_table_is_upgraded(open_store, tmp_path, embedded):
+    """Tables written by LanceDBDocStore gain content hashes without re-embedding."""
+    from llamabot import LanceDBDocStore
+
+    LanceDBDocStore(
+        table_name="knowledge",
+        storage_path=tmp_path,
+        embedding_registry="test-docstore-hash",
+        embedding_model="hash",
+    ).extend(["a", "b"])
+    embedded.clear()
+
+    store = open_store()
+
+    assert "a" in store and len(store) == 2
+    assert store.sync(["a", "c"]) == SyncStats(added=1, deleted=1, unchanged=1)
+    assert embedded == ["c"]
+
+
+def test_provenance_is_stored_in_columns(open_store, embedded):
+    """Section provenance is kept out of the embedded text and comes back out."""
+    store = open_store()
+    chunk = SectionChunk("2.1 Wear gloves.", "lab protocol", "2.1", 2)
+    store.extend([chunk, SectionChunk("2.1 Wear gloves.", "cleaning", "2.1", 2)])
+
+    assert embedded == ["2.1 Wear gloves."] * 2
+    assert chunk in store and "2.1 Wear gloves." not in store
+    assert store.retrieve_chunks("2.1 Wear gloves.", n_results=2)[0].text == (
+        chunk.text
+    )
+    assert store.retrieve("2.1 Wear gloves.", n_results=1)[0].endswith("section 2.1)")
+
+
+def test_cite():
+    """Citations name whatever provenance is known."""
+    assert cite(SectionChunk("text")) == "text"
+    assert cite(SectionChunk("text", "sop", "3", 1)) == (
+        "text\n(from document sop, section 3)"
+    )
+
+
+def test_metadata_filter_sql():
+    """Filters render as index-friendly predicates with quoted literals."""
+    assert MetadataFilter().to_sql() is None
+    assert MetadataFilter(document_title="O'Brien's SOP").to_sql() == (
+        "document_title = 'O''Brien''s SOP'"
+    )
+    assert MetadataFilter(collection=["sop", "kb"], max_section_level=2).to_sql() == (
+        "collection IN ('sop', 'kb') AND section_level <= 2"
+    )
+    after = datetime(2024, 1, 1, 1, tzinfo=timezone(timedelta(hours=1)))
+    assert MetadataFilter(ingested_after=after).to_sql() == (
+        "ingested_at >= timestamp '2024-01-01 00:00:00'"
+    )
+
+
+@pytest.fixture
+def families(open_store):
+    """Fill one table with two document families.
+
+    :return: The store.
+    """
+    store = open_store()
+    store.extend(
+        [
+            SectionChunk("2 Scope", "lab", "2", 1),
+            SectionChunk("2.1 Personnel", "lab", "2.1", 2),
+            SectionChunk("2.10 Waste", "lab", "2.10", 2),
+        ],
+        collection="sop",
+    )
+    store.extend([SectionChunk("2.1 Personnel", "faq", "2.1", 2)], collection="kb")
+    return store
+
+
+def test_filtered_retrieval(families):
+    """Filters are applied before the search and backed by scalar indexes."""
+    indexed = {tuple(index.columns) for index in families.table.list_indices()}
+    assert {("document_title",), ("section_number",), ("ingested_at",)} <= indexed
+
+    def titles(where):
+        """Retrieve everything matching a filter.
+
+        :param where: The filter.
+        :return: The (title, section) of each chunk.
+        """
+        chunks = families.retrieve_chunks("2.1 Personnel", n_results=10, where=where)
+        return sorted((c.document_title, c.section_number) for c in chunks)
+
+    assert titles(MetadataFilter(collection="kb")) == [("faq", "2.1")]
+    assert titles(MetadataFilter(section_prefix="2.1")) == [
+        ("faq", "2.1"),
+        ("lab", "2.1"),
+    ]
+    assert titles(MetadataFilter(collection="sop", max_section_level=1)) == [
+        ("lab", "2")
+    ]
+    future = datetime.now(timezone.utc) + timedelta(hours=1)
+    assert titles(MetadataFilter(ingested_after=future)) == []
+    assert titles("document_title = 'lab' AND section_number = '2.10'") == [
+        ("lab", "2.10")
+    ]
+
+    scoped = families.filtered(MetadataFilter(document_title="faq"))
+    assert scoped.retrieve("Scope", n_results=3) == [
+        "2.1 Personnel\n(from document faq, section 2.1)"
+    ]
+
+
+def test_sync_one_collection(families):
+    """Syncing a collection leaves the other collections alone."""
+    stats = families.sync([SectionChunk("2 Scope", "lab", "2", 1)], collection="sop")
+
+    assert stats == SyncStats(added=0, deleted=2, unchanged=1)
+    assert families.table.count_rows() == 2
+
+
+def test_vector_index_follows_table_size(open_store):
+    """Optimizing creates the vector index past the threshold; queries can tune it."""
+    store = open_store(ann=ANNConfig(min_rows=256))
+    store.extend([f"chunk {i}" for i in range(200)])
+    store.optimize()
+    assert vector_index(store.table) is None
+
+    store.extend([f"chunk {i}" for i in range(200, 300)])
+    store.optimize()
+    assert trained_rows(vector_index(store.table)) == 300
+    assert store.rebuild_vector_index() == "rebuilt"
+    assert store.retrieve("chunk 7", n_results=1, nprobes=1, refine_factor=50) == [
+        "chunk 7"
+    ]
+    assert open_store(ann=None).rebuild_vector_index() is None
+
+
+def test_binary_store_rescores_shortlist(open_store, embedded):
+    """Binary stores keep codes of their vectors and rank by the exact distance."""
+    documents = [f"chunk {i}" for i in range(20)]
+    store = open_store()
+    store.extend(documents)
+    expected = store.retrieve("chunk 3", n_results=3)
+
+    binary = open_store(quantization="binary", rescore_factor=10)
+    vectors = binary.table.to_arrow()["vector"].to_pylist()
+    codes = binary.table.to_arrow()["code"].to_pylist()
+    assert codes == binary_codes(vectors).tolist()
+    assert binary.retrieve("chunk 3", n_results=3) == expected
+
+    embedded.clear()
+    binary.extend(["chunk 20"])
+    assert embedded == ["chunk 20"]
+    assert binary.table.to_arrow()["code"].null_count == 0
+    with pytest.raises(ValueError):
+        open_store(quantization="int4")
+
+
+def test_int8_store_indexes_scalar_codes(open_store):
+    """int8 stores build a scalar-quantized index and refine its results."""
+    store = open_store(quantization="int8", ann=ANNConfig(min_rows=256))
+    store.extend([f"chunk {i}" for i in range(300)])
+    store.optimize()
+    assert vector_index(store.table).index_type == "IvfHnswSq"
+    assert store.search_params.refine_factor == store.rescore_factor
+    assert store.retrieve("chunk 7", n_results=1) == ["chunk 7"]
@@ -0,0 +1,116 @@
+"""Tests for building_with_llms_made_simple.embeddings."""
+
+import hashlib
+from typing import ClassVar, Optional
+
+import pytest
+from lancedb.embeddings import TextEmbeddingFunction, get_registry
+from llamabot import LanceDBDocStore
+
+from building_with_llms_made_simple import embeddings
+from building_with_llms_made_simple.embeddings import (
+    CachedEmbeddings,
+    CachedSentenceTransformerEmbeddings,
+    EmbeddingCache,
+    get_embedding_cache,
+)
+
+
+@get_registry().register("test-counting")
+class CountingEmbeddings(TextEmbeddingFunction):
+    """Deterministic hash embeddings that record every text they embed."""
+
+    name: str = "counting"
+    embedded: ClassVar[list[str]] = []
+
+    def ndims(self) -> int:
+        """Report the vector size.
+
+        :return: The vector size.
+        """
+        return 8
+
+    def generate_embeddings(self, texts, *args, **kwargs) -> list:
+        """Embed texts by hashing them.
+
+        :param texts: The texts.
+        :param args: Ignored.
+        :param kwargs: Ignored.
+        :return: One vector per text.
+        """
+        CountingEmbeddings.embedded.extend(texts)
+        return [
+            [b / 255 for b in hashlib.sha256(t.encode()).digest()[:8]] for t in texts
+        ]
+
+
+@get_registry().register("test-cached-counting")
+class CachedCountingEmbeddings(CachedEmbeddings, CountingEmbeddings):
+    """`CountingEmbeddings` behind the embedding cache."""
+
+    cache_path: Optional[str] = None
+
+
+@pytest.fixture
+def cache_path(tmp_path, monkeypatch):
+    """Point the default embedding cache at a temporary directory.
+
+    :return: The default cache path.
+    """
+    monkeypatch.setattr(embeddings, "DEFAULT_CACHE_DIR", tmp_path)
+    CountingEmbeddings.embedded.clear()
+    return str(tmp_path / "embeddings.sqlite")
+
+
+def test_vectors_round_trip(tmp_path):
+    """Stored vectors come back as float32-precision lists."""
+    cache = EmbeddingCache(tmp_path / "e.sqlite")
+    cache.set_vectors("m", {"a": [0.5, 0.25]})
+    assert cache.get_vectors("m", ["a", "b"]) == {"a": [0.5, 0.25]}
+    assert cache.get_vectors("other-model", ["a"]) == {}
+
+
+def test_only_unseen_texts_are_embedded(cache_path):
+    """The model runs once per distinct text; results keep input order."""
+    func = CachedCountingEmbeddings(name="counting", cache_path=cache_path)
+    first = func.generate_embeddings(["a", "b", "a"])
+    second = func.generate_embeddings(["b", "c"])
+    assert CountingEmbeddings.embedded == ["a", "b", "c"]
+    assert first[1] == second[0]
+    assert get_embedding_cache(cache_path).stats().hits == 1
+
+
+def test_namespace_follows_settings_that_change_vectors():
+    """Differently configured models do not share cached vectors."""
+
+    def namespace(**settings):
+        """Build a cached embedding function's namespace.
+
+        :param settings: Embedding function fields.
+        :return: Its cache namespace.
+        """
+        return CachedSentenceTransformerEmbeddings(
+            name="m", **settings
+        ).cache_namespace()
+
+    assert namespace() != namespace(normalize=False)
+    assert namespace() != namespace(device="cuda")
+    assert namespace() == namespace(cache_path="elsewhere.sqlite", max_retries=1)
+    assert namespace().startswith("m ")
+
+
+def test_docstore_rebuild_skips_embedding(cache_path, tmp_path):
+    """reset() + extend() of unchanged chunks does not re-embed them."""
+    store = LanceDBDocStore(
+        "cached",
+        storage_path=tmp_path / "lancedb",
+        embedding_registry="test-cached-counting",
+        embedding_model="counting",
+    )
+    chunks = [f"chunk {i}" for i in range(20)]
+    store.extend(chunks)
+    embedded = len(CountingEmbeddings.embedded)
+    store.reset()
+    store.extend(chunks + ["new chunk"])
+    assert CountingEmbeddings.embedded[embedded:] == ["new chunk"]
+    assert store.table.count_rows() == 21
@@ -0,0 +1,105 @@
+"""Tests for building_with_llms_made_simple.fake_ollama."""
+
+import json
+import random
+from urllib.request import Request, urlopen
+
+import pytest
+
+from building_with_llms_made_simple.fake_ollama import (
+    FakeOllamaConfig,
+    FakeOllamaServer,
+    LatencyModel,
+    fake_instance,
+)
+from building_with_llms_made_simple.models import DocstringEvaluation, Tutorial
+
+
+def post(url: str, payload: dict) -> dict:
+    """POST JSON and decode the JSON reply.
+
+    :param url: Endpoint URL.
+    :param payload: Request body.
+    :return: The decoded response.
+    """
+    request = Request(url, data=json.dumps(payload).encode(), method="POST")
+    with urlopen(request) as response:
+        return json.loads(response.read())
+
+
+@pytest.fixture(scope="module")
+def server():
+    """A fake Ollama server shared by the tests in this module."""
+    with FakeOllamaServer() as running:
+        yield running
+
+
+@pytest.mark.parametrize("model", [Tutorial, DocstringEvaluation])
+def test_fake_instance_is_schema_valid(model):
+    """Generated instances validate against the pydantic model."""
+    for seed in range(20):
+        model.model_validate(
+            fake_instance(model.model_json_schema(), random.Random(seed))
+        )
+
+
+@pytest.mark.parametrize("distribution", ["fixed", "uniform", "normal", "lognormal"])
+def test_latency_is_non_negative(distribution):
+    """Sampled delays are never negative."""
+    latency = LatencyModel(distribution, mean=0.01, spread=0.02)
+    rng = random.Random(0)
+    assert all(latency.sample(rng) >= 0 for _ in range(100))
+
+
+def test_chat_is_deterministic(server):
+    """The same request always gets the same reply."""
+    payload = {"model": "llama3.2", "messages": [{"role": "user", "content": "hi"}]}
+    first = post(f"{server.url}/api/chat", payload)
+    second = post(f"{server.url}/api/chat", payload)
+    assert first["message"]["content"] == second["message"]["content"]
+    assert (
+        len(first["message"]["content"].split()) == FakeOllamaConfig().response_tokens
+    )
+
+
+def test_structured_reply(server):
+    """A JSON schema in `format` produces a schema-valid reply."""
+    payload = {
+        "model": "llama3.2",
+        "messages": [{"role": "user", "content": "make attendees"}],
+        "format": Tutorial.model_json_schema(),
+    }
+    reply = post(f"{server.url}/api/chat", payload)
+    Tutorial.model_validate_json(reply["message"]["content"])
+
+
+def test_tool_calls_finish_with_terminal_tool(server):
+    """The fake agent calls a regular tool, then the terminal tool."""
+    tools = [
+        {"type": "function", "function": {"name": name, "parameters": params}}
+        for name, params in [
+            ("respond_to_user", {"properties": {"response": {"type": "string"}}}),
+            ("add", {"properties": {"a": {"type": "integer"}}}),
+        ]
+    ]
+    messages = [{"role": "user", "content": "add things"}]
+    first = post(f"{server.url}/api/chat", {"messages": messages, "tools": tools})
+    assert first["message"]["tool_calls"][0]["function"]["name"] == "add"
+
+    messages.append({"role": "assistant", "content": ""})
+    second = post(f"{server.url}/api/chat", {"messages": messages, "tools": tools})
+    assert second["message"]["tool_calls"][0]["function"]["name"] == "respond_to_user"
+
+
+def test_structured_bot_against_fake_server(server):
+    """StructuredBot runs end to end against the stand-in server."""
+    import llamabot as lmb
+
+    bot = lmb.StructuredBot(
+        system_prompt="You are a creative generator of fake personas.",
+        pydantic_model=Tutorial,
+        model_name="ollama_chat/llama3.2",
+        api_base=server.url,
+        stream_target="none",
+    )
+    assert isinstance(bot("Generate attendees."), Tutorial)
@@ -0,0 +1,138 @@
+"""Tests for building_with_llms_made_simple.fanout."""
+
+import asyncio
+import time
+
+import pytest
+
+from building_with_llms_made_simple.docstore import KnowledgeStore
+from building_with_llms_made_simple.fanout import (
+    FanOutRetriever,
+    afan_out,
+    embedding_key,
+    enable_concurrent_retrieval,
+    fan_out,
+)
+from building_with_llms_made_simple.memory import ConversationMemory
+from building_with_llms_made_simple.retrieval import HybridRetriever
+
+
+class SlowStore:
+    """Stand-in docstore that takes a while and counts its searches."""
+
+    def __init__(self, results, delay=0.2):
+        self.results = results
+        self.delay = delay
+        self.calls = []
+
+    def __bool__(self):
+        """Be truthy, like a non-empty store.
+
+        :return: True.
+        """
+        return True
+
+    def retrieve(self, query, n_results=10):
+        """Return the fixed results slowly.
+
+        :param query: Recorded.
+        :param n_results: Number of results.
+        :return: The results.
+        """
+        self.calls.append((query, n_results))
+        time.sleep(self.delay)
+        return self.results[:n_results]
+
+
+@pytest.fixture
+def stores(tmp_path):
+    """Open two knowledge stores and a memory with the same embeddings.
+
+    :return: The stores and the memory.
+    """
+    options = dict(
+        storage_path=tmp_path,
+        embedding_registry="test-docstore-hash",
+        embedding_model="hash",
+    )
+    tokens = KnowledgeStore("tokens", rerank=False, **options)
+    sentences = KnowledgeStore("sentences", rerank=False, **options)
+    tokens.extend(["Zenthing is a language.", "It is used for data science."])
+    sentences.extend(["Zenthing is a language.", "Zenthing has macros."])
+    memory = ConversationMemory("memory", **options)
+    memory.extend(["Earlier answer."])
+    return tokens, sentences, memory
+
+
+def test_stores_share_one_query_embedding(stores, embedded):
+    """The query is embedded once, and every store returns its usual results."""
+    stores = [*stores, HybridRetriever(stores[0])]
+    serial = [store.retrieve("What is Zenthing?", 2) for store in stores]
+    embedded.clear()
+    assert fan_out("What is Zenthing?", stores, 2) == serial
+    assert embedded == ["What is Zenthing?"]
+    assert embedding_key(stores[0]) == embedding_key(stores[2])
+    assert embedding_key(SlowStore([])) is None
+
+
+def test_searches_run_concurrently():
+    """Slow stores are searched at the same time, from sync and async code."""
+    slow = [SlowStore([f"chunk {i}"]) for i in range(4)]
+    start = time.perf_counter()
+    assert fan_out("q", slow, 1) == [[f"chunk {i}"] for i in range(4)]
+    assert asyncio.run(afan_out("q", slow, 1)) == [[f"chunk {i}"] for i in range(4)]
+    assert time.perf_counter() - start < 0.7
+
+
+def test_fan_out_retriever_merges_rankings(stores):
+    """Chunks found by several stores rank first."""
+    retriever = FanOutRetriever(stores[:2])
+    results = retriever.retrieve("What is Zenthing?", 3)
+    assert results[0].startswith("Zenthing is a language.")
+    assert len(results) == len(set(results)) == 3
+    assert asyncio.run(retriever.aretrieve("What is Zenthing?", 3)) == results
+
+    version = retriever.version
+    stores[1].extend(["Zenthing compiles quickly."])
+    assert retriever.version != version
+    assert FanOutRetriever([SlowStore([])]).version is None
+    with pytest.raises(ValueError):
+        FanOutRetriever(stores[:2], weights=[1.0])
+
+
+def test_bot_searches_memory_alongside_docstore():
+    """QueryBot's memory lookup is answered by the concurrent prefetch."""
+
+    class Bot:
+        """The retrieval steps of QueryBot."""
+
+        def __init__(self, docstore, memory):
+            self.docstore = docstore
+            self.memory = memory
+
+        def __call__(self, query, n_results=20):
+            """Retrieve like QueryBot does.
+
+            :param query: The question.
+            :param n_results: Results per store.
+            :return: The retrieved chunks.
+            """
+            documents = self.docstore.retrieve(query, n_results)
+            return documents + self.memory.retrieve(query, n_results)
+
+    docstore, memory = SlowStore(["chunk"]), SlowStore(["memory"])
+    bot = Bot(docstore, memory)
+    enable_concurrent_retrieval(bot)
+    start = time.perf_counter()
+    assert bot("q", 2) == ["chunk", "memory"]
+    assert time.perf_counter() - start < 0.35
+    assert memory.calls == [("q", 2)]
+
+    # Lookups that were not prefetched still reach the memory store.
+    assert bot.memory.retrieve("other", 1) == ["memory"]
+    assert memory.calls[-1] == ("other", 1)
+    assert bot.memory.results == ["memory"]
+
+    unremembering = Bot(docstore, None)
+    enable_concurrent_retrieval(unremembering)
+    assert unremembering.docstore is docstore
@@ -0,0 +1,124 @@
+"""Tests for building_with_llms_made_simple.ingest."""
+
+from building_with_llms_made_simple.ingest import (
+    batched,
+    chunking_pool,
+    ingest_directory,
+)
+
+
+class ListDocStore:
+    """Minimal docstore that records each `extend` call."""
+
+    def __init__(self):
+        self.batches = []
+
+    def extend(self, documents):
+        """Record a batch of documents.
+
+        :param documents: The documents to store.
+        """
+        self.batches.append(list(documents))
+
+
+class OptimizingDocStore(ListDocStore):
+    """Docstore that records when its indexes are updated."""
+
+    def optimize(self):
+        """Record how many batches had been written when indexing ran."""
+        self.optimized_after = len(self.batches)
+
+
+def test_batched():
+    """Batches are bounded and cover every item in order."""
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+
+def test_ingest_directory(tmp_path):
+    """Every file is chunked and written in bounded batches."""
+    for i in range(3):
+        (tmp_path / f"doc{i}.txt").write_text(" ".join(f"w{i}_{j}" for j in range(10)))
+    (tmp_path / "ignored.md").write_text("not matched")
+
+    docstore = OptimizingDocStore()
+    stats = ingest_directory(
+        tmp_path,
+        docstore,
+        chunker_kwargs=dict(tokenizer="word", chunk_size=5, chunk_overlap=0),
+        workers=2,
+        batch_size=4,
+    )
+
+    chunks = [chunk for batch in docstore.batches for chunk in batch]
+    assert stats.files == 3
+    assert stats.chunks == len(chunks) == 6
+    assert all(len(batch) <= 4 for batch in docstore.batches)
+    assert docstore.optimized_after == stats.batches == 2
+    assert chunks[0].split() == [f"w0_{j}" for j in range(5)]
+
+
+class SyncingDocStore(ListDocStore):
+    """Docstore that records the chunks passed to `sync`."""
+
+    def sync(self, documents, collection=None):
+        """Record the full set of chunks.
+
+        :param documents: Every chunk of the corpus.
+        :param collection: The collection being synced.
+        :return: Stats claiming every chunk was new.
+        """
+        from building_with_llms_made_simple.docstore import SyncStats
+
+        self.synced = list(documents)
+        self.collection = collection
+        return SyncStats(added=len(self.synced))
+
+
+def test_ingest_directory_sync(tmp_path):
+    """In sync mode the whole corpus is handed to `sync` instead of `extend`."""
+    (tmp_path / "doc.txt").write_text(" ".join(f"w{j}" for j in range(10)))
+
+    docstore = SyncingDocStore()
+    stats = ingest_directory(
+        tmp_path,
+        docstore,
+        chunker_kwargs=dict(tokenizer="word", chunk_size=5, chunk_overlap=0),
+        workers=1,
+        sync=True,
+        collection="sop",
+    )
+
+    assert docstore.batches == []
+    assert docstore.collection == "sop"
+    assert len(docstore.synced) == stats.chunks == stats.added == 2
+
+
+def test_ingest_directory_by_section(tmp_path):
+    """The section strategy titles each chunk with its file's name."""
+    (tmp_path / "cleaning.txt").write_text("1. Scope\nFloors.\n2. Steps\nMop.")
+
+    docstore = ListDocStore()
+    ingest_directory(
+        tmp_path,
+        docstore,
+        strategy="section",
+        chunker_kwargs=dict(tokenizer="word"),
+        workers=1,
+    )
+
+    (chunks,) = docstore.batches
+    assert [(c.document_title, c.section_number) for c in chunks] == [
+        ("cleaning", "1"),
+        ("cleaning", "2"),
+    ]
+
+
+def test_ingest_directory_with_prepared_pool(tmp_path):
+    """A pool started ahead of the docstore is used, and left running, by ingests."""
+    (tmp_path / "doc.txt").write_text(" ".join(f"w{j}" for j in range(10)))
+    kwargs = dict(tokenizer="word", chunk_size=5, chunk_overlap=0)
+    with chunking_pool("token", kwargs, workers=1) as executor:
+        for _ in range(2):
+            docstore = ListDocStore()
+            stats = ingest_directory(tmp_path, docstore, executor=executor)
+            assert stats.chunks == 2 and docstore.batches[0][0] == "w0 w1 w2 w3 w4"
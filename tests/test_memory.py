@@ -0,0 +1,144 @@
+"""Tests for building_with_llms_made_simple.memory."""
+
+import threading
+from datetime import timedelta
+
+import pytest
+
+from building_with_llms_made_simple import memory
+from building_with_llms_made_simple.memory import (
+    ConversationMemory,
+    MemoryPolicy,
+    extractive_summary,
+)
+
+
+@pytest.fixture
+def open_memory(tmp_path):
+    """Build a factory for memories sharing a temporary database.
+
+    :return: A function opening the test memory.
+    """
+
+    def open_memory(**kwargs) -> ConversationMemory:
+        """Open the test memory.
+
+        :param kwargs: Extra `ConversationMemory` arguments.
+        :return: The memory.
+        """
+        kwargs.setdefault("policy", MemoryPolicy(recent_turns=3, summarize_every=2))
+        return ConversationMemory(
+            storage_path=tmp_path,
+            embedding_registry="test-docstore-hash",
+            embedding_model="hash",
+            **kwargs,
+        )
+
+    return open_memory
+
+
+def test_extractive_summary_keeps_leading_sentences():
+    """Each turn contributes its first sentence, cut to its share of the budget."""
+    summary = extractive_summary(["First. Second.", "Why? Because.", "x" * 50], 30)
+    assert summary == "First.\nWhy?\n" + "x" * 10 + "…"
+
+
+def test_policy_validates_sizes():
+    """Compaction cannot take more turns than the buffer holds."""
+    with pytest.raises(ValueError):
+        MemoryPolicy(recent_turns=2, summarize_every=3)
+
+
+def test_old_turns_are_compacted(open_memory, embedded):
+    """Overflowing turns become summaries; only summaries are embedded."""
+    store = open_memory()
+    store.extend(f"Answer {i}. Detail {i}." for i in range(4))
+
+    assert store.turns.count_rows() == 2
+    assert embedded == ["Answer 0.\nAnswer 1."]
+    assert store.retrieve("question", n_results=10) == [
+        "Answer 0.\nAnswer 1.",
+        "Answer 2. Detail 2.",
+        "Answer 3. Detail 3.",
+    ]
+    assert store.retrieve("question", n_results=1) == ["Answer 3. Detail 3."]
+    assert open_memory().retrieve("question", n_results=10) == store.retrieve(
+        "question", n_results=10
+    )
+
+
+def test_summaries_are_capped(open_memory):
+    """Each session keeps at most `max_summaries` summaries, newest first."""
+    policy = MemoryPolicy(recent_turns=1, summarize_every=1, max_summaries=2)
+    store = open_memory(policy=policy)
+    store.extend(f"Answer {i}." for i in range(5))
+    summaries = store.summaries.to_arrow()["text"].to_pylist()
+    assert sorted(summaries) == ["Answer 2.", "Answer 3."]
+
+
+def test_sessions_are_partitioned(open_memory):
+    """Sessions share tables but not memories."""
+    store = open_memory()
+    alice, bob = store.session("alice"), store.session("bob")
+    alice.extend(["Alice 1.", "Alice 2.", "Alice 3.", "Alice 4."])
+    bob.append("Bob 1.")
+
+    assert bob.retrieve("question") == ["Bob 1."]
+    assert "Bob 1." not in alice.retrieve("question")
+    alice.forget()
+    assert alice.retrieve("question") == []
+    assert bob.retrieve("question") == ["Bob 1."]
+    store.reset()
+    assert bob.retrieve("question") == []
+
+
+def test_summarizing_does_not_block_memory(open_memory):
+    """While one session's turns are summarized, memory stays readable and writable."""
+    started, release = threading.Event(), threading.Event()
+
+    def slow_summary(turns):
+        """Summarize once the test lets it.
+
+        :param turns: Turn texts, oldest first.
+        :return: The extractive summary.
+        """
+        started.set()
+        assert release.wait(10)
+        return extractive_summary(turns)
+
+    store = open_memory(summarizer=slow_summary)
+    alice, bob = store.session("alice"), store.session("bob")
+    alice.extend(["Alice 1.", "Alice 2.", "Alice 3."])
+    compaction = threading.Thread(target=alice.append, args=["Alice 4."])
+    compaction.start()
+    assert started.wait(10)
+
+    # The turns being summarized are still recalled, and turns can be added.
+    assert alice.retrieve("question") == [f"Alice {i}." for i in range(1, 5)]
+    alice.append("Alice 5.")
+    bob.append("Bob 1.")
+    assert bob.retrieve("question") == ["Bob 1."]
+    release.set()
+    compaction.join(10)
+
+    assert alice.retrieve("question") == [
+        "Alice 1.\nAlice 2.",
+        "Alice 3.",
+        "Alice 4.",
+        "Alice 5.",
+    ]
+    assert not store._compacting
+
+
+def test_ttl_evicts_old_records(open_memory, monkeypatch):
+    """Expired turns and summaries are hidden, then deleted at compaction."""
+    store = open_memory(policy=MemoryPolicy(3, 2, ttl=timedelta(hours=1)))
+    store.extend(["Old 1.", "Old 2.", "Old 3.", "Old 4."])
+    later = memory._utcnow() + timedelta(hours=2)
+    monkeypatch.setattr(memory, "_utcnow", lambda: later)
+
+    assert store.retrieve("question") == []
+    store.extend(["New 1.", "New 2.", "New 3.", "New 4."])
+    assert store.retrieve("question") == ["New 1.\nNew 2.", "New 3.", "New 4."]
+    assert store.summaries.count_rows() == 1
+    assert store.turns.count_rows() == 2
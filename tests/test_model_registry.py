@@ -0,0 +1,125 @@
+"""Tests for building_with_llms_made_simple.model_registry."""
+
+import gc
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from building_with_llms_made_simple import model_registry
+from building_with_llms_made_simple.chunking import (
+    create_section_chunker,
+    create_sentence_chunker,
+    create_token_chunker,
+)
+from building_with_llms_made_simple.embeddings import (
+    CachedSentenceTransformerEmbeddings,
+    SharedSentenceTransformerEmbeddings,
+)
+from building_with_llms_made_simple.model_registry import (
+    clear_models,
+    get_sentence_transformer,
+    get_tokenizer,
+    loaded_models,
+    shared_process_pool,
+    warm_up,
+)
+
+
+class FakeSentenceTransformer:
+    """Stands in for a sentence-transformers model, counting how often it loads."""
+
+    loads = 0
+    lock = threading.Lock()
+
+    def __init__(self, name, device, trust_remote_code):
+        with FakeSentenceTransformer.lock:
+            FakeSentenceTransformer.loads += 1
+        self.name = name
+        self.device = device
+
+    def encode(self, texts, **kwargs):
+        """Embed texts by their length.
+
+        :param texts: The texts.
+        :param kwargs: Ignored.
+        :return: One vector per text.
+        """
+        import numpy as np
+
+        return np.array([[len(text), 1.0] for text in texts])
+
+
+@pytest.fixture
+def fake_models(monkeypatch):
+    """Load fake sentence-transformers models into an empty registry.
+
+    :yield: The fake model class.
+    """
+    clear_models()
+    FakeSentenceTransformer.loads = 0
+    monkeypatch.setattr(
+        model_registry, "_load_sentence_transformer", FakeSentenceTransformer
+    )
+    yield FakeSentenceTransformer
+    clear_models()
+
+
+def test_chunkers_share_one_tokenizer():
+    """Every chunker counts tokens with the process-wide tokenizer."""
+    backend = get_tokenizer("word").tokenizer
+    assert get_tokenizer("word") is get_tokenizer("word")
+    assert create_token_chunker("word").tokenizer.tokenizer is backend
+    assert create_sentence_chunker("word").tokenizer.tokenizer is backend
+    section_chunker = create_section_chunker(tokenizer="word")
+    assert section_chunker.token_chunker.tokenizer.tokenizer is backend
+
+
+def test_models_load_once(fake_models):
+    """Concurrent first uses load a model once; other settings load their own."""
+    with ThreadPoolExecutor(8) as executor:
+        models = list(executor.map(lambda _: get_sentence_transformer("m"), range(8)))
+    assert all(model is models[0] for model in models)
+    assert fake_models.loads == 1
+    assert get_sentence_transformer("m", device="cuda") is not models[0]
+    assert fake_models.loads == 2
+    assert loaded_models() == [
+        ("sentence-transformers", "m", "cpu", True),
+        ("sentence-transformers", "m", "cuda", True),
+    ]
+
+
+def test_embedding_functions_share_models(fake_models, tmp_path):
+    """Separate embedding functions for one model share its loaded copy."""
+    shared = SharedSentenceTransformerEmbeddings(name="m")
+    cached = CachedSentenceTransformerEmbeddings(
+        name="m", cache_path=str(tmp_path / "embeddings.db")
+    )
+    other = SharedSentenceTransformerEmbeddings(name="m")
+    assert shared.embedding_model is cached.embedding_model is other.embedding_model
+    assert shared.generate_embeddings(["abc"]) == [[3.0, 1.0]]
+    assert cached.generate_embeddings(["abc"]) == [[3.0, 1.0]]
+    assert fake_models.loads == 1
+
+
+def worker_models():
+    """Report what a worker process has loaded.
+
+    :return: The worker's registry keys and its count of model loads.
+    """
+    get_sentence_transformer("m")
+    return loaded_models(), FakeSentenceTransformer.loads
+
+
+def test_forked_workers_inherit_warm_models(fake_models):
+    """Workers forked after warm-up use the parent's models without loading them."""
+    warm_up(tokenizers=("word",), embedding_models=("m",))
+    with shared_process_pool(2) as executor:
+        # Both workers have been forked, and the parent's GC is back to normal.
+        assert len(multiprocessing.active_children()) >= 2
+        assert gc.get_freeze_count() == 0
+        keys, loads = executor.submit(worker_models).result()
+    assert ("tokenizer", "word") in keys
+    assert ("sentence-transformers", "m", "cpu", True) in keys
+    assert loads == 1
@@ -1 +1,22 @@
 """Tests for building with llms made simple's machine learning models."""
+
+from building_with_llms_made_simple.models import DocstringEvaluation, Person, Tutorial
+
+
+def test_tutorial_roundtrip():
+    """A Tutorial survives a JSON round trip."""
+    tutorial = Tutorial(attendees=[Person(name="Ada", age=36, occupation="Analyst")])
+    assert Tutorial.model_validate_json(tutorial.model_dump_json()) == tutorial
+
+
+def test_docstring_evaluation_overall_quality():
+    """Overall quality is only defined once both criteria are rated."""
+    assert DocstringEvaluation().overall_quality() is None
+    assert (
+        DocstringEvaluation(has_docstring=True, is_sphinx_style=True).overall_quality()
+        == "good"
+    )
+    assert (
+        DocstringEvaluation(has_docstring=True, is_sphinx_style=False).overall_quality()
+        == "bad"
+    )
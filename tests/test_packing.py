@@ -0,0 +1,106 @@
+"""Tests for building_with_llms_made_simple.packing."""
+
+from building_with_llms_made_simple.chunking import SectionChunk, create_token_chunker
+from building_with_llms_made_simple.docstore import cite
+from building_with_llms_made_simple.packing import (
+    ContextPacker,
+    PackingRetriever,
+    count_tokens,
+    get_tokenizer,
+    merge_chunks,
+    overlap_merge,
+)
+
+TEXT = " ".join(f"word{i}" for i in range(60))
+
+
+def token_chunks(title=None):
+    """Chunk `TEXT` into overlapping token windows.
+
+    :param title: Document title recorded on the chunks.
+    :return: The chunks, in document order.
+    """
+    chunker = create_token_chunker("word", chunk_size=20, chunk_overlap=5)
+    return [SectionChunk(chunk.text, title) for chunk in chunker.chunk(TEXT)]
+
+
+def test_overlap_merge():
+    """Texts join on their shared characters, and only on a long enough overlap."""
+    assert overlap_merge("the quick brown fox", "brown fox jumps", 5) == (
+        "the quick brown fox jumps"
+    )
+    assert overlap_merge("the quick brown fox", "fox jumps", 5) is None
+    assert overlap_merge("abcabc", "abcabcd", 3) == "abcabcd"
+
+
+def test_overlapping_token_chunks_merge_back_into_the_document():
+    """Neighbouring windows merge, whatever order they were retrieved in."""
+    chunks = token_chunks("doc")
+    assert len(chunks) == 4
+    order = [chunks[2], chunks[0], chunks[3], chunks[1]]
+    assert ContextPacker(budget=None).merge(order) == [SectionChunk(TEXT, "doc")]
+
+
+def test_merging_keeps_documents_and_ranks_apart():
+    """Only chunks of the same document merge, at their best rank."""
+    first, second = token_chunks("a")[:2]
+    other = SectionChunk(second.text, "b")
+    lone = SectionChunk("unrelated text", "a")
+    merged = ContextPacker(budget=None).merge([lone, other, second, first])
+    assert [chunk.document_title for chunk in merged] == ["a", "b", "a"]
+    assert merged[2].text == overlap_merge(first.text, second.text)
+    assert merged_sections("2.1", "2.2") == "2.1, 2.2"
+    assert merge_chunks(SectionChunk("abc"), SectionChunk("zzz")) is None
+
+
+def merged_sections(first, second):
+    """Merge two overlapping chunks of different sections.
+
+    :param first: The first chunk's section number.
+    :param second: The second chunk's section number.
+    :return: The merged chunk's section number.
+    """
+    return merge_chunks(
+        SectionChunk("one two three four", "doc", first, 2),
+        SectionChunk("three four five six", "doc", second, 2),
+        min_overlap=5,
+    ).section_number
+
+
+def test_near_duplicates_are_dropped():
+    """A lightly edited copy of a better-ranked chunk adds nothing."""
+    original = TEXT
+    edited = TEXT.replace("word30", "other")
+    different = "a different passage about something else entirely"
+    packer = ContextPacker(budget=None)
+    assert packer.deduplicate(
+        [
+            SectionChunk(original, "a"),
+            SectionChunk(edited, "b"),
+            SectionChunk(different),
+        ]
+    ) == [SectionChunk(original, "a"), SectionChunk(different)]
+
+
+def test_budget_keeps_best_chunks_that_fit():
+    """Chunks that overflow the budget are skipped; smaller ones still fit."""
+    chunks = [
+        SectionChunk("one two three four five six", "doc"),
+        SectionChunk(" ".join(["long"] * 40), "doc"),
+        SectionChunk("seven eight", "doc"),
+    ]
+    budget = count_tokens(cite(chunks[0]), "word") + count_tokens(
+        cite(chunks[2]), "word"
+    )
+    packed = ContextPacker(budget=budget, tokenizer="word").pack(chunks)
+    assert packed == [chunks[0], chunks[2]]
+    assert get_tokenizer("word") is get_tokenizer("word")
+
+
+def test_packing_retriever(open_store):
+    """Retrieved neighbours reach the prompt once, with one citation line."""
+    store = open_store()
+    store.extend(token_chunks("doc"))
+    retriever = PackingRetriever(store, ContextPacker(budget=None, tokenizer="word"))
+    assert retriever.retrieve("word10", 10) == [cite(SectionChunk(TEXT, "doc"))]
+    assert retriever.table_name == store.table_name
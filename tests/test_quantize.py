@@ -0,0 +1,71 @@
+"""Tests for building_with_llms_made_simple.quantize."""
+
+import lancedb
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from building_with_llms_made_simple.ann import ANNConfig, SearchParams
+from building_with_llms_made_simple.quantize import (
+    binary_codes,
+    code_bytes,
+    distances,
+    int8_settings,
+    rescore,
+)
+
+
+def test_binary_codes_pack_signs():
+    """Each dimension becomes one bit, most significant first, padded to bytes."""
+    codes = binary_codes([[1.0, -1.0, 0.5, 0.0, -2.0, 3.0, 1.0, -1.0, 4.0]])
+    assert codes.dtype == np.uint8
+    assert codes.tolist() == [[0b10100110, 0b10000000]]
+    assert code_bytes(9) == 2 and code_bytes(256) == 32
+
+
+@pytest.mark.parametrize("distance_type", ["l2", "cosine", "dot"])
+def test_distances_match_lancedb(tmp_path, distance_type):
+    """Rescored distances are the ones LanceDB reports for exact search."""
+    vectors = np.random.default_rng(0).standard_normal((20, 8)).astype(np.float32)
+    table = lancedb.connect(tmp_path).create_table(
+        "vectors",
+        pa.table(
+            {"vector": pa.FixedSizeListArray.from_arrays(pa.array(vectors.ravel()), 8)}
+        ),
+    )
+    query = vectors[0] + 0.1
+    search = table.search(query).distance_type(distance_type).limit(20)
+    expected = search.to_arrow()["_distance"].to_numpy()
+    assert np.allclose(
+        np.sort(distances(query, vectors, distance_type)), expected, atol=1e-4
+    )
+    with pytest.raises(ValueError):
+        distances(query, vectors, "hamming")
+
+
+def test_rescore_keeps_closest_rows():
+    """The shortlist is reordered by exact distance and the vectors dropped."""
+    rows = pa.table(
+        {
+            "id": ["far", "near", "mid"],
+            "vector": [[3.0, 0.0], [0.0, 1.0], [1.0, 1.0]],
+            "_distance": [0.0, 0.0, 0.0],
+        }
+    )
+    best = rescore([0.0, 0.0], rows, limit=2)
+    assert best.column_names == ["id", "_distance"]
+    assert best["id"].to_pylist() == ["near", "mid"]
+    assert best["_distance"].to_pylist() == [1.0, 2.0]
+    assert rescore([0.0, 0.0], rows.slice(0, 0), limit=2).column_names == [
+        "id",
+        "_distance",
+    ]
+
+
+def test_int8_settings_use_scalar_quantized_index():
+    """int8 stores index 8-bit codes and refine with the float vectors."""
+    ann, params = int8_settings(ANNConfig(min_rows=10), SearchParams(nprobes=3), 4)
+    assert (ann.index_type, ann.min_rows) == ("IVF_HNSW_SQ", 10)
+    assert params == SearchParams(nprobes=3, refine_factor=4)
+    _, params = int8_settings(None, SearchParams(refine_factor=9), 4)
+    assert params.refine_factor == 9
@@ -0,0 +1,31 @@
+"""Tests for building_with_llms_made_simple.rag."""
+
+from building_with_llms_made_simple.rag import create_rag_bot
+from building_with_llms_made_simple.rerank import (
+    CrossEncoderReranker,
+    RerankingRetriever,
+)
+from building_with_llms_made_simple.retrieval import HybridRetriever
+
+
+def test_cross_encoder_replaces_colbert(open_store):
+    """With a cross-encoder, the knowledge store's ColBERT stage is skipped."""
+    store = open_store(rerank=True)
+    memory = open_store()
+    reranker = CrossEncoderReranker(scorer=lambda pairs: [0.0] * len(pairs))
+    bot = create_rag_bot(store, memory, reranker=reranker, stream_target="none")
+
+    assert isinstance(bot.docstore, RerankingRetriever)
+    assert bot.docstore.store.reranker is None
+    assert bot.docstore.store.table is store.table
+    assert store.reranker is not None
+
+
+def test_wrapped_retriever_is_one_store(open_store):
+    """A retriever wrapping a store is used as a knowledge store, not iterated."""
+    store = open_store()
+    store.extend(["Python lists are mutable.", "Tuples are immutable."])
+    retriever = HybridRetriever(store)
+    bot = create_rag_bot(retriever, open_store(), stream_target="none")
+    assert bot.docstore is retriever
+    assert bot.docstore.retrieve("mutable lists", 1)
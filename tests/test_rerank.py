@@ -0,0 +1,92 @@
+"""Tests for building_with_llms_made_simple.rerank."""
+
+import pytest
+
+from building_with_llms_made_simple.chunking import SectionChunk
+from building_with_llms_made_simple.rerank import (
+    CrossEncoderReranker,
+    RerankingRetriever,
+    ScoreCache,
+)
+
+
+class WordOverlapScorer:
+    """Score pairs by shared words, recording each batch it is given."""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, pairs):
+        """Score a batch of pairs.
+
+        :param pairs: (question, chunk) pairs.
+        :return: The number of words each chunk shares with its question.
+        """
+        self.batches.append(list(pairs))
+        return [
+            len(set(query.lower().split()) & set(text.lower().split()))
+            for query, text in pairs
+        ]
+
+
+@pytest.fixture
+def scorer():
+    """Provide a fresh recording scorer.
+
+    :return: The scorer.
+    """
+    return WordOverlapScorer()
+
+
+@pytest.fixture
+def reranker(scorer, tmp_path):
+    """Build a reranker with a temporary score cache.
+
+    :return: The reranker.
+    """
+    return CrossEncoderReranker(
+        model_name="overlap",
+        cache=ScoreCache(tmp_path / "scores.sqlite"),
+        scorer=scorer,
+    )
+
+
+CHUNKS = [
+    SectionChunk("storage of reagents"),
+    SectionChunk("roles of quality personnel"),
+    SectionChunk("quality monitoring roles of personnel", "qc", "4", 1),
+]
+
+
+def test_rerank_scores_in_one_batch(reranker, scorer):
+    """All candidates are scored in one call and the best are kept."""
+    best = reranker.rerank("roles of personnel in quality monitoring", CHUNKS, 2)
+
+    assert best == [CHUNKS[2], CHUNKS[1]]
+    assert len(scorer.batches) == 1 and len(scorer.batches[0]) == 3
+
+
+def test_scores_are_cached(reranker, scorer):
+    """Repeat questions only score chunks they have not seen."""
+    question = "quality roles"
+    first = reranker.score(question, CHUNKS[:2])
+    assert reranker.score(question, CHUNKS) == first + [2.0]
+    assert [len(batch) for batch in scorer.batches] == [2, 1]
+
+    reranker.score(question, CHUNKS)
+    assert len(scorer.batches) == 2
+    assert reranker.cache.stats().hits == 5
+
+
+def test_reranking_retriever(open_store, reranker, scorer):
+    """The retriever over-fetches candidates and returns the reranked top."""
+    store = open_store()
+    store.extend([f"filler {i}" for i in range(20)] + CHUNKS)
+    retriever = RerankingRetriever(store, reranker, candidates=30)
+
+    results = retriever.retrieve("quality monitoring roles of personnel", 1)
+
+    assert results == [
+        "quality monitoring roles of personnel\n(from document qc, section 4)"
+    ]
+    assert len(scorer.batches[0]) == 23
@@ -0,0 +1,75 @@
+"""Tests for building_with_llms_made_simple.retrieval."""
+
+import pytest
+
+from building_with_llms_made_simple.chunking import SectionChunk
+from building_with_llms_made_simple.docstore import MetadataFilter
+from building_with_llms_made_simple.retrieval import (
+    HybridRetriever,
+    reciprocal_rank_fusion,
+)
+
+QUESTION = "What are the roles of the personnel involved in quality monitoring?"
+
+
+def test_reciprocal_rank_fusion():
+    """Items ranked well by several rankings win; weights scale each ranking."""
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "c", "a"]], rrf_k=0)
+    assert [key for key, _ in fused] == ["b", "a", "c"]
+    assert fused[0][1] == pytest.approx(1 / 2 + 1 / 1)
+
+    weighted = reciprocal_rank_fusion([["a", "b"], ["b", "a"]], weights=[2, 1])
+    assert [key for key, _ in weighted] == ["a", "b"]
+
+
+@pytest.fixture
+def retriever(open_store):
+    """Fill a store with filler chunks and one keyword-rich answer.
+
+    The test embeddings are random, so keywords get the larger weight.
+
+    :return: A hybrid retriever over the store.
+    """
+    store = open_store()
+    store.extend([f"Filler paragraph number {i} about storage." for i in range(40)])
+    store.extend(
+        [
+            SectionChunk(
+                "Quality monitoring personnel roles: the QA officer reviews records.",
+                "qc protocol",
+                "4",
+                1,
+            )
+        ],
+        collection="sop",
+    )
+    return HybridRetriever(store, text_weight=2.0, candidates=10)
+
+
+def test_keyword_match_is_ranked_first(retriever):
+    """A keyword-heavy question finds the chunk sharing its keywords."""
+    (best,) = retriever.retrieve_chunks(QUESTION, n_results=1)
+    assert best.document_title == "qc protocol"
+    assert retriever.retrieve(QUESTION, n_results=1)[0].endswith(
+        "(from document qc protocol, section 4)"
+    )
+
+
+def test_vector_only_fallback(retriever):
+    """Without the keyword ranking, retrieval still returns vector results."""
+    retriever.text_weight = 0
+    assert len(retriever.retrieve_chunks(QUESTION, n_results=5)) == 5
+
+
+def test_filters_apply_to_both_rankings(retriever):
+    """Metadata filters restrict the fused results."""
+    chunks = retriever.retrieve_chunks(
+        QUESTION, n_results=5, where=MetadataFilter(collection="sop")
+    )
+    assert [c.section_number for c in chunks] == ["4"]
+
+
+def test_writes_pass_through(retriever):
+    """The retriever delegates writes to its store."""
+    retriever.append("New chunk.")
+    assert "New chunk." in retriever.store
@@ -0,0 +1,217 @@
+"""Tests for building_with_llms_made_simple.semantic_cache."""
+
+import hashlib
+
+import pytest
+from lancedb.embeddings import TextEmbeddingFunction, get_registry
+from llamabot.components.messages import AIMessage, HumanMessage
+
+from building_with_llms_made_simple.docstore import MetadataFilter
+from building_with_llms_made_simple.retrieval import HybridRetriever
+from building_with_llms_made_simple.semantic_cache import (
+    SemanticCache,
+    SemanticCachingBot,
+    cache_scope,
+    normalize_question,
+    store_version,
+)
+
+
+@get_registry().register("test-semantic-cache-words")
+class WordEmbeddings(TextEmbeddingFunction):
+    """Bag-of-words embeddings, so that rewordings are similar."""
+
+    name: str = "words"
+
+    def ndims(self) -> int:
+        """Report the vector size.
+
+        :return: The vector size.
+        """
+        return 64
+
+    def generate_embeddings(self, texts, *args, **kwargs) -> list:
+        """Count each text's words into hashed buckets.
+
+        :param texts: The texts.
+        :param args: Ignored.
+        :param kwargs: Ignored.
+        :return: One vector per text.
+        """
+        vectors = []
+        for text in texts:
+            vector = [0.0] * 64
+            for word in text.split():
+                vector[hashlib.sha256(word.encode()).digest()[0] % 64] += 1.0
+            vectors.append(vector)
+        return vectors
+
+
+class StubQueryBot:
+    """Stand-in for QueryBot that retrieves from its docstore and counts calls."""
+
+    def __init__(self, docstore, memory=None):
+        self.docstore = docstore
+        self.memory = memory
+        self.model_name = "stub"
+        self.system_prompt = "Answer from the documents."
+        self.stream_target = "none"
+        self.calls = 0
+
+    def __call__(self, query, n_results=20):
+        """Answer with the first retrieved chunk.
+
+        :param query: The question.
+        :param n_results: Chunks to retrieve.
+        :return: The answer.
+        """
+        self.calls += 1
+        query = query if isinstance(query, str) else query.content
+        chunks = self.docstore.retrieve(query, n_results)
+        answer = f"answer {self.calls}: {chunks[0]}"
+        if self.memory is not None:
+            self.memory.append(answer)
+        return AIMessage(content=answer)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Open a semantic cache with bag-of-words embeddings.
+
+    :return: The cache.
+    """
+    return SemanticCache(
+        storage_path=tmp_path / "cache",
+        embedding_registry="test-semantic-cache-words",
+        embedding_model="words",
+        threshold=0.8,
+    )
+
+
+def test_normalize_question():
+    """Case, spacing and final punctuation do not matter."""
+    assert normalize_question("  How is  Zenthing USED?! ") == "how is zenthing used"
+
+
+def test_similar_questions_are_answered_from_cache(open_store, cache):
+    """A rewording is answered without retrieval, with the original sources."""
+    store = open_store()
+    store.extend(["Zenthing is used for data science."])
+    bot = SemanticCachingBot(StubQueryBot(store), cache)
+
+    first = bot.ask("How is Zenthing used in data science?", n_results=1)
+    assert first.similarity is None
+    assert first.sources == ["Zenthing is used for data science."]
+
+    again = bot.ask(HumanMessage(content="how is zenthing used for data science"), 1)
+    assert bot.calls == 1
+    assert (again.answer, again.sources) == (first.answer, first.sources)
+    assert again.question == "How is Zenthing used in data science?"
+    assert 0.8 <= again.similarity < 1
+    assert bot("What is the capital of France?", 1).content.startswith("answer 2")
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_cache_is_scoped_by_retrieval_settings(open_store, cache):
+    """The same question with a different `n_results` is answered afresh."""
+    store = open_store()
+    store.extend(["Zenthing is used for data science."])
+    bot = SemanticCachingBot(StubQueryBot(store), cache)
+    bot("What is Zenthing?", 1)
+    bot("What is Zenthing?", 2)
+    assert bot.calls == 2
+    assert cache_scope(bot.bot, 1) != cache_scope(bot.bot, 2)
+
+
+def test_cache_is_scoped_by_filter_and_retrievers(open_store, cache):
+    """Views of different collections, or other retrievers, do not share answers."""
+    store = open_store()
+    store.extend(["Zenthing is a data science tool."], collection="zen")
+    store.extend(["Mop the floors daily."], collection="sop")
+    sop = SemanticCachingBot(
+        StubQueryBot(store.filtered(MetadataFilter(collection="sop"))), cache
+    )
+    zen = SemanticCachingBot(
+        StubQueryBot(store.filtered(MetadataFilter(collection="zen"))), cache
+    )
+    assert sop.ask("What should I know?", 1).sources == ["Mop the floors daily."]
+    answer = zen.ask("What should I know?", 1)
+    assert answer.similarity is None
+    assert answer.sources == ["Zenthing is a data science tool."]
+
+    hybrid = StubQueryBot(HybridRetriever(store.filtered("collection = 'zen'")))
+    assert cache_scope(hybrid, 1) != cache_scope(zen.bot, 1)
+    tuned = StubQueryBot(
+        HybridRetriever(store.filtered("collection = 'zen'"), text_weight=2.0)
+    )
+    assert cache_scope(tuned, 1) != cache_scope(hybrid, 1)
+
+
+def test_store_changes_invalidate_answers(open_store, cache):
+    """Writing to the knowledge store makes earlier answers stale."""
+    store = open_store()
+    store.extend(["Zenthing is used for data science."])
+    bot = SemanticCachingBot(StubQueryBot(store), cache)
+    bot("What is Zenthing?", 1)
+    version = store_version(store)
+    assert version == str(store.version)
+
+    store.extend(["Zenthing is a programming language."])
+    assert store_version(store) != version
+    bot("What is Zenthing?", 1)
+    assert bot.calls == 2
+    # Stale answers for the same scope are dropped when a new one is cached.
+    assert len(cache) == 1
+
+
+def test_hits_are_remembered(open_store, cache):
+    """Cached answers still reach the bot's conversation memory."""
+    store = open_store()
+    store.extend(["Zenthing is used for data science."])
+    memory = []
+    bot = SemanticCachingBot(StubQueryBot(store, memory=memory), cache)
+    bot("What is Zenthing?", 1)
+    bot("what is zenthing", 1)
+    assert memory == ["answer 1: Zenthing is used for data science."] * 2
+
+
+def test_cache_evicts_oldest_entries(cache):
+    """At most `max_entries` answers are kept, newest first."""
+    cache.max_entries = 2
+    for question in ["one", "two", "three"]:
+        cache.add(question, question.upper(), [], scope="s", version="1")
+    assert len(cache) == 2
+    assert cache.lookup("one", "s", "1") is None
+    assert cache.lookup("three", "s", "1").answer == "THREE"
+    cache.clear()
+    assert len(cache) == 0 and cache.hits == 0
+
+    # Full caches evict a tenth of their entries at once.
+    cache.max_entries = 10
+    for i in range(11):
+        cache.add(f"question {i}", str(i), [], scope="s", version="1")
+    assert len(cache) == 9
+    cache.add("question 11", "11", [], scope="s", version="1")
+    assert len(cache) == 10
+
+
+def test_unversioned_stores_are_not_cached(cache):
+    """Without a store version, every question is answered by the bot."""
+
+    class ListStore:
+        """A docstore without a version."""
+
+        def retrieve(self, query, n_results=10):
+            """Return a fixed chunk.
+
+            :param query: Ignored.
+            :param n_results: Ignored.
+            :return: The chunk.
+            """
+            return ["chunk"]
+
+    bot = SemanticCachingBot(StubQueryBot(ListStore()), cache)
+    assert store_version(ListStore()) is None
+    assert bot.ask("q").sources == ["chunk"]
+    bot("q")
+    assert bot.calls == 2 and len(cache) == 0
@@ -0,0 +1,115 @@
+"""Tests for building_with_llms_made_simple.server and its client."""
+
+import asyncio
+import json
+
+import pytest
+
+from building_with_llms_made_simple import client
+from building_with_llms_made_simple._http import Request, start_server
+from building_with_llms_made_simple.server import BotServer
+
+
+class EchoBot:
+    """Stand-in for QueryBot that echoes the question."""
+
+    def __call__(self, query, n_results=20):
+        """Echo the query.
+
+        :param query: The question.
+        :param n_results: Ignored.
+        :return: The echoed question.
+        """
+        return f"echo: {query}"
+
+
+def roundtrip(question: str, **server_kwargs) -> dict:
+    """Start a BotServer, send it one query through the client, and stop it.
+
+    :param question: The question to send.
+    :param server_kwargs: Address keyword arguments for `start_server`.
+    :return: The client's decoded response.
+    """
+
+    async def main():
+        """Run the server while the blocking client runs in a thread.
+
+        :return: The client's decoded response.
+        """
+        server = await start_server(BotServer(EchoBot()).handle, **server_kwargs)
+        async with server:
+            kwargs = dict(socket_path=server_kwargs.get("socket_path"))
+            if not kwargs["socket_path"]:
+                kwargs["port"] = server.sockets[0].getsockname()[1]
+            return await asyncio.to_thread(client.query, question, **kwargs)
+
+    return asyncio.run(main())
+
+
+def test_query_over_tcp():
+    """Answers come back over TCP."""
+    assert roundtrip("hello")["answer"] == "echo: hello"
+
+
+def test_query_over_unix_socket(tmp_path):
+    """Answers come back over a Unix socket."""
+    payload = roundtrip("hello", socket_path=str(tmp_path / "bot.sock"))
+    assert payload["answer"] == "echo: hello"
+    assert payload["elapsed"] >= 0
+
+
+def test_empty_question_is_rejected():
+    """The server answers 400 and the client raises."""
+    with pytest.raises(RuntimeError, match="question"):
+        roundtrip("")
+
+
+@pytest.mark.parametrize(
+    "body, error",
+    [
+        (b"{not json", "JSON"),
+        (b'["hello"]', "JSON object"),
+        (b'{"question": 1}', "question"),
+        (b'{"question": "hi", "n_results": "five"}', "n_results"),
+        (b'{"question": "hi", "n_results": 2.5}', "n_results"),
+        (b'{"question": "hi", "n_results": 0}', "n_results"),
+        (b'{"question": "hi", "n_results": true}', "n_results"),
+    ],
+)
+def test_malformed_queries_are_rejected(body, error):
+    """Invalid payloads get a 400 naming the problem, and never reach the bot."""
+    request = Request("POST", "/query", body=body)
+    response = asyncio.run(BotServer(EchoBot()).handle(request))
+    assert response.status == 400
+    assert error in json.loads(response.body)["error"]
+
+
+@pytest.mark.parametrize(
+    "raw, error",
+    [
+        (b"garbage\r\n\r\n", "request line"),
+        (b"POST /query HTTP/1.1\r\nContent-Length: many\r\n\r\n", "length"),
+        (b"POST /query HTTP/1.1\r\nContent-Length: -1\r\n\r\n", "length"),
+    ],
+)
+def test_malformed_requests_are_rejected(raw, error):
+    """Requests that cannot be parsed get a 400, not a dropped connection."""
+
+    async def main():
+        """Send raw bytes to a running server.
+
+        :return: Everything the server sent back before closing.
+        """
+        server = await start_server(BotServer(EchoBot()).handle)
+        async with server:
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(raw)
+            await writer.drain()
+            reply = await reader.read()
+            writer.close()
+            return reply
+
+    head, _, body = asyncio.run(main()).partition(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 400 ")
+    assert error in json.loads(body)["error"]
@@ -0,0 +1,55 @@
+"""Tests for building_with_llms_made_simple.transport."""
+
+import llamabot as lmb
+import pytest
+
+from building_with_llms_made_simple.batch import batch
+from building_with_llms_made_simple.fake_ollama import FakeOllamaServer
+from building_with_llms_made_simple.transport import (
+    NO_POOLING,
+    PoolConfig,
+    enable_pooling,
+    pooled_client,
+)
+
+
+@pytest.fixture(scope="module")
+def server():
+    """A fake Ollama server shared by the tests in this module."""
+    with FakeOllamaServer() as running:
+        yield running
+
+
+def make_bot(server) -> lmb.SimpleBot:
+    """Build a SimpleBot pointed at the fake server.
+
+    :param server: The fake server.
+    :return: The bot.
+    """
+    return lmb.SimpleBot(
+        "sys",
+        model_name="ollama_chat/llama3.2",
+        api_base=server.url,
+        stream_target="none",
+    )
+
+
+def test_pool_is_shared_per_config():
+    """Equal settings share one handler; different settings do not."""
+    assert pooled_client() is pooled_client(PoolConfig())
+    assert pooled_client(NO_POOLING) is not pooled_client()
+
+
+def test_bots_reuse_one_connection(server):
+    """Calls from several bots go over a single kept-alive connection."""
+    config = PoolConfig(max_connections=8)
+    for i in range(3):
+        enable_pooling(make_bot(server), config)(f"hello {i}")
+    pool = pooled_client(config).client._transport._pool
+    assert len(pool.connections) == 1
+
+
+def test_batches_use_the_async_pool(server):
+    """Batching a pooled bot swaps in the matching async handler."""
+    results = batch(enable_pooling(make_bot(server)), ["a", "b"])
+    assert all(r.response for r in results)